@@ -1,4 +1,5 @@
 from .google_api import router as google_api_router
 from .meeting_room import router as meeting_room_router
 from .reservation import router as reservation_router
+from .stats import router as stats_router
 from .user import router as user_router
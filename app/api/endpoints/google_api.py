@@ -1,17 +1,13 @@
 from datetime import datetime
+from http import HTTPStatus
 
-from aiogoogle import Aiogoogle
 from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core import db, user
-from app.core import google_client as google
-from app.services import google_api as google_serv
+from app.api import validators
+from app.core import user
+from app.schemas.report_job import ReportJobResponse
 from app.services import constants as const
-
-from app.crud.reservation import reservation_crud as rsr_crud
-
-from pprint import pprint
+from app.services.report_jobs import ReportJob, report_jobs
 
 router = APIRouter()
 
@@ -19,24 +15,34 @@ router = APIRouter()
 @router.post(
     path='/',
     summary=const.API_GOOGLE_UPLOAD,
-    response_model=list[dict[str, int]],
+    status_code=HTTPStatus.ACCEPTED,
+    response_model=ReportJobResponse,
+    response_model_exclude_none=True,
     dependencies=[Depends(user.current_superuser)]
 )
 async def det_report(
     start_time: datetime,
     end_time: datetime,
-    session: AsyncSession = Depends(db.get_async_session),
-    wrapper_service: Aiogoogle = Depends(google.get_service)
-) -> list[dict[str, int]]:
-    """Только для суперюзеров."""
-    count_reservations = await rsr_crud.count_reses_in_time_interval(
-        start_time=start_time,
-        end_time=end_time,
-        session=session
-    )
-    spreadsheet_id = await google_serv.spreadsheet_create(wrapper_service)
-    await google_serv.set_user_permissions(spreadsheet_id, wrapper_service)
-    await google_serv.spreadsheet_update_value(
-        spreadsheet_id, count_reservations, wrapper_service
-    )
-    return count_reservations
+) -> ReportJob:
+    """Только для суперюзеров.
+
+    Ставит построение отчёта в очередь и сразу возвращает задачу.
+    Отчёт за тот же период, построенный недавно или строящийся сейчас,
+    переиспользуется.
+    """
+    return report_jobs.submit(start_time, end_time)
+
+
+@router.get(
+    path='/jobs/{job_id}',
+    summary=const.API_GOOGLE_JOB,
+    response_model=ReportJobResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(user.current_superuser)]
+)
+async def get_report_job(job_id: str) -> ReportJob:
+    """Только для суперюзеров.
+
+    Возвращает состояние задачи и ссылку на готовую таблицу.
+    """
+    return validators.check_report_job_exists(job_id)
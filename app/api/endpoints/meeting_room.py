@@ -1,17 +1,34 @@
+from datetime import date, datetime, time, timedelta
 from http import HTTPStatus
 
-from fastapi import APIRouter, Body, Depends
+from fastapi import (
+    APIRouter, BackgroundTasks, Body, Depends, Header, HTTPException, Query,
+    Request, Response
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import validators
 from app.core import db, user
+from app.core.config import settings
 from app.crud.meeting_room import meeting_room_crud as crud
 from app.models import meeting_room as model
 from app.services import constants as const
 from app.schemas import meeting_room as schema
+from app.services.free_slots import FreeSlot, find_free_slots
+from app.services.occupancy import OccupancyBitmaps, occupancy_bitmaps
+from app.services.pagination import set_next_cursor
+from app.services.serialization import (
+    NumpyJSONResponse, json_response, schema_columns
+)
+from app.services.utilization import (
+    Granularity, align, compute_utilization, load_intervals
+)
+from app.services.versions import CATALOG, versions
 
 router = APIRouter()
 
+ROOM_COLUMNS = schema_columns(schema.MeetingRoomResponse)
+
 
 @router.get(
     '/',
@@ -20,17 +37,215 @@ router = APIRouter()
     response_model_exclude_none=True
 )
 async def get_all_meeting_rooms(
-    session: AsyncSession = Depends(db.get_async_session)
-) -> list[model.MeetingRoom]:
-    """Получает список всех комнат.
+    request: Request,
+    limit: int = Query(const.PAGE_LIMIT, ge=1, le=const.PAGE_MAX_LIMIT),
+    cursor: None | str = None,
+    if_none_match: None | str = Header(None),
+    session: AsyncSession = Depends(db.get_read_session)
+) -> Response:
+    """Получает страницу списка комнат в порядке id.
+
+    Ответ содержит `ETag`. Если каталог не менялся с выдачи тега
+    из `If-None-Match`, возвращается `304` без запросов к БД.
 
     ### Args:
+    - request (Request): Запрос.
+    - limit (int): Наибольшее число записей на странице.
+    - cursor (None | str): Курсор из заголовка `X-Next-Cursor`
+        предыдущей страницы. Defaults to None.
+    - if_none_match (None | str): Теги ранее полученных ответов.
     - session (AsyncSession): Объект сессии.
 
     ### Returns:
-    - list[model.MeetingRoom]: Список всех комнат.
+    - Response: Комнаты страницы или `304 Not Modified`.
     """
-    return await crud.get_all(session)
+    tag = versions.match(if_none_match, CATALOG, request.url.query)
+    if tag is not None:
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': tag}
+        )
+    version = versions.get(CATALOG)
+    after = validators.check_cursor(cursor, crud)
+    page = await crud.get_page(
+        session, limit=limit, after=after, columns=ROOM_COLUMNS
+    )
+    response = json_response(page.items, exclude_none=True)
+    tag = versions.etag(
+        CATALOG, version, request.url.query, replica=db.is_replica(session)
+    )
+    if tag is not None:
+        response.headers['ETag'] = tag
+    return set_next_cursor(response, page)
+
+
+@router.get(
+    '/free_slots',
+    summary=const.API_FREE_SLOTS,
+    response_model=list[schema.FreeSlotResponse]
+)
+async def get_free_slots(
+    duration: int = Query(..., gt=0, description='Длительность в минутах'),
+    from_time: None | datetime = Query(None, alias='from'),
+    to_time: datetime = Query(..., alias='to'),
+    limit: int = Query(10, ge=1, le=100),
+    session: AsyncSession = Depends(db.get_read_session)
+) -> list[FreeSlot]:
+    """Ищет самые ранние свободные промежутки во всех комнатах.
+
+    Занятые периоды всех комнат загружаются одним запросом,
+    промежутки находятся одним проходом по ним.
+
+    ### Args:
+    - duration (int): Минимальная длительность промежутка в минутах.
+    - from_time (None | datetime): Начало поиска, не раньше текущего
+        времени. Defaults to None.
+    - to_time (datetime): Конец поиска.
+    - limit (int): Сколько промежутков вернуть. Defaults to 10.
+    - session (AsyncSession): Объект сессии.
+
+    ### Raises:
+    - HTTPException: Начало поиска не раньше его окончания.
+
+    ### Returns:
+    - list[FreeSlot]: Промежутки, отсортированные по началу.
+    """
+    now = datetime.now()
+    if from_time is None or from_time < now:
+        from_time = now
+    if to_time <= from_time:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=const.ERR_PERIOD_SEARCH % (from_time, to_time)
+        )
+    busy = await crud.get_busy_periods(from_time, to_time, session)
+    return find_free_slots(
+        busy, from_time, to_time, timedelta(minutes=duration), limit
+    )
+
+
+@router.get(
+    '/free_rooms',
+    summary=const.API_FREE_ROOMS,
+    response_model=list[int]
+)
+async def get_free_rooms(
+    date_from: date,
+    date_to: date,
+    time_from: time,
+    time_to: time,
+    room_ids: None | list[int] = Query(None),
+    every_day: bool = True,
+    session: AsyncSession = Depends(db.get_read_session)
+) -> list[int]:
+    """Отбирает комнаты, свободные в указанное время каждого дня.
+
+    Ответ вычисляется по битовым картам занятости одной векторной
+    операцией над всеми комнатами и днями.
+
+    ### Args:
+    - date_from (date): Первый день периода.
+    - date_to (date): Последний день периода.
+    - time_from (time): Начало времени в каждом дне.
+    - time_to (time): Конец времени в каждом дне.
+    - room_ids (None | list[int]): Проверяемые комнаты,
+        по умолчанию все. Defaults to None.
+    - every_day (bool): Свободна в каждый день периода
+        (иначе хотя бы в один). Defaults to True.
+    - session (AsyncSession): Объект сессии.
+
+    ### Raises:
+    - HTTPException: Период задан неверно или выходит за горизонт карт.
+
+    ### Returns:
+    - list[int]: id свободных комнат.
+    """
+    if time_to <= time_from:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=const.ERR_PERIOD_SEARCH % (time_from, time_to)
+        )
+    if settings.occupancy_bitmaps:
+        bitmaps = occupancy_bitmaps
+        # Общие карты перестраиваются по основной БД: по отстающей
+        # реплике из них на весь день выпали бы свежие брони.
+        async with db.AsyncSessionLocal() as primary:
+            await bitmaps.ensure_current(primary)
+    else:
+        # Общие карты не ведутся: строятся карты только для запроса.
+        bitmaps = OccupancyBitmaps(
+            settings.occupancy_slot_minutes,
+            settings.occupancy_horizon_days
+        )
+        await bitmaps.warm_up(session)
+    first_day = bitmaps.first_day
+    last_day = first_day + timedelta(days=bitmaps.horizon_days - 1)
+    if not first_day <= date_from <= date_to <= last_day:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=const.ERR_OUT_OF_HORIZON % (first_day, last_day)
+        )
+    if room_ids is None:
+        room_ids = await crud.get_all_ids(session)
+    else:
+        room_ids = sorted(await crud.get_existing_ids(set(room_ids), session))
+    return bitmaps.free_rooms(
+        room_ids, date_from, date_to, time_from, time_to, every_day
+    )
+
+
+@router.get(
+    '/utilization',
+    summary=const.API_ROOM_UTILIZATION,
+    response_model=schema.UtilizationResponse,
+    dependencies=[Depends(user.current_superuser)]
+)
+async def get_utilization(
+    from_time: datetime = Query(..., alias='from'),
+    to_time: datetime = Query(..., alias='to'),
+    granularity: Granularity = Granularity.DAY,
+    room_ids: None | list[int] = Query(None),
+    session: AsyncSession = Depends(db.get_read_session)
+) -> Response:
+    """Считает загрузку комнат по корзинам периода.
+
+    Только для суперюзеров. Период расширяется до целых корзин.
+    Брони читаются одним запросом столбцов, загрузка всех комнат
+    и корзин вычисляется векторными операциями NumPy.
+
+    ### Args:
+    - from_time (datetime): Начало периода.
+    - to_time (datetime): Конец периода.
+    - granularity (Granularity): Корзины: дни, часы или часы недели.
+        Defaults to Granularity.DAY.
+    - room_ids (None | list[int]): Комнаты отчёта, по умолчанию все.
+        Defaults to None.
+    - session (AsyncSession): Объект сессии.
+
+    ### Raises:
+    - HTTPException: Период задан неверно или слишком длинный.
+
+    ### Returns:
+    - Response: Забронированные минуты и доля занятого времени.
+    """
+    if to_time <= from_time:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=const.ERR_PERIOD_SEARCH % (from_time, to_time)
+        )
+    from_time, to_time = align(from_time, to_time, granularity)
+    if to_time - from_time > timedelta(days=const.UTILIZATION_MAX_DAYS):
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=const.ERR_UTILIZATION_PERIOD % const.UTILIZATION_MAX_DAYS
+        )
+    if room_ids is None:
+        room_ids = await crud.get_all_ids(session)
+    else:
+        room_ids = sorted(await crud.get_existing_ids(set(room_ids), session))
+    intervals = await load_intervals(room_ids, from_time, to_time, session)
+    return NumpyJSONResponse(compute_utilization(
+        room_ids, intervals, from_time, to_time, granularity
+    ))
 
 
 @router.post(
@@ -103,24 +318,42 @@ async def partially_update_meeting_room(
     '/{room_id}',
     summary=const.API_DELETE_MEET_ROOM,
     status_code=HTTPStatus.OK,
-    response_model=schema.MeetingRoomUpdate,
+    response_model=schema.MeetingRoomRemoved,
     response_model_exclude_none=True,
+    responses={HTTPStatus.ACCEPTED: {'model': schema.MeetingRoomRemoved}},
     dependencies=[Depends(user.current_superuser)],
 )
 async def remove_meeting_room(
     room_id: int,
+    response: Response,
+    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(db.get_async_session)
-) -> model.MeetingRoom:
-    """Удаляет указанную комнату.
+) -> dict:
+    """Удаляет указанную комнату вместе с её бронями и сериями.
+
+    Если броней больше `settings.room_delete_chunk_size`, они
+    удаляются в фоне пачками, а ответ приходит сразу со статусом 202.
 
     ### Args:
-    - room_id (int): _description_
+    - room_id (int): id удаляемой комнаты.
     - session (AsyncSession, optional): Объект сессии.
 
     ### Returns:
-        - model.MeetingRoom: Удалённая комната.
-            После удаления данные комнаты всё ещё остаются в сессии.
+    - dict: Данные удалённой комнаты и число её броней.
     """
     room = await validators.check_meeting_room_exists(room_id, session)
+    reservations = await crud.count_reservations(room.id, session)
+    removed = {
+        'name': room.name,
+        'description': room.description,
+        'reservations': reservations,
+    }
+    if reservations > settings.room_delete_chunk_size:
+        background_tasks.add_task(
+            crud.remove_in_chunks, room.id, settings.room_delete_chunk_size
+        )
+        response.status_code = HTTPStatus.ACCEPTED
+        return removed | {'pending': True}
 
-    return await crud.remove(room, session)
+    await crud.remove(room, session)
+    return removed
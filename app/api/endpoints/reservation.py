@@ -1,19 +1,39 @@
+from datetime import datetime, timedelta
 from http import HTTPStatus
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import validators
 from app.core import db
 from app.core import user
+from app.core.locks import room_locks
 from app.crud.reservation import reservation_crud as crud
+from app.crud.reservation_series import reservation_series_crud as srs_crud
 from app.models import reservation as model
+from app.models import reservation_series as srs_model
 from app.services import constants as const
+from app.services.export import MEDIA_TYPES, ExportFormat, encode_rows
+from app.services.pagination import set_next_cursor
+from app.services.serialization import json_response, schema_columns
+from app.services.versions import room_key, versions
+from app.services.recurrence import Recurrence
 from app.schemas import reservation as rsr_schema
+from app.schemas import reservation_series as srs_schema
 from app.schemas import user as user_schema
 
 router = APIRouter()
 
+RESERVATION_COLUMNS = schema_columns(rsr_schema.ReservationResponse)
+MY_RESERVATION_COLUMNS = schema_columns(
+    rsr_schema.ReservationResponse, exclude={'user_id'}
+)
+MY_SERIES_COLUMNS = schema_columns(
+    srs_schema.ReservationSeriesResponse, exclude={'user_id'}
+)
+
 
 @router.get(
     '/',
@@ -22,11 +42,63 @@ router = APIRouter()
     dependencies=[Depends(user.current_superuser)]
 )
 async def get_all_reservations(
-    session: AsyncSession = Depends(db.get_async_session)
-) -> list[model.Reservation]:
-    """Только для суперюзеров. Список всех броней.
+    limit: int = Query(const.PAGE_LIMIT, ge=1, le=const.PAGE_MAX_LIMIT),
+    cursor: None | str = None,
+    session: AsyncSession = Depends(db.get_read_session)
+) -> ORJSONResponse:
+    """Только для суперюзеров. Страница списка всех броней.
+
+    Брони отсортированы по началу, курсор следующей страницы
+    передаётся в заголовке `X-Next-Cursor`.
+    """
+    after = validators.check_cursor(cursor, crud)
+    page = await crud.get_page(
+        session, limit=limit, after=after, columns=RESERVATION_COLUMNS
+    )
+    return set_next_cursor(json_response(page.items), page)
+
+
+@router.get(
+    '/export',
+    summary=const.API_EXPORT_RESERVATIONS,
+    response_class=StreamingResponse,
+    dependencies=[Depends(user.current_superuser)]
+)
+async def export_reservations(
+    export_format: ExportFormat = Query(
+        ExportFormat.NDJSON, alias='format'
+    ),
+    from_time: None | datetime = Query(None, alias='from'),
+    to_time: None | datetime = Query(None, alias='to'),
+    session: AsyncSession = Depends(db.get_read_session)
+) -> StreamingResponse:
+    """Только для суперюзеров. Выгружает брони потоком.
+
+    Брони читаются из БД пачками и отдаются по мере чтения,
+    память не зависит от числа броней.
+
+    ### Args:
+    - export_format (ExportFormat): `ndjson` или `csv`.
+        Defaults to `ndjson`.
+    - from_time (None | datetime): Брони, начинающиеся не раньше.
+        Defaults to None.
+    - to_time (None | datetime): Брони, начинающиеся раньше.
+        Defaults to None.
+    - session (AsyncSession): Объект сессии.
+
+    ### Returns:
+    - StreamingResponse: Брони, отсортированные по началу.
     """
-    return await crud.get_all(session)
+    return StreamingResponse(
+        encode_rows(
+            crud.stream_rows(session, from_time, to_time), export_format
+        ),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition':
+                f'attachment; filename="reservations.{export_format.value}"'
+        }
+    )
 
 
 @router.post(
@@ -42,6 +114,9 @@ async def create(
 ) -> model.Reservation:
     """Создаёт новую бронь.
 
+    Существование комнаты и пересечения с отдельными бронями
+    проверяет сама БД при записи.
+
     ### Args:
     - new_reserve (rsr_schema.ReservationCreate): Данные для новой брони.
     - session (AsyncSession): Объект сессии.
@@ -52,14 +127,184 @@ async def create(
     ### Returns:
     - model.Reservation: Вновь созданная бронь.
     """
-    await validators.check_meeting_room_exists(new_reserve.room_id, session)
-    await validators.check_time_reservation(
+    period = dict(
         room_id=new_reserve.room_id,
         start_time=new_reserve.start_time,
         end_time=new_reserve.end_time,
         session=session
     )
-    return await crud.create(new_reserve, session, current_user)
+    async with room_locks.hold([new_reserve.room_id], session):
+        await validators.check_time_reservation(only_series=True, **period)
+        async with validators.check_db_constraints(**period):
+            return await crud.create(new_reserve, session, current_user)
+
+
+@router.post(
+    '/batch',
+    summary=const.API_CREATE_RESERVATION_BATCH,
+    response_model=list[rsr_schema.ReservationBatchResult]
+)
+async def create_batch(
+    new_reserves: rsr_schema.ReservationBatchCreate,
+    session: AsyncSession = Depends(db.get_async_session),
+    current_user: user_schema.UserDB = Depends(user.current_user)
+) -> list[dict]:
+    """Создаёт пакет броней в одной транзакции.
+
+    Брони, не прошедшие проверку, не создаются,
+    остальные записываются одним `executemany`. Если БД находит
+    пересечение, которого не увидела проверка, пакет проверяется
+    заново по БД и записывается ещё раз.
+
+    ### Args:
+    - new_reserves (rsr_schema.ReservationBatchCreate):
+        Данные для новых броней.
+    - session (AsyncSession): Объект сессии.
+    - current_user (user_schema.UserDB, optional):
+        Пользователь, создавший брони.
+        Defaults to Depends(user.current_user).
+
+    ### Returns:
+    - list[dict]: Результат для каждой брони в порядке запроса.
+    """
+    async def create_accepted() -> dict[int, model.Reservation]:
+        accepted = [
+            index for index in range(len(new_reserves)) if index not in errors
+        ]
+        if not accepted:
+            return {}
+        reservations = await crud.create_many(
+            [new_reserves[index] for index in accepted],
+            session,
+            current_user
+        )
+        return dict(zip(accepted, reservations))
+
+    room_ids = [reservation.room_id for reservation in new_reserves]
+    async with room_locks.hold(room_ids, session):
+        errors = await validators.check_batch_reservations(
+            new_reserves, session
+        )
+        try:
+            created = await create_accepted()
+        except IntegrityError as error:
+            if model.OVERLAP_VIOLATION not in str(error.orig):
+                raise
+            # Пересекающую бронь записал другой воркер после проверки
+            # или её не знал индекс занятости: пакет проверяется заново
+            # по БД, и остальные брони всё же записываются.
+            await session.rollback()
+            await room_locks.renew(room_ids, session)
+            errors = await validators.check_batch_reservations(
+                new_reserves, session, use_index=False
+            )
+            async with validators.check_batch_constraints(session):
+                created = await create_accepted()
+    return [
+        {
+            'index': index,
+            'reservation': created.get(index),
+            'detail': errors.get(index)
+        }
+        for index in range(len(new_reserves))
+    ]
+
+
+@router.post(
+    '/series',
+    summary=const.API_CREATE_SERIES,
+    status_code=HTTPStatus.CREATED,
+    response_model=srs_schema.ReservationSeriesResponse
+)
+async def create_series(
+    new_series: srs_schema.ReservationSeriesCreate,
+    session: AsyncSession = Depends(db.get_async_session),
+    current_user: user_schema.UserDB = Depends(user.current_user)
+) -> srs_model.ReservationSeries:
+    """Создаёт повторяющуюся бронь.
+
+    Серия хранится одной записью независимо от числа повторений.
+
+    ### Args:
+    - new_series (srs_schema.ReservationSeriesCreate): Данные новой серии.
+    - session (AsyncSession): Объект сессии.
+    - current_user (user_schema.UserDB, optional):
+        Пользователь, создавший серию.
+        Defaults to Depends(user.current_user).
+
+    ### Returns:
+    - srs_model.ReservationSeries: Вновь созданная серия.
+    """
+    async with room_locks.hold([new_series.room_id], session):
+        await validators.check_meeting_room_exists(
+            new_series.room_id, session
+        )
+        await validators.check_series_time(
+            Recurrence.from_series(new_series), session
+        )
+        return await srs_crud.create(new_series, session, current_user)
+
+
+@router.get(
+    '/series/my',
+    summary=const.API_GET_MY_SERIES,
+    response_model=list[srs_schema.ReservationSeriesResponse],
+    response_model_exclude={'user_id'}
+)
+async def get_my_series(
+    limit: int = Query(const.PAGE_LIMIT, ge=1, le=const.PAGE_MAX_LIMIT),
+    cursor: None | str = None,
+    user: user_schema.UserDB = Depends(user.current_user),
+    session: AsyncSession = Depends(db.get_read_session)
+) -> ORJSONResponse:
+    """Возвращает страницу серий броней запрашивающего пользователя.
+
+    ### Args:
+    - limit (int): Наибольшее число записей на странице.
+    - cursor (None | str): Курсор из заголовка `X-Next-Cursor`
+        предыдущей страницы. Defaults to None.
+    - user (user_schema.UserDB): Пользователь, запрашивающий свои серии.
+    - session (AsyncSession): Объект сессии.
+
+    ### Returns:
+    - ORJSONResponse: Серии страницы.
+    """
+    after = validators.check_cursor(cursor, srs_crud)
+    page = await srs_crud.get_series_by_user(
+        user, session, limit, after, columns=MY_SERIES_COLUMNS
+    )
+    return set_next_cursor(json_response(page.items), page)
+
+
+@router.delete(
+    '/series/{series_id}',
+    summary=const.API_DELETE_SERIES,
+    status_code=HTTPStatus.OK,
+    response_model=srs_schema.ReservationSeriesResponse
+)
+async def delete_series(
+    series_id: int,
+    session: AsyncSession = Depends(db.get_async_session),
+    current_user: user_schema.UserDB = Depends(user.current_user)
+) -> srs_model.ReservationSeries:
+    """Удаляет серию броней со всеми повторениями.
+
+    Допуск у суперюзера либо у пользователя, создавшего эту серию.
+
+    ### Args:
+    - series_id (int): id удаляемой серии.
+    - session (AsyncSession): Объект сессии.
+    - current_user (user_schema.UserDB, optional):
+        Пользователь, удаляющий серию.
+        Defaults to Depends(user.current_user).
+
+    ### Returns:
+    - srs_model.ReservationSeries: Удалённая серия.
+    """
+    series = await validators.check_series_exists(
+        series_id, session, current_user
+    )
+    return await srs_crud.remove(series, session)
 
 
 @router.patch(
@@ -93,17 +338,20 @@ async def update_reservation(
         session,
         current_user
     )
-    await validators.check_time_reservation(
+    period = dict(
         **update_data.dict(),
         reservation_id=reservation_id,
         room_id=reservation.room_id,
         session=session
     )
-    return await crud.update(
-        obj=reservation,
-        update_data=update_data,
-        session=session
-    )
+    async with room_locks.hold([reservation.room_id], session):
+        await validators.check_time_reservation(**period)
+        async with validators.check_db_constraints(**period):
+            return await crud.update(
+                reservation=reservation,
+                update_data=update_data,
+                session=session
+            )
 
 
 @router.delete(
@@ -147,22 +395,52 @@ async def delete_reservation(
 )
 async def get_reservations_for_room(
     room_id: int,
-    session: AsyncSession = Depends(db.get_async_session)
-) -> list[model.Reservation]:
+    request: Request,
+    if_none_match: None | str = Header(None),
+    session: AsyncSession = Depends(db.get_read_session)
+) -> Response:
     """Список броней для указанной комнаты.
 
     Список начинается с актуального времени.
-
+    Ответ содержит `ETag`. Если расписание не менялось с выдачи тега
+    из `If-None-Match`, возвращается `304` без запросов к БД.
 
     ### Args:
         - room_id (int): Id комнаты.
+        - request (Request): Запрос.
+        - if_none_match (None | str): Теги ранее полученных ответов.
         - session (AsyncSession): Объект сессии.
 
     ### Returns:
-    - list[model.Reservation]: Список броней.
+    - Response: Список занятых периодов или `304 Not Modified`.
     """
+    key = room_key(room_id)
+    tag = versions.match(if_none_match, key, request.url.query)
+    if tag is not None:
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': tag}
+        )
+    version = versions.get(key)
     await validators.check_meeting_room_exists(room_id, session)
-    return await crud.get_busy_times_for_room(room_id, session)
+    schedule = await crud.get_busy_times_for_room(room_id, session)
+    # Без записей список меняется, когда заканчивается первая бронь.
+    valid_until = datetime.now() + timedelta(seconds=const.SCHEDULE_ETAG_TTL)
+    if schedule:
+        valid_until = min(valid_until, schedule[0].end_time)
+    response = json_response([
+        {'start_time': busy.start_time, 'end_time': busy.end_time}
+        for busy in schedule
+    ])
+    tag = versions.etag(
+        key,
+        version,
+        request.url.query,
+        valid_until,
+        replica=db.is_replica(session)
+    )
+    if tag is not None:
+        response.headers['ETag'] = tag
+    return response
 
 
 @router.get(
@@ -171,19 +449,28 @@ async def get_reservations_for_room(
     response_model_exclude={'user_id'}
 )
 async def get_my_reservations(
+    limit: int = Query(const.PAGE_LIMIT, ge=1, le=const.PAGE_MAX_LIMIT),
+    cursor: None | str = None,
     user: user_schema.UserDB = Depends(user.current_user),
-    session: AsyncSession = Depends(db.get_async_session)
-) -> list[model.Reservation]:
-    """Возвращает список броней запращивающего пользователя.
+    session: AsyncSession = Depends(db.get_read_session)
+) -> ORJSONResponse:
+    """Возвращает страницу броней запращивающего пользователя.
 
     ### Args:
+    - limit (int): Наибольшее число записей на странице.
+    - cursor (None | str): Курсор из заголовка `X-Next-Cursor`
+        предыдущей страницы. Defaults to None.
     - user (user_schema.UserDB): Пользователь, запрашивающий свои брони.
     - session (AsyncSession): Объект сессии.
 
     ### Returns:
-    - list[model.Reservation]: Список броней.
+    - ORJSONResponse: Брони страницы.
     """
-    return await crud.get_reservation_by_user(
+    page = await crud.get_reservation_by_user(
         user=user,
-        session=session
+        session=session,
+        limit=limit,
+        after=validators.check_cursor(cursor, crud),
+        columns=MY_RESERVATION_COLUMNS
     )
+    return set_next_cursor(json_response(page.items), page)
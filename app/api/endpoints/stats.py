@@ -0,0 +1,33 @@
+"""Статистика служебных структур, хранимых в памяти процесса.
+"""
+from fastapi import APIRouter, Depends
+from pydantic import StrictInt
+
+from app.core import user
+from app.core.user import user_cache
+from app.crud.meeting_room import meeting_room_crud
+from app.services import constants as const
+from app.services.occupancy import occupancy_bitmaps
+from app.services.report_jobs import report_jobs
+
+router = APIRouter()
+
+
+@router.get(
+    '/',
+    summary=const.API_GET_STATS,
+    response_model=dict[str, dict[str, StrictInt | float]],
+    dependencies=[Depends(user.current_superuser)]
+)
+async def get_stats() -> dict[str, dict[str, int | float]]:
+    """Только для суперюзеров.
+
+    ### Returns:
+    - dict[str, dict[str, int | float]]: Статистика по структурам.
+    """
+    return {
+        'occupancy_bitmaps': occupancy_bitmaps.stats(),
+        'report_jobs': report_jobs.stats(),
+        'room_cache': meeting_room_crud.cache.stats(),
+        'user_cache': user_cache.stats(),
+    }
@@ -21,6 +21,11 @@ main_router.include_router(
     prefix='/reservations',
     tags=['Reservations']
 )
+main_router.include_router(
+    router=ends.stats_router,
+    prefix='/stats',
+    tags=['Stats']
+)
 main_router.include_router(
     router=ends.user_router
 )
@@ -1,12 +1,24 @@
+from bisect import bisect_left
+from contextlib import asynccontextmanager
 from http import HTTPStatus
+from typing import AsyncIterator
 
 from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud.base import CRUDBase
 from app.crud.meeting_room import meeting_room_crud as mr_crud
 from app.crud.reservation import reservation_crud as rsr_crud
+from app.crud.reservation_series import reservation_series_crud as srs_crud
 from app.models.meeting_room import MeetingRoom
-from app.models.reservation import Reservation
+from app.models.reservation import (
+    OVERLAP_VIOLATION, ROOM_VIOLATIONS, Reservation
+)
+from app.models.reservation_series import ReservationSeries
+from app.schemas.reservation import ReservationCreate
+from app.services.recurrence import Recurrence
+from app.services.report_jobs import ReportJob, report_jobs
 from app.services import constants as const
 from app.schemas.user import UserDB
 
@@ -59,16 +71,36 @@ async def check_meeting_room_exists(
     return meeting_room
 
 
-async def check_time_reservation(**kwargs) -> None:
+async def check_time_reservation(
+        *,  # все дальнейшие параметры по ключу
+        only_series: bool = False,
+        **kwargs
+) -> None:
     """Проверяет, свобден ли указанный период времени для запрошенной комнаты.
 
+    Учитываются как отдельные брони, так и повторения серий броней.
+
+    ### Args:
+    - only_series (bool, optional): Проверять только серии броней,
+        когда пересечения отдельных броней запрещает сама БД.
+        Defaults to False.
+
     ### Raises:
     - HTTPException: Данный период времени пересекается с другими.
 
     ### Returns:
     - None
     """
-    reservations = await rsr_crud.get_reservations_by_time(**kwargs)
+    reservations = []
+    if not only_series:
+        reservations = await rsr_crud.get_reservations_by_time(**kwargs)
+    if not reservations:
+        reservations = await srs_crud.get_occurrences_by_time(
+            room_id=kwargs['room_id'],
+            start_time=kwargs['start_time'],
+            end_time=kwargs['end_time'],
+            session=kwargs['session']
+        )
     if reservations:
         raise HTTPException(
             status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
@@ -77,6 +109,193 @@ async def check_time_reservation(**kwargs) -> None:
         )
 
 
+@asynccontextmanager
+async def check_db_constraints(**kwargs) -> AsyncIterator[None]:
+    """Переводит нарушения ограничений таблицы `reservation` в ответы API.
+
+    Пересечения броней и бронь несуществующей комнаты запрещены
+    в самой БД, поэтому запись выполняется без предварительных
+    запросов. Параметры те же, что у `check_time_reservation`.
+
+    ### Raises:
+    - HTTPException: Комната с данным id не найдена.
+    - HTTPException: Данный период времени пересекается с другими.
+    """
+    session = kwargs['session']
+    try:
+        yield
+    except IntegrityError as error:
+        await session.rollback()
+        message = str(error.orig)
+        if OVERLAP_VIOLATION in message:
+            await check_time_reservation(**kwargs)
+            # Пересекавшую бронь успели удалить.
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=const.ERR_TIME_RESERVATION % (kwargs['room_id'], [])
+            )
+        if any(violation in message for violation in ROOM_VIOLATIONS):
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail=const.ERR_ROOM_NOT_FOUND_ID % kwargs['room_id']
+            )
+        raise
+
+
+@asynccontextmanager
+async def check_batch_constraints(
+        session: AsyncSession,
+) -> AsyncIterator[None]:
+    """Переводит пересечение, найденное БД при повторной записи пакета,
+    в ответ API.
+
+    ### Args:
+    - session (AsyncSession): Объект сессии.
+
+    ### Raises:
+    - HTTPException: Брони пакета пересеклись с записанными
+        одновременно с ним.
+    """
+    try:
+        yield
+    except IntegrityError as error:
+        if OVERLAP_VIOLATION not in str(error.orig):
+            raise
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=const.ERR_BATCH_CONFLICT
+        )
+
+
+async def check_batch_reservations(
+        reservations: list[ReservationCreate],
+        session: AsyncSession,
+        use_index: bool = True,
+) -> dict[int, str]:
+    """Проверяет пакет новых броней.
+
+    Все комнаты проверяются одним запросом, занятые периоды всех комнат
+    получаются одним запросом (или из индекса занятости). Пересечения
+    с существующими бронями и между бронями пакета находятся
+    одним проходом по отсортированным броням каждой комнаты,
+    пересечения с сериями броней проверяются по их правилам.
+    Из двух пересекающихся броней пакета принимается более ранняя.
+
+    ### Args:
+    - reservations (list[ReservationCreate]): Новые брони.
+    - session (AsyncSession): Объект сессии.
+    - use_index (bool, optional): Брать занятость из индекса,
+        если он заполнен. Defaults to True.
+
+    ### Returns:
+    - dict[int, str]: Причины отказа по номерам броней в пакете.
+    """
+    errors = {}
+    room_ids = {reservation.room_id for reservation in reservations}
+    existing_ids = await mr_crud.get_existing_ids(room_ids, session)
+    start_time = min(reservation.start_time for reservation in reservations)
+    end_time = max(reservation.end_time for reservation in reservations)
+    busy = await rsr_crud.get_busy_intervals(
+        existing_ids, start_time, end_time, session, use_index
+    )
+    rules = await srs_crud.get_recurrences(
+        existing_ids, start_time, end_time, session, use_index
+    )
+    by_room = {}
+    for index, reservation in enumerate(reservations):
+        if reservation.room_id not in existing_ids:
+            errors[index] = const.ERR_ROOM_NOT_FOUND_ID % reservation.room_id
+            continue
+        by_room.setdefault(reservation.room_id, []).append(index)
+
+    for room_id, indexes in by_room.items():
+        indexes.sort(key=lambda index: reservations[index].start_time)
+        room_busy = busy[room_id]
+        busy_starts = [interval.start_time for interval in room_busy]
+        last_accepted = None
+        for index in indexes:
+            reservation = reservations[index]
+            position = bisect_left(busy_starts, reservation.end_time) - 1
+            if (position >= 0 and
+                    room_busy[position].end_time > reservation.start_time):
+                errors[index] = const.ERR_TIME_RESERVATION % (
+                    room_id, [room_busy[position]]
+                )
+            elif (last_accepted is not None and
+                    reservations[last_accepted].end_time >
+                    reservation.start_time):
+                errors[index] = (
+                    const.ERR_BATCH_TIME_RESERVATION % last_accepted
+                )
+            else:
+                for rule in rules[room_id]:
+                    occurrence = rule.first_overlap(
+                        reservation.start_time, reservation.end_time
+                    )
+                    if occurrence is not None:
+                        errors[index] = const.ERR_TIME_RESERVATION % (
+                            room_id, [occurrence]
+                        )
+                        break
+                else:
+                    last_accepted = index
+    return errors
+
+
+async def check_series_time(
+        rule: Recurrence,
+        session: AsyncSession,
+) -> None:
+    """Проверяет, свободна ли комната во все повторения новой серии.
+
+    Каждая бронь комнаты сверяется с правилом серии за O(1).
+    С другими сериями сверяются только повторения новой серии,
+    попадающие в общий период действия.
+
+    ### Args:
+    - rule (Recurrence): Правило новой серии.
+    - session (AsyncSession): Объект сессии.
+
+    ### Raises:
+    - HTTPException: Повторение серии пересекается с другой бронью.
+
+    ### Returns:
+    - None
+    """
+    start_time, end_time = rule.start_time, rule.last_end_time
+    busy = await rsr_crud.get_busy_intervals(
+        {rule.room_id}, start_time, end_time, session
+    )
+    for reservation in busy[rule.room_id]:
+        if rule.first_overlap(reservation.start_time, reservation.end_time):
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=const.ERR_TIME_RESERVATION % (
+                    rule.room_id, [reservation]
+                )
+            )
+
+    rules = await srs_crud.get_recurrences(
+        {rule.room_id}, start_time, end_time, session
+    )
+    for other in rules[rule.room_id]:
+        for occurrence in rule.occurrences(
+            max(start_time, other.start_time),
+            min(end_time, other.last_end_time)
+        ):
+            conflict = other.first_overlap(
+                occurrence.start_time, occurrence.end_time
+            )
+            if conflict is not None:
+                raise HTTPException(
+                    status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                    detail=const.ERR_TIME_RESERVATION % (
+                        rule.room_id, [conflict]
+                    )
+                )
+
+
 async def check_reservation_exists(
     reservation_id: int,
     session: AsyncSession,
@@ -112,3 +331,82 @@ async def check_reservation_exists(
             detail=const.ERR_NOT_OWNER
         )
     return reservation
+
+
+async def check_series_exists(
+    series_id: int,
+    session: AsyncSession,
+    user: UserDB,
+) -> ReservationSeries:
+    """Проверяет наличие серии броней с указанным id.
+
+    ### Args:
+    - series_id (int): id искомой серии.
+    - session (AsyncSession): Объект сессии.
+    - user (UserDB): Должен быть суперпользователем или создателем серии,
+        иначе доступ запрещён.
+
+    ### Raises:
+    - HTTPException: Серия с указанным id не найдена.
+    - HTTPException: Поьзователь не суперюзер и не создатель серии.
+
+    ### Returns:
+    - ReservationSeries: Запрошенная серия.
+    """
+    series = await srs_crud.get(series_id, session)
+    if series is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=const.ERR_SERIES_NOT_FOUND_ID % series_id
+        )
+    if not user.is_superuser and series.user_id != user.id:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail=const.ERR_NOT_OWNER
+        )
+    return series
+
+
+def check_report_job_exists(job_id: str) -> ReportJob:
+    """Проверяет наличие задачи отчёта с указанным id.
+
+    ### Args:
+    - job_id (str): id задачи.
+
+    ### Raises:
+    - HTTPException: Задача не найдена или устарела.
+
+    ### Returns:
+    - ReportJob: Запрошенная задача.
+    """
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=const.ERR_REPORT_JOB_NOT_FOUND_ID % job_id
+        )
+    return job
+
+
+def check_cursor(cursor: None | str, crud: CRUDBase) -> None | tuple:
+    """Проверяет курсор страницы списка.
+
+    ### Args:
+    - cursor (None | str): Курсор из заголовка предыдущей страницы.
+    - crud (CRUDBase): CRUD-объект, выдающий список.
+
+    ### Raises:
+    - HTTPException: Курсор повреждён или выдан для другого списка.
+
+    ### Returns:
+    - None | tuple: Значения ключа, после которых начинается страница.
+    """
+    if cursor is None:
+        return None
+    try:
+        return crud.parse_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=const.ERR_CURSOR % cursor
+        )
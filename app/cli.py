@@ -0,0 +1,40 @@
+"""Служебные команды приложения.
+
+Запуск из корня проекта:
+
+    python -m app.cli rebuild-daily-counts
+"""
+import argparse
+import asyncio
+
+from app.core.db import AsyncSessionLocal, async_engine
+from app.crud.reservation_daily_count import reservation_daily_count_crud
+
+
+async def rebuild_daily_counts() -> None:
+    """Пересчитывает таблицу `reservationdailycount` по всем броням.
+
+    Запись броней на время пересчёта блокируется, запросы на запись
+    ждут его окончания.
+    """
+    async with AsyncSessionLocal() as session:
+        rows = await reservation_daily_count_crud.rebuild(session)
+    print(f'reservationdailycount: {rows} rows')
+
+
+COMMANDS = {
+    'rebuild-daily-counts': rebuild_daily_counts,
+}
+
+
+async def main(command: str) -> None:
+    try:
+        await COMMANDS[command]()
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('command', choices=COMMANDS)
+    asyncio.run(main(parser.parse_args().command))
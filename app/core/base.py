@@ -1,4 +1,7 @@
 """Импорты класса Base и всех моделей для Alembic.
 """
 from app.core.db import Base  # noqa
-from app.models import meeting_room, reservation, user  # noqa
+from app.models import (  # noqa
+    meeting_room, reservation, reservation_daily_count, reservation_series,
+    user
+)
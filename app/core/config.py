@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Literal, Union
 
 import pydantic as pd
 
@@ -12,7 +12,64 @@ class Settings(pd.BaseSettings):
     version: str =         '2.0.0'
     description: str =     'Really cool project'
     database_url: str =    'sqlite+aiosqlite:///./test.db'
+    # Пул соединений с БД.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Параметры соединений SQLite (PRAGMA). WAL позволяет читать
+    # во время записи, `synchronous=NORMAL` безопасен в режиме WAL.
+    sqlite_journal_mode: str = 'wal'
+    sqlite_synchronous: str = 'normal'
+    sqlite_busy_timeout: int = 5000
+    sqlite_cache_size: int = -64000
+    sqlite_mmap_size: int = 268435456
+    # Реплики для чтения через запятую. Клиент, записавший данные,
+    # `read_your_writes_seconds` секунд читает из основной БД.
+    # Закрепление хранится в памяти процесса: при нескольких воркерах
+    # оно действует только на воркере, принявшем запись, поэтому
+    # своими записями клиент гарантированно видит их лишь при привязке
+    # к воркеру на балансировщике (sticky sessions).
+    # `read_your_writes_clients` - сколько клиентов закрепляется разом.
+    read_database_url: Union[None, str] = None
+    read_your_writes_seconds: int = 5
+    read_your_writes_clients: int = 10000
     secret: str =          'SECRET'
+    # Индекс занятости комнат в памяти процесса.
+    # При нескольких воркерах индексы расходятся, его нужно отключить.
+    availability_index: bool = True
+    # На сколько дней вперёд показывать повторения серий броней.
+    recurrence_horizon_days: int = 90
+    # Битовые карты занятости: размер слота в минутах (делитель 1440)
+    # и число дней вперёд, на которые они строятся.
+    occupancy_bitmaps: bool = True
+    occupancy_slot_minutes: int = 1
+    occupancy_horizon_days: int = 60
+    # Блокировать комнату в БД на время проверки и записи брони.
+    # Нужно при нескольких воркерах.
+    room_lock_in_db: bool = False
+    # Кэш каталога комнат: число записей и время жизни в секундах.
+    room_cache: bool = True
+    room_cache_size: int = 1024
+    room_cache_ttl: int = 60
+    # Комната, у которой броней больше этого числа, удаляется в фоне
+    # пачками такого размера.
+    room_delete_chunk_size: int = 10000
+    # Отчёты за целые дни считаются по таблице `reservationdailycount`.
+    daily_counts: bool = True
+    # Версии расписаний и каталога для ответов с ETag.
+    # При нескольких воркерах версии расходятся, их нужно отключить.
+    etag_versions: bool = True
+    # Кэш пользователей для аутентификации: число записей
+    # и время жизни в секундах.
+    user_cache: bool = True
+    user_cache_size: int = 10000
+    user_cache_ttl: int = 60
+    # Пул для bcrypt: `thread`, `process` или `inline` (в цикле событий)
+    # и число его воркеров (по умолчанию - по числу ядер).
+    password_pool: Literal['thread', 'process', 'inline'] = 'thread'
+    password_workers: Union[None, int] = None
     # for auto_create first superuser
     first_superuser_email: Union[None, pd.EmailStr] = None
     first_superuser_password: Union[None, str] =      None
@@ -28,10 +85,30 @@ class Settings(pd.BaseSettings):
     auth_provider_x509_cert_url: Union[None, str] =   None
     client_x509_cert_url: Union[None, str] =          None
     email_user: Union[None, str] =                    None
+    # Каталог снимков документов discovery Google API.
+    google_discovery_dir: Union[None, str] =          None
+    # Очередь отчётов: число одновременно строящихся отчётов,
+    # число хранимых задач, время их хранения и время (сек),
+    # в течение которого готовый отчёт за тот же период переиспользуется.
+    report_workers: int = 2
+    report_jobs_size: int = 1000
+    report_job_ttl: int = 3600
+    report_cache_ttl: int = 300
 
     class Config:
         env_file = '.env'
 
+    @pd.validator('occupancy_slot_minutes')
+    def check_slot_minutes(cls, value: int) -> int:
+        """Слоты должны укладываться в сутки целиком: карты дней
+        хранятся подряд, и остаток сдвигал бы слоты каждого дня.
+        """
+        if value <= 0 or (24 * 60) % value:
+            raise ValueError(
+                'occupancy_slot_minutes должен делить 1440 без остатка'
+            )
+        return value
+
 
 settings = Settings()
 
@@ -1,8 +1,23 @@
-from sqlalchemy import Column, Integer
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, declared_attr, sessionmaker
+import logging
+from itertools import cycle
+
+from fastapi import Request
+from sqlalchemy import Column, Integer, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session, declarative_base, declared_attr
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.services.cache import MISSING, TTLCache
+
+logger = logging.getLogger('uvicorn.error')
+
+SQLITE_PRAGMAS = (
+    'journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size'
+)
 
 
 class PreBase:
@@ -24,19 +39,184 @@ class PreBase:
 
 Base = declarative_base(cls=PreBase)
 
-async_engine = create_async_engine(
-    settings.database_url,
-    echo=settings.echo
+
+def is_sqlite_file(url: str) -> bool:
+    """БД - файл SQLite (не в памяти)."""
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database not in (
+        None, '', ':memory:'
+    )
+
+
+def engine_options(url: str) -> dict:
+    """Параметры пула соединений для `create_async_engine`.
+
+    Для файла SQLite SQLAlchemy по умолчанию открывает соединение
+    на каждую сессию (`NullPool`), поэтому для него тоже задаётся пул:
+    соединения и их PRAGMA переиспользуются. SQLite в памяти
+    остаётся на единственном соединении по умолчанию.
+    """
+    backend = make_url(url).get_backend_name()
+    if backend == 'sqlite' and not is_sqlite_file(url):
+        return {}
+    options = {
+        'pool_size': settings.db_pool_size,
+        'max_overflow': settings.db_max_overflow,
+        'pool_timeout': settings.db_pool_timeout,
+        'pool_recycle': settings.db_pool_recycle,
+        'pool_pre_ping': settings.db_pool_pre_ping,
+    }
+    if backend == 'sqlite':
+        options['poolclass'] = AsyncAdaptedQueuePool
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Настраивает каждое новое соединение с SQLite."""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(
+            f'PRAGMA {pragma} = {getattr(settings, "sqlite_" + pragma)}'
+        )
+    cursor.close()
+
+
+def create_engine(url: str) -> AsyncEngine:
+    """Создаёт движок с настройками пула и PRAGMA из `settings`.
+
+    ### Args:
+    - url (str): Адрес БД.
+
+    ### Returns:
+    - AsyncEngine: Движок.
+    """
+    engine = create_async_engine(
+        url, echo=settings.echo, **engine_options(url)
+    )
+    if is_sqlite_file(url):
+        event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas)
+    return engine
+
+
+async def log_engine_config(engine: AsyncEngine) -> None:
+    """Записывает в лог действующие настройки пула и SQLite.
+
+    ### Args:
+    - engine (AsyncEngine): Движок.
+    """
+    logger.info('Database pool: %s', engine.pool.status())
+    if engine.dialect.name != 'sqlite':
+        return
+    async with engine.connect() as connection:
+        pragmas = {
+            pragma: await connection.scalar(text(f'PRAGMA {pragma}'))
+            for pragma in SQLITE_PRAGMAS
+        }
+    logger.info('SQLite pragmas: %s', pragmas)
+
+
+async_engine = create_engine(settings.database_url)
+
+# Объекты остаются читаемыми после коммита: CRUD не перечитывает
+# записанные строки, а возвращает их в ответе как есть.
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine, class_=AsyncSession, expire_on_commit=False
 )
 
-AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession)
 
+class ReplicaRouter:
+    """Выбор БД для чтения.
 
-async def get_async_session() -> AsyncSession:
+    Читающие сессии по очереди открываются на репликах из
+    `settings.read_database_url`. Клиент, только что записавший данные
+    через основную БД, `settings.read_your_writes_seconds` секунд читает
+    из неё же, чтобы видеть свои изменения, пока реплики отстают.
+    Клиент определяется по заголовку `Authorization`.
+
+    Закреплённые клиенты хранятся в памяти процесса. Запрос клиента,
+    попавший на другой воркер, может прочитать отстающую реплику,
+    если балансировщик не привязывает клиента к воркеру.
+    """
+
+    def __init__(self, urls: list[str]) -> None:
+        self.engines = [create_engine(url) for url in urls]
+        self._factories = cycle([
+            sessionmaker(
+                bind=engine,
+                class_=AsyncSession,
+                expire_on_commit=False,
+                info={'replica': True}
+            )
+            for engine in self.engines
+        ])
+        self._pinned = TTLCache(
+            settings.read_your_writes_clients,
+            settings.read_your_writes_seconds
+        )
+
+    def pin(self, client: None | str) -> None:
+        """Направляет чтения клиента в основную БД."""
+        if self.engines and client is not None:
+            self._pinned.set(client, True)
+
+    def session_factory(self, client: None | str) -> sessionmaker:
+        """Фабрика сессий для очередного чтения клиента."""
+        if not self.engines or (
+            client is not None and self._pinned.get(client) is not MISSING
+        ):
+            return AsyncSessionLocal
+        return next(self._factories)
+
+
+def is_replica(session: AsyncSession) -> bool:
+    """Сессия читает из реплики."""
+    return session.info.get('replica', False)
+
+
+def client_key(request: None | Request) -> None | str:
+    """Клиент, которому принадлежит запрос."""
+    if request is None:
+        return None
+    return request.headers.get('authorization')
+
+
+replicas = ReplicaRouter([
+    url.strip()
+    for url in (settings.read_database_url or '').split(',')
+    if url.strip()
+])
+
+
+@event.listens_for(Session, 'after_commit')
+def pin_writer(session: Session) -> None:
+    """Закрепляет за основной БД клиента, сессия которого записала данные."""
+    replicas.pin(session.info.get('client'))
+
+
+async def get_async_session(request: Request = None) -> AsyncSession:
     """Генерерует объекты сессий с БД.
 
+    ### Args:
+    - request (Request, optional): Запрос. После записи в сессии
+        клиент запроса некоторое время читает из основной БД.
+        Defaults to None.
+
     ### Yields:
     - AsyncSessionLocal: Объект сессии.
     """
     async with AsyncSessionLocal() as async_session:
+        async_session.info['client'] = client_key(request)
         yield async_session
+
+
+async def get_read_session(request: Request) -> AsyncSession:
+    """Генерирует сессии для эндпоинтов, которые только читают.
+
+    ### Args:
+    - request (Request): Запрос.
+
+    ### Yields:
+    - AsyncSession: Сессия реплики или основной БД.
+    """
+    async with replicas.session_factory(client_key(request))() as session:
+        yield session
@@ -1,7 +1,12 @@
 """Настройки для подключения к GoogleAPI.
 """
+import asyncio
+import json
+import os
+
 from aiogoogle import Aiogoogle
 from aiogoogle.auth.creds import ServiceAccountCreds
+from aiogoogle.resource import GoogleAPI
 
 from app.core.config import settings
 
@@ -34,3 +39,81 @@ async def get_service():
     """
     async with Aiogoogle(service_account_creds=credentials) as aiogoogle:
         yield aiogoogle
+
+
+class DiscoveryCache:
+    """Документы discovery Google API, общие для всех запросов.
+
+    Документ каждого API загружается один раз за жизнь процесса.
+    Если задан каталог `snapshot_dir`, загруженные документы
+    сохраняются в нём и при следующем запуске читаются с диска.
+    """
+
+    def __init__(self, snapshot_dir: None | str = None) -> None:
+        self.snapshot_dir = snapshot_dir
+        self._apis: dict[tuple[str, str], GoogleAPI] = {}
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    async def discover(
+        self,
+        wrapper_service: Aiogoogle,
+        api_name: str,
+        api_version: str
+    ) -> GoogleAPI:
+        """Возвращает описание API, загружая его при первом обращении.
+
+        ### Args:
+        - wrapper_service (Aiogoogle): Клиент для загрузки документа.
+        - api_name (str): Название API, например `sheets`.
+        - api_version (str): Версия API, например `v4`.
+
+        ### Returns:
+        - GoogleAPI: Описание API для построения запросов.
+        """
+        key = (api_name, api_version)
+        api = self._apis.get(key)
+        if api is not None:
+            return api
+        # Одновременные первые запросы ждут одну загрузку.
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            api = self._apis.get(key)
+            if api is None:
+                api = self._load_snapshot(key)
+                if api is None:
+                    api = await wrapper_service.discover(
+                        api_name=api_name, api_version=api_version
+                    )
+                    self._save_snapshot(key, api)
+                self._apis[key] = api
+        return api
+
+    def clear(self) -> None:
+        """Забывает загруженные документы. Снимки на диске остаются."""
+        self._apis.clear()
+
+    def _snapshot_path(self, key: tuple[str, str]) -> None | str:
+        if self.snapshot_dir is None:
+            return None
+        return os.path.join(self.snapshot_dir, '%s_%s.json' % key)
+
+    def _load_snapshot(self, key: tuple[str, str]) -> None | GoogleAPI:
+        path = self._snapshot_path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as snapshot:
+            return GoogleAPI(json.load(snapshot))
+
+    def _save_snapshot(self, key: tuple[str, str], api: GoogleAPI) -> None:
+        path = self._snapshot_path(key)
+        if path is None:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        # Запись через временный файл своего процесса: другой воркер
+        # не прочитает недописанный снимок и не подменит его своим.
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as snapshot:
+            json.dump(api.discovery_document, snapshot)
+        os.replace(temp_path, path)
+
+
+discovery = DiscoveryCache(settings.google_discovery_dir)
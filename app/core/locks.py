@@ -0,0 +1,126 @@
+"""Блокировки записи броней по комнатам.
+
+Проверка пересечений и запись брони должны выполняться атомарно
+для одной комнаты, при этом брони разных комнат не ждут друг друга.
+Внутри процесса используется `asyncio.Lock` на каждую комнату.
+При нескольких воркерах (`settings.room_lock_in_db`) дополнительно
+берётся блокировка в БД: на PostgreSQL - строка комнаты
+(`SELECT ... FOR UPDATE`), на SQLite - `BEGIN IMMEDIATE`.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.meeting_room import MeetingRoom
+
+
+class RoomLocks:
+    """Реестр блокировок комнат.
+
+    Блокировка удаляется из реестра, когда её никто не ждёт,
+    поэтому число хранимых объектов не растёт с числом комнат.
+    """
+
+    def __init__(self) -> None:
+        self._locks: dict[int, asyncio.Lock] = {}
+        self._holders: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(
+        self,
+        room_ids: Iterable[int],
+        session: AsyncSession
+    ) -> AsyncIterator[None]:
+        """Удерживает блокировки указанных комнат.
+
+        Комнаты блокируются по возрастанию id, чтобы параллельные
+        пакетные запросы не ждали друг друга по кругу.
+
+        ### Args:
+        - room_ids (Iterable[int]): id блокируемых комнат.
+        - session (AsyncSession): Сессия, в которой выполняется запись.
+        """
+        acquired = []
+        try:
+            for room_id in sorted(set(room_ids)):
+                lock = self._locks.setdefault(room_id, asyncio.Lock())
+                self._holders[room_id] = self._holders.get(room_id, 0) + 1
+                try:
+                    await lock.acquire()
+                except BaseException:
+                    self._forget(room_id)
+                    raise
+                acquired.append(room_id)
+            if settings.room_lock_in_db:
+                await lock_rooms_in_db(acquired, session)
+            try:
+                yield
+            except BaseException:
+                if settings.room_lock_in_db:
+                    # Блокировка в БД живёт до конца транзакции.
+                    await session.rollback()
+                raise
+            if settings.room_lock_in_db and session.in_transaction():
+                # Запрос ничего не записал (например, пакет без принятых
+                # броней): транзакция с блокировкой завершается сразу,
+                # а не при закрытии сессии. Не откат: он сбросил бы
+                # состояние объектов, которые ещё попадут в ответ.
+                await session.commit()
+        finally:
+            for room_id in reversed(acquired):
+                self._locks[room_id].release()
+                self._forget(room_id)
+
+    async def renew(
+        self,
+        room_ids: Iterable[int],
+        session: AsyncSession
+    ) -> None:
+        """Заново берёт блокировку в БД после отката транзакции
+        внутри `hold`. Блокировки процесса при этом не отпускаются.
+
+        ### Args:
+        - room_ids (Iterable[int]): id комнат из `hold`.
+        - session (AsyncSession): Сессия, в которой выполняется запись.
+        """
+        if settings.room_lock_in_db:
+            await lock_rooms_in_db(sorted(set(room_ids)), session)
+
+    def _forget(self, room_id: int) -> None:
+        self._holders[room_id] -= 1
+        if not self._holders[room_id]:
+            del self._holders[room_id]
+            del self._locks[room_id]
+
+
+async def lock_rooms_in_db(
+    room_ids: list[int],
+    session: AsyncSession
+) -> None:
+    """Берёт блокировку комнат в БД до конца текущей транзакции.
+
+    ### Args:
+    - room_ids (list[int]): id комнат по возрастанию.
+    - session (AsyncSession): Объект сессии.
+    """
+    if session.bind.dialect.name == 'sqlite':
+        # SQLite блокирует запись во всю базу: транзакция сразу
+        # получает право записи, и проверка с записью не перемежаются
+        # с записью других воркеров.
+        await session.execute(text('BEGIN IMMEDIATE'))
+        return
+    await session.execute(
+        select(MeetingRoom.id).where(
+            MeetingRoom.id.in_(room_ids)
+        ).order_by(MeetingRoom.id).with_for_update()
+    )
+
+
+room_locks = RoomLocks()
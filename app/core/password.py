@@ -0,0 +1,87 @@
+"""Хэширование и проверка паролей вне цикла событий.
+
+bcrypt намеренно медленный и занимает процессор на десятки
+миллисекунд. Выполняемый в цикле событий, он задерживает все
+остальные запросы, поэтому `UserManager` передаёт его в пул потоков
+(bcrypt отпускает GIL) или процессов. Вид и размер пула задаются
+настройками `password_pool` и `password_workers`.
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi_users.password import PasswordHelper
+
+from app.core.config import settings
+
+T = TypeVar('T')
+
+password_helper = PasswordHelper()
+
+
+def hash_password(password: str) -> str:
+    """Хэширует пароль. Выполняется в пуле."""
+    return password_helper.hash(password)
+
+
+def verify_and_update(
+    plain_password: str,
+    hashed_password: str
+) -> tuple[bool, None | str]:
+    """Проверяет пароль и при необходимости обновляет хэш.
+    Выполняется в пуле.
+    """
+    return password_helper.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordPool:
+    """Пул, в котором выполняются операции с паролями.
+
+    ### Attrs:
+    - kind: `thread`, `process` или `inline` (в цикле событий).
+    - workers: Число потоков или процессов, None - по числу ядер.
+    """
+
+    def __init__(self, kind: str, workers: None | int = None) -> None:
+        self.kind = kind
+        self.workers = workers
+        self._executor: None | Executor = None
+
+    async def hash(self, password: str) -> str:
+        """Хэширует пароль в пуле."""
+        return await self._run(hash_password, password)
+
+    async def verify_and_update(
+        self,
+        plain_password: str,
+        hashed_password: str
+    ) -> tuple[bool, None | str]:
+        """Проверяет пароль в пуле."""
+        return await self._run(
+            verify_and_update, plain_password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        """Останавливает потоки или процессы пула."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, function: Callable[..., T], *args) -> T:
+        if self.kind == 'inline':
+            return function(*args)
+        if self._executor is None:
+            executor_class = (
+                ProcessPoolExecutor if self.kind == 'process'
+                else ThreadPoolExecutor
+            )
+            self._executor = executor_class(max_workers=self.workers)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, function, *args
+        )
+
+
+password_pool = PasswordPool(
+    settings.password_pool, settings.password_workers
+)
@@ -1,18 +1,74 @@
 import fastapi as fa
 import fastapi_users as fa_u
 import fastapi_users.authentication as auth
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users.manager import UserAlreadyExists, UserNotExists
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from pydantic import UUID4
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import config, db
+from app.core.password import password_pool
 from app.models import user as model
 from app.schemas import user as schema
+from app.services.cache import MISSING, TTLCache
+
+# Пользователи по id. Кэш процесса: при нескольких воркерах изменения,
+# сделанные другим воркером, видны не позже чем через `user_cache_ttl`.
+user_cache = TTLCache(
+    config.settings.user_cache_size, config.settings.user_cache_ttl
+)
+
+
+class CachedUserDatabase(SQLAlchemyUserDatabase):
+    """Адаптер БД пользователей с кэшем `get` по id.
+
+    Каждый запрос с токеном получает пользователя через `get`, поэтому
+    кэш убирает запрос к таблице `user` из аутентификации. Запись
+    изменённого или удалённого пользователя удаляется из кэша.
+    Наружу отдаются копии, чтобы изменения объекта в `UserManager`
+    не попадали в кэш до записи в БД.
+    """
+
+    # Номер версии кэша, общий для всех экземпляров адаптера:
+    # пользователь, прочитанный из БД до изменения, не попадает в кэш
+    # после его очистки.
+    _generation = 0
+
+    async def get(self, id: UUID4) -> None | schema.UserDB:
+        if not config.settings.user_cache:
+            return await super().get(id)
+        user = user_cache.get(id)
+        if user is MISSING:
+            generation = CachedUserDatabase._generation
+            user = await super().get(id)
+            if user is None:
+                return None
+            if generation == CachedUserDatabase._generation:
+                user_cache.set(id, user)
+        return user.copy()
+
+    async def update(self, user: schema.UserDB) -> schema.UserDB:
+        self._invalidate(user.id)
+        updated = await super().update(user)
+        self._invalidate(user.id)
+        return updated
+
+    async def delete(self, user: schema.UserDB) -> None:
+        self._invalidate(user.id)
+        await super().delete(user)
+        self._invalidate(user.id)
+
+    @staticmethod
+    def _invalidate(id: UUID4) -> None:
+        CachedUserDatabase._generation += 1
+        user_cache.pop(id)
 
 
 async def get_user_db(
     session: AsyncSession = fa.Depends(db.get_async_session)
 ):
-    yield SQLAlchemyUserDatabase(schema.UserDB, session, model.UserTable)
+    yield CachedUserDatabase(schema.UserDB, session, model.UserTable)
 
 
 # Определяем транспорт - передача токена
@@ -63,6 +119,65 @@ class UserManager(fa_u.BaseUserManager[schema.UserCreate, schema.UserDB]):
                 reason='Password should not contain e-mail'
             )
 
+    # bcrypt выполняется в пуле `password_pool`, а не в цикле событий,
+    # поэтому методы, хэширующие пароль, повторяют родительские
+    # с асинхронными вызовами пула.
+    async def create(
+        self,
+        user: schema.UserCreate,
+        safe: bool = False,
+        request: None | fa.Request = None
+    ) -> schema.UserDB:
+        await self.validate_password(user.password, user)
+
+        if await self.user_db.get_by_email(user.email) is not None:
+            raise UserAlreadyExists()
+
+        hashed_password = await password_pool.hash(user.password)
+        user_dict = (
+            user.create_update_dict() if safe
+            else user.create_update_dict_superuser()
+        )
+        created_user = await self.user_db.create(
+            self.user_db_model(**user_dict, hashed_password=hashed_password)
+        )
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def authenticate(
+        self, credentials: OAuth2PasswordRequestForm
+    ) -> None | schema.UserDB:
+        try:
+            user = await self.get_by_email(credentials.username)
+        except UserNotExists:
+            # Хэширование выравнивает время ответа для неизвестных email.
+            await password_pool.hash(credentials.password)
+            return None
+
+        verified, updated_password_hash = (
+            await password_pool.verify_and_update(
+                credentials.password, user.hashed_password
+            )
+        )
+        if not verified:
+            return None
+        if updated_password_hash is not None:
+            user.hashed_password = updated_password_hash
+            await self.user_db.update(user)
+        return user
+
+    async def _update(
+        self,
+        user: schema.UserDB,
+        update_dict: dict
+    ) -> schema.UserDB:
+        if 'password' in update_dict:
+            update_dict = dict(update_dict)
+            password = update_dict.pop('password')
+            await self.validate_password(password, user)
+            user.hashed_password = await password_pool.hash(password)
+        return await super()._update(user, update_dict)
+
     # Пример метода для действий после успешной регистрации пользователя.
     async def on_after_register(
             self, user: schema.UserDB, request: None | fa.Request = None
@@ -1,12 +1,13 @@
-from typing import Generic, Type, TypeVar
-from fastapi.encoders import jsonable_encoder
+from datetime import datetime
+from typing import Any, Generic, Iterable, Sequence, Type, TypeVar
 
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import exists, inspect, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import Base
 from app.schemas import user as user_schema
+from app.services.pagination import Page, decode_cursor, encode_cursor
 
 ModelType = TypeVar('ModelType', bound=Base)
 CreateSchemaType = TypeVar('CreateSchemaType', bound=BaseModel)
@@ -15,24 +16,40 @@ UpdateSchemaType = TypeVar('UpdateSchemaType', bound=BaseModel)
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """Базовый класс для операций CRUD.
+
+    ### Attrs:
+    - paginate_by: Поля уникального ключа постраничной выдачи.
+        Последним должно идти `id`.
     """
+    paginate_by: tuple[str, ...] = ('id',)
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
+        self.columns = tuple(
+            attr.key for attr in inspect(model).column_attrs
+        )
 
     async def create(
         self,
         data: CreateSchemaType,
         session: AsyncSession,
-        user: None | user_schema.UserDB = None
+        user: None | user_schema.UserDB = None,
+        commit: bool = True
     ) -> ModelType:
         """Создаёт запись в БД.
 
+        Запись уходит в БД одним INSERT, первичный ключ возвращается
+        драйвером. Сессии не истекают при коммите, поэтому объект
+        не перечитывается из БД.
+
         ### Args:
         - data (CreateSchemaType): Данные для записи в БД.
         - session (AsyncSession): Объект сессии.
         - user (None | user_schema.UserDB, optional):
             Пользователь, связанный с записью.
             Defaults to None.
+        - commit (bool, optional): Зафиксировать транзакцию. Если False,
+            изменения только отправляются в БД (flush). Defaults to True.
 
         ### Returns:
         - ModelType: Объект, записаный в БД.
@@ -42,47 +59,53 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             data['user_id'] = user.id
         obj = self.model(**data)
         session.add(obj)
-        await session.commit()
-        await session.refresh(obj)
+        await self._finish(session, commit)
         return obj
 
     async def update(
         self,
         obj: Base,
         update_data: UpdateSchemaType,
-        session: AsyncSession
+        session: AsyncSession,
+        commit: bool = True
     ) -> ModelType:
         """Обновляет запись в БД.
 
+        Изменяются только переданные поля, совпадающие со столбцами
+        модели. Объект после коммита не перечитывается из БД.
+
         ### Args:
         - obj (Base): Редактируемый объект.
         - update_data (UpdateSchemaType): Обновляемые данные.
         - session (AsyncSession): Объект сессии.
+        - commit (bool, optional): Зафиксировать транзакцию. Если False,
+            изменения только отправляются в БД (flush). Defaults to True.
 
         ### Returns:
         - ModelType: Обновлённый объект.
         """
-        obj_data = jsonable_encoder(obj)
         update_data = update_data.dict(exclude_unset=True)
-        for field in obj_data:
+        for field in self.columns:
             if field in update_data:
                 setattr(obj, field, update_data[field])
 
         session.add(obj)
-        await session.commit()
-        await session.refresh(obj)
+        await self._finish(session, commit)
         return obj
 
     async def remove(
         self,
         obj: Base,
-        session: AsyncSession
+        session: AsyncSession,
+        commit: bool = True
     ) -> ModelType:
         """Удаляет запись из БД.
 
         ### Args:
         - obj (Base): Удаляемый объект.
         - session (AsyncSession): Объект сессии.
+        - commit (bool, optional): Зафиксировать транзакцию. Если False,
+            изменения только отправляются в БД (flush). Defaults to True.
 
         ### Returns:
         - ModelType:
@@ -90,9 +113,16 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             Данные объекта всё ещё хранятся в сессии после удаления из БД.
         """
         await session.delete(obj)
-        await session.commit()
+        await self._finish(session, commit)
         return obj
 
+    @staticmethod
+    async def _finish(session: AsyncSession, commit: bool) -> None:
+        if commit:
+            await session.commit()
+        else:
+            await session.flush()
+
     async def get(
         self,
         obj_id: int,
@@ -126,31 +156,155 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         )
         return objects.all()
 
+    async def get_page(
+        self,
+        session: AsyncSession,
+        *where,
+        limit: int,
+        after: None | tuple = None,
+        columns: None | Sequence[str] = None
+    ) -> Page:
+        """Возвращает страницу объектов в порядке `paginate_by`.
+
+        ### Args:
+        - session (AsyncSession): Объект сессии.
+        - where: Дополнительные условия отбора.
+        - limit (int): Наибольшее число объектов на странице.
+        - after (None | tuple, optional): Значения ключа последнего
+            объекта предыдущей страницы (см. `parse_cursor`).
+            Defaults to None.
+        - columns (None | Sequence[str], optional): Читать только
+            эти столбцы в словари вместо ORM-объектов. Должны включать
+            поля `paginate_by`. Defaults to None.
+
+        ### Returns:
+        - Page: Объекты страницы и курсор следующей.
+        """
+        key = [getattr(self.model, field) for field in self.paginate_by]
+        if columns is None:
+            query = select(self.model)
+        else:
+            query = select(*(getattr(self.model, name) for name in columns))
+        query = query.where(*where)
+        if after is not None:
+            query = query.where(tuple_(*key) > tuple_(*after))
+        result = await session.execute(query.order_by(*key).limit(limit + 1))
+        if columns is None:
+            objects = result.scalars().all()
+        else:
+            objects = [dict(zip(columns, row)) for row in result]
+        if len(objects) <= limit:
+            return Page(objects, None)
+        objects = objects[:limit]
+        last = objects[-1]
+        return Page(objects, encode_cursor([
+            last[field] if columns is not None else getattr(last, field)
+            for field in self.paginate_by
+        ]))
+
+    def parse_cursor(self, cursor: str) -> tuple:
+        """Восстанавливает значения ключа из курсора.
+
+        ### Args:
+        - cursor (str): Курсор из заголовка предыдущей страницы.
+
+        ### Raises:
+        - ValueError: Курсор повреждён или выдан для другого списка.
+
+        ### Returns:
+        - tuple: Значения полей `paginate_by`.
+        """
+        values = decode_cursor(cursor)
+        if len(values) != len(self.paginate_by):
+            raise ValueError(cursor)
+        key = []
+        for field, value in zip(self.paginate_by, values):
+            python_type = getattr(self.model, field).type.python_type
+            try:
+                if python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                elif not isinstance(value, python_type):
+                    raise ValueError(cursor)
+            except TypeError as error:
+                raise ValueError(cursor) from error
+            key.append(value)
+        return tuple(key)
+
+    async def get_many(
+        self,
+        obj_ids: Iterable[int],
+        session: AsyncSession
+    ) -> dict[int, ModelType]:
+        """Получает объекты по списку id одним запросом.
+
+        ### Args:
+        - obj_ids (Iterable[int]): id искомых объектов.
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - dict[int, ModelType]: Найденные объекты по id.
+            Отсутствующих в БД id в словаре нет.
+        """
+        obj_ids = set(obj_ids)
+        if not obj_ids:
+            return {}
+        objects = await session.scalars(
+            select(self.model).where(self.model.id.in_(obj_ids))
+        )
+        return {obj.id: obj for obj in objects}
+
+    async def exists(self, session: AsyncSession, **filters) -> bool:
+        """Проверяет наличие записи с указанными значениями полей.
+
+        Выполняет `SELECT EXISTS(...)`, строки из БД не читаются.
+
+        ### Args:
+        - session (AsyncSession): Объект сессии.
+        - filters: Значения полей искомой записи.
+
+        ### Raises:
+        - AttributeError: Указанное поле отсутствует в таблице.
+
+        ### Returns:
+        - bool: Запись найдена.
+        """
+        return await session.scalar(select(
+            exists().where(*self._conditions(filters))
+        ))
+
     async def get_by_field(
         self,
         field: str,
         value,
-        session: AsyncSession
-    ) -> None | ModelType:
+        session: AsyncSession,
+        columns: None | Sequence[str] = None
+    ) -> None | ModelType | dict[str, Any]:
         """Находит один объект по значению указанного поля.
 
         ### Args:
         - field (str): Поле, по которому ведётся поиск.
         - value (_type_): Искомое значение.
         - session (AsyncSession): Объект сессии.
+        - columns (None | Sequence[str], optional): Читать только
+            эти столбцы в словарь вместо ORM-объекта. Defaults to None.
 
         ### Raises:
         - AttributeError: Указанное поле отсутствует в таблице.
 
         ### Returns:
-        - None | ModelType:Найденный объект.
+        - None | ModelType | dict[str, Any]: Найденный объект.
         """
-        field = getattr(self.model, field)
-        if field is None:
-            raise AttributeError
-        return await session.scalar(
-            select(self.model).where(field == value)
-        )
+        where = self._conditions({field: value})
+        if columns is None:
+            return await session.scalar(
+                select(self.model).where(*where).limit(1)
+            )
+        row = (await session.execute(
+            select(*(getattr(self.model, name) for name in columns))
+            .where(*where)
+            .limit(1)
+        )).first()
+        return None if row is None else dict(zip(columns, row))
 
     async def value_in_db_exist(
         self,
@@ -166,7 +320,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         - value (_type_): Искомое значение.
         - session (AsyncSession): Объект сессии.
         - id (None | int, optional):
-            id объекта, в полях которого необходимо вести поиск.
+            id объекта, который не учитывается при поиске.
             Defaults to None.
 
         ### Raises:
@@ -176,12 +330,16 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         - bool: Найдено или нет переданное значение.
         """
         if id is None:
-            return bool(await self.get_by_field(field, value, session))
-
-        field = getattr(self.model, field)
-        if field is None:
-            raise AttributeError
+            return await self.exists(session, **{field: value})
+        return await session.scalar(select(exists().where(
+            *self._conditions({field: value}), self.model.id != id
+        )))
 
-        return bool(await session.scalar(select(self.model.id).where(
-            field == value, self.model.id != id
-        ).limit(1)))
+    def _conditions(self, filters: dict[str, Any]) -> list:
+        """Условия равенства полей модели переданным значениям."""
+        conditions = []
+        for field, value in filters.items():
+            if field not in self.columns:
+                raise AttributeError(field)
+            conditions.append(getattr(self.model, field) == value)
+        return conditions
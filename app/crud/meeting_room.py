@@ -1,12 +1,32 @@
-from sqlalchemy import select
+import logging
+from bisect import bisect_right
+from datetime import datetime
+from operator import itemgetter
+from typing import Awaitable, Callable, Hashable, Iterable, Sequence
+
+from sqlalchemy import and_, delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, is_replica
+from app.crud.reservation_series import reservation_series_crud
 from app.models.meeting_room import MeetingRoom
+from app.models.reservation import Reservation
+from app.models.reservation_daily_count import ReservationDailyCount
+from app.models.reservation_series import ReservationSeries
 from app.schemas.meeting_room import MeetingRoomCreate, MeetingRoomUpdate
 from app.schemas.user import UserDB
+from app.services.availability import availability_index
+from app.services.cache import MISSING, TTLCache
+from app.services.occupancy import occupancy_bitmaps
+from app.services.pagination import Page, encode_cursor
+from app.services.versions import CATALOG, room_key, versions
 
 from .base import CRUDBase
 
+logger = logging.getLogger('uvicorn.error')
+
 
 class CRUDMeetingRoom(CRUDBase[
     MeetingRoom,
@@ -15,8 +35,66 @@ class CRUDMeetingRoom(CRUDBase[
 ]):
     """Класс с дополнительными методами для таблицы `meetingroom`.
 
+    Комнаты меняются редко, а читаются постоянно, поэтому `get`,
+    `get_all`, `get_id_by_name` и списки id читают данные через кэш
+    каталога комнат (`settings.room_cache`). Кэш очищается при каждой
+    записи в таблицу.
+
     Родительские методы переопределены для документирования.
     """
+    def __init__(self, model: type[MeetingRoom]) -> None:
+        super().__init__(model)
+        self.cache = TTLCache(
+            settings.room_cache_size, settings.room_cache_ttl
+        )
+        # Номер версии каталога: значение, прочитанное из БД до записи,
+        # не попадает в кэш после его очистки.
+        self._generation = 0
+
+    async def _cached(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable],
+        session: AsyncSession
+    ):
+        """Читает значение из кэша или загружает и запоминает его."""
+        if not settings.room_cache:
+            return await load()
+        value = self.cache.get(key)
+        if value is MISSING:
+            generation = self._generation
+            value = await load()
+            # Реплика может отставать от записей, очистивших кэш.
+            if generation == self._generation and not is_replica(session):
+                self.cache.set(key, value)
+        return value
+
+    def _invalidate(self) -> None:
+        self._generation += 1
+        self.cache.clear()
+        versions.bump(CATALOG)
+
+    @staticmethod
+    def _detached(values: dict) -> MeetingRoom:
+        """Восстанавливает комнату из кэша без обращения к БД."""
+        room = MeetingRoom(**values)
+        make_transient_to_detached(room)
+        return room
+
+    async def _get_catalog(self, session: AsyncSession) -> list[dict]:
+        """Все комнаты в виде словарей по возрастанию id."""
+        async def load() -> list[dict]:
+            rows = await session.execute(
+                select(
+                    MeetingRoom.id,
+                    MeetingRoom.name,
+                    MeetingRoom.description
+                ).order_by(MeetingRoom.id)
+            )
+            return [dict(row._mapping) for row in rows]
+
+        return await self._cached('catalog', load, session)
+
     async def get_id_by_name(
         self,
         name: str,
@@ -31,10 +109,126 @@ class CRUDMeetingRoom(CRUDBase[
         ### Returns:
         - None | int: id запрошенной комнаты.
         """
-        room_id = await session.scalar(
-            select(MeetingRoom.id).where(MeetingRoom.name == name)
+        async def load() -> None | int:
+            return await session.scalar(
+                select(MeetingRoom.id).where(MeetingRoom.name == name).limit(1)
+            )
+
+        return await self._cached(('name', name), load, session)
+
+    async def get_existing_ids(
+        self,
+        room_ids: set[int],
+        session: AsyncSession
+    ) -> set[int]:
+        """Отбирает id существующих комнат одним запросом.
+
+        ### Args:
+        - room_ids (set[int]): Проверяемые id.
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - set[int]: id комнат, найденных в БД.
+        """
+        if settings.room_cache:
+            catalog = await self._get_catalog(session)
+            return room_ids & {room['id'] for room in catalog}
+        existing = await session.scalars(
+            select(MeetingRoom.id).where(MeetingRoom.id.in_(room_ids))
         )
-        return room_id
+        return set(existing.all())
+
+    async def get_many(
+        self,
+        obj_ids: Iterable[int],
+        session: AsyncSession
+    ) -> dict[int, MeetingRoom]:
+        """Получает комнаты по списку id одним запросом или из кэша.
+
+        ### Args:
+        - obj_ids (Iterable[int]): id комнат.
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - dict[int, MeetingRoom]: Найденные комнаты по id.
+        """
+        if not settings.room_cache:
+            return await super().get_many(obj_ids, session)
+        obj_ids = set(obj_ids)
+        return {
+            room['id']: await session.merge(self._detached(room), load=False)
+            for room in await self._get_catalog(session)
+            if room['id'] in obj_ids
+        }
+
+    async def get_all_ids(self, session: AsyncSession) -> list[int]:
+        """Получает id всех комнат.
+
+        ### Args:
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - list[int]: id комнат по возрастанию.
+        """
+        return [room['id'] for room in await self._get_catalog(session)]
+
+    async def get_busy_periods(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession
+    ) -> dict[int, list[tuple[datetime, datetime]]]:
+        """Занятые периоды всех комнат в указанный период.
+
+        Все комнаты и их брони загружаются одним упорядоченным запросом
+        с внешним соединением, комнаты без броней получают пустой список.
+        Повторения серий броней добавляются к броням комнат.
+
+        ### Args:
+        - start_time (datetime): Начало периода.
+        - end_time (datetime): Конец периода.
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - dict[int, list[tuple[datetime, datetime]]]:
+            Занятые периоды каждой комнаты, отсортированные по началу.
+        """
+        rows = await session.execute(
+            select(
+                MeetingRoom.id,
+                Reservation.start_time,
+                Reservation.end_time
+            ).outerjoin(
+                Reservation,
+                and_(
+                    Reservation.room_id == MeetingRoom.id,
+                    Reservation.start_time < end_time,
+                    Reservation.end_time > start_time
+                )
+            ).order_by(
+                MeetingRoom.id, Reservation.start_time
+            )
+        )
+        busy = {}
+        for room_id, busy_start, busy_end in rows:
+            periods = busy.setdefault(room_id, [])
+            if busy_start is not None:
+                periods.append((busy_start, busy_end))
+
+        rules = await reservation_series_crud.get_recurrences(
+            set(busy), start_time, end_time, session
+        )
+        for room_id, room_rules in rules.items():
+            if not room_rules:
+                continue
+            periods = busy[room_id]
+            for rule in room_rules:
+                periods.extend(
+                    occurrence[1:]
+                    for occurrence in rule.occurrences(start_time, end_time)
+                )
+            periods.sort()
+        return busy
 
     async def get(
         self, obj_id: int, session: AsyncSession
@@ -48,7 +242,20 @@ class CRUDMeetingRoom(CRUDBase[
         ### Returns:
         - None | MeetingRoom: Запрошенная комната.
         """
-        return await super().get(obj_id, session)
+        async def load() -> None | dict:
+            room = await super(CRUDMeetingRoom, self).get(obj_id, session)
+            if room is None:
+                return None
+            return {
+                column.key: getattr(room, column.key)
+                for column in MeetingRoom.__table__.columns
+            }
+
+        values = await self._cached(('id', obj_id), load, session)
+        if values is None:
+            return None
+        # Копия из кэша присоединяется к сессии без запроса к БД.
+        return await session.merge(self._detached(values), load=False)
 
     async def get_all(
         self, session: AsyncSession
@@ -59,9 +266,53 @@ class CRUDMeetingRoom(CRUDBase[
         - session (AsyncSession): Объект сессии.
 
         ### Returns:
-        - list[MeetingRoom]: Список всех комнат.
+        - list[MeetingRoom]: Список всех комнат, не присоединённых
+            к сессии.
         """
-        return await super().get_all(session)
+        return [
+            self._detached(values)
+            for values in await self._get_catalog(session)
+        ]
+
+    async def get_page(
+        self,
+        session: AsyncSession,
+        *where,
+        limit: int,
+        after: None | tuple = None,
+        columns: None | Sequence[str] = None
+    ) -> Page:
+        """Возвращает страницу комнат в порядке id.
+
+        Страница словарей без условий отбора берётся из кэша каталога.
+
+        ### Args:
+        - session (AsyncSession): Объект сессии.
+        - where: Дополнительные условия отбора.
+        - limit (int): Наибольшее число комнат на странице.
+        - after (None | tuple, optional): id последней комнаты
+            предыдущей страницы. Defaults to None.
+        - columns (None | Sequence[str], optional): Читаемые столбцы.
+            Defaults to None.
+
+        ### Returns:
+        - Page: Комнаты страницы и курсор следующей.
+        """
+        if where or columns is None or not settings.room_cache:
+            return await super().get_page(
+                session, *where, limit=limit, after=after, columns=columns
+            )
+        catalog = await self._get_catalog(session)
+        position = 0
+        if after is not None:
+            position = bisect_right(catalog, after[0], key=itemgetter('id'))
+        rooms = [
+            {column: room[column] for column in columns}
+            for room in catalog[position:position + limit]
+        ]
+        if position + limit >= len(catalog):
+            return Page(rooms, None)
+        return Page(rooms, encode_cursor([rooms[-1]['id']]))
 
     async def create(
         self,
@@ -81,7 +332,9 @@ class CRUDMeetingRoom(CRUDBase[
         ### Returns:
         - MeetingRoom: Вновь созданная комната.
         """
-        return await super().create(data, session, user)
+        room = await super().create(data, session, user)
+        self._invalidate()
+        return room
 
     async def update(
         self,
@@ -99,13 +352,36 @@ class CRUDMeetingRoom(CRUDBase[
         ### Returns:
         - model.MeetingRoom: Обновлённая комната.
         """
-        return await super().update(room, update_data, session)
+        room = await super().update(room, update_data, session)
+        self._invalidate()
+        return room
+
+    async def count_reservations(
+        self,
+        room_id: int,
+        session: AsyncSession
+    ) -> int:
+        """Считает брони комнаты.
+
+        ### Args:
+        - room_id (int): id комнаты.
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - int: Число броней.
+        """
+        return await session.scalar(
+            select(func.count()).where(Reservation.room_id == room_id)
+        )
 
     async def remove(
         self, room: MeetingRoom, session: AsyncSession
     ) -> MeetingRoom:
         """Удаляет указанную комнату.
 
+        Брони, серии и дневные счётчики комнаты удаляются одним DELETE
+        на таблицу в той же транзакции, без загрузки в сессию.
+
         ### Args:
         - room (MeetingRoom): Запрошенная комната.
         - session (AsyncSession):Объект сессии.
@@ -113,7 +389,56 @@ class CRUDMeetingRoom(CRUDBase[
         - MeetingRoom: Удалённая комната.
             После удаления данные комнаты всё ещё остаются в сессии.
         """
-        return await super().remove(room, session)
+        for model in (
+            Reservation, ReservationSeries, ReservationDailyCount
+        ):
+            await session.execute(
+                delete(model).where(model.room_id == room.id),
+                execution_options={'synchronize_session': False}
+            )
+        room = await super().remove(room, session)
+        self._invalidate()
+        versions.bump(room_key(room.id))
+        availability_index.drop_room(room.id)
+        occupancy_bitmaps.drop_room(room.id)
+        return room
+
+    async def remove_in_chunks(self, room_id: int, chunk_size: int) -> None:
+        """Удаляет комнату с большим числом броней в фоне.
+
+        Брони удаляются пачками по `chunk_size`, каждая в своей
+        транзакции, чтобы не держать долгую блокировку записи.
+        Затем комната удаляется через `remove` вместе с бронями,
+        созданными за время удаления, и дневными счётчиками.
+        Ошибка пишется в лог: комната остаётся с частью броней,
+        и повторный `DELETE` удаляет оставшееся.
+
+        ### Args:
+        - room_id (int): id комнаты.
+        - chunk_size (int): Число броней в одной транзакции.
+        """
+        try:
+            deleted = chunk_size
+            while deleted == chunk_size:
+                async with AsyncSessionLocal() as session:
+                    result = await session.execute(
+                        delete(Reservation).where(Reservation.id.in_(
+                            select(Reservation.id)
+                            .where(Reservation.room_id == room_id)
+                            .limit(chunk_size)
+                            .scalar_subquery()
+                        )),
+                        execution_options={'synchronize_session': False}
+                    )
+                    await session.commit()
+                deleted = result.rowcount
+                versions.bump(room_key(room_id))
+            async with AsyncSessionLocal() as session:
+                room = await session.get(MeetingRoom, room_id)
+                if room is not None:
+                    await self.remove(room, session)
+        except Exception:
+            logger.exception('Background removal of room %s failed', room_id)
 
 
 meeting_room_crud = CRUDMeetingRoom(MeetingRoom)
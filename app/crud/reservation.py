@@ -1,12 +1,25 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Sequence
 
-from sqlalchemy import func, select
+from sqlalchemy import func, insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.crud.base import CRUDBase
+from app.crud.reservation_daily_count import (
+    reservation_daily_count_crud as daily_crud
+)
+from app.crud.reservation_series import reservation_series_crud
 from app.models.reservation import Reservation
 from app.schemas.reservation import ReservationCreate, ReservationUpdate
 from app.schemas.user import UserDB
+from app.services import constants as const
+from app.services.availability import Interval, availability_index
+from app.services.daily_counts import add_deltas, period
+from app.services.occupancy import occupancy_bitmaps
+from app.services.pagination import Page
+from app.services.recurrence import Occurrence
+from app.services.versions import room_key, versions
 
 
 class CRUDReservation(CRUDBase[
@@ -18,6 +31,8 @@ class CRUDReservation(CRUDBase[
 
     Родительские методы переопределены для документирования.
     """
+    paginate_by = ('start_time', 'id')
+
     async def get_reservations_by_time(
         self,
         *,  # все дальнейшие параметры по ключу
@@ -26,10 +41,21 @@ class CRUDReservation(CRUDBase[
         end_time: datetime,
         reservation_id: None | int = None,
         session: AsyncSession
-    ) -> list[Reservation]:
+    ) -> list[Reservation | Interval]:
         """Получает список броней попадающих в указанный период времени.
 
+        Если заполнен индекс занятости, ответ берётся из него без
+        запроса к БД.
+
+        Брони одной комнаты не пересекаются, поэтому достаточно проверить
+        последнюю бронь, начавшуюся до конца периода. Подзапрос с `LIMIT 1`
+        идёт по индексу `(room_id, start_time, end_time)`, и время проверки
+        не зависит от количества прошлых броней комнаты.
+        Периоды полуоткрытые: бронь, закончившаяся ровно в начале
+        периода, пересечением не считается.
+
         ### Args:
+        - room_id (int): id комнаты.
         - start_time (datetime): Начала периода.
         - end_time (datetime): Конец периода.
         - session (AsyncSession): Объект сессии.
@@ -37,70 +63,198 @@ class CRUDReservation(CRUDBase[
           из списка. Defaults to None.
 
         ### Returns:
-        - list[Reservation]: Список броней.
+        - list[Reservation | Interval]: Список броней (не более одной).
         """
-        query = select(Reservation).where(
+        if availability_index.is_warm:
+            return availability_index.find_overlaps(
+                room_id, start_time, end_time, reservation_id
+            )
+        latest = select(Reservation.id).where(
             Reservation.room_id == room_id,
-            Reservation.start_time.between(start_time, end_time) |
-            Reservation.end_time.between(start_time, end_time) |
-            (Reservation.start_time <= start_time) &
-            (Reservation.end_time >= end_time)
+            Reservation.start_time < end_time
         )
         if reservation_id is not None:
-            query = query.where(Reservation.id != reservation_id)
+            latest = latest.where(Reservation.id != reservation_id)
+        latest = latest.order_by(
+            Reservation.start_time.desc()
+        ).limit(1).scalar_subquery()
 
-        reservations = await session.scalars(query)
+        reservations = await session.scalars(
+            select(Reservation).where(
+                Reservation.id == latest,
+                Reservation.end_time > start_time
+            )
+        )
         return reservations.all()
 
+    async def get_busy_intervals(
+        self,
+        room_ids: set[int],
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession,
+        use_index: bool = True
+    ) -> dict[int, list[Reservation | Interval]]:
+        """Брони нескольких комнат, пересекающие указанный период.
+
+        Если заполнен индекс занятости, ответ берётся из него,
+        иначе выполняется один упорядоченный запрос.
+
+        ### Args:
+        - room_ids (set[int]): id комнат.
+        - start_time (datetime): Начало периода.
+        - end_time (datetime): Конец периода.
+        - session (AsyncSession): Объект сессии.
+        - use_index (bool, optional): Разрешить ответ из индекса.
+            Defaults to True.
+
+        ### Returns:
+        - dict[int, list[Reservation | Interval]]:
+            Брони каждой комнаты, отсортированные по началу.
+        """
+        busy = {room_id: [] for room_id in room_ids}
+        if use_index and availability_index.is_warm:
+            for room_id in room_ids:
+                busy[room_id] = [
+                    interval for interval in availability_index.busy_periods(
+                        room_id, datetime.now()
+                    )
+                    if interval.start_time < end_time
+                    and interval.end_time > start_time
+                ]
+            return busy
+
+        reservations = await session.scalars(
+            select(Reservation).where(
+                Reservation.room_id.in_(room_ids),
+                Reservation.start_time < end_time,
+                Reservation.end_time > start_time
+            ).order_by(
+                Reservation.room_id, Reservation.start_time
+            )
+        )
+        for reservation in reservations:
+            busy[reservation.room_id].append(reservation)
+        return busy
+
+    async def stream_rows(
+        self,
+        session: AsyncSession,
+        start_time: None | datetime = None,
+        end_time: None | datetime = None
+    ) -> AsyncIterator[Sequence[Sequence]]:
+        """Читает брони пачками через серверный курсор.
+
+        Строки - кортежи `(id, room_id, user_id, start_time, end_time)`,
+        ORM-объекты не создаются.
+
+        ### Args:
+        - session (AsyncSession): Объект сессии.
+        - start_time (None | datetime, optional): Брони, начинающиеся
+            не раньше. Defaults to None.
+        - end_time (None | datetime, optional): Брони, начинающиеся
+            раньше. Defaults to None.
+
+        ### Yields:
+        - Sequence[Sequence]: Пачка из `EXPORT_CHUNK_SIZE` строк,
+            отсортированных по началу.
+        """
+        query = select(
+            Reservation.id,
+            Reservation.room_id,
+            Reservation.user_id,
+            Reservation.start_time,
+            Reservation.end_time
+        ).order_by(
+            Reservation.start_time, Reservation.id
+        ).execution_options(
+            yield_per=const.EXPORT_CHUNK_SIZE
+        )
+        if start_time is not None:
+            query = query.where(Reservation.start_time >= start_time)
+        if end_time is not None:
+            query = query.where(Reservation.start_time < end_time)
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
     async def get_busy_times_for_room(
         self,
         room_id: int,
         session: AsyncSession
-    ) -> list[Reservation]:
+    ) -> list[Reservation | Interval | Occurrence]:
         """Список броней для указанной комнаты.
 
         Список начинается с актуального времени.
+        Если заполнен индекс занятости, ответ берётся из него без
+        запроса к БД. Повторения серий броней добавляются
+        на `settings.recurrence_horizon_days` дней вперёд.
 
         ### Args:
         - room_id (int): Id комнаты.
         - session (AsyncSession): Объект сессии.
 
         ### Returns:
-        - list[Reservation]: Список броней.
+        - list[Reservation | Interval | Occurrence]:
+            Список броней, отсортированный по началу.
         """
-        reservations = await session.scalars(
-            select(
-                Reservation
-            ).where(
-                Reservation.room_id == room_id,
-                Reservation.end_time > datetime.now()
-            )
+        now = datetime.now()
+        if availability_index.is_warm:
+            reservations = availability_index.busy_periods(room_id, now)
+        else:
+            reservations = (await session.scalars(
+                select(
+                    Reservation
+                ).where(
+                    Reservation.room_id == room_id,
+                    Reservation.end_time > now
+                ).order_by(
+                    Reservation.start_time
+                )
+            )).all()
+        occurrences = await reservation_series_crud.get_occurrences_for_room(
+            room_id,
+            now,
+            now + timedelta(days=settings.recurrence_horizon_days),
+            session
+        )
+        if not occurrences:
+            return reservations
+        return sorted(
+            [*reservations, *occurrences],
+            key=lambda reservation: reservation.start_time
         )
-        return reservations.all()
 
     async def get_reservation_by_user(
         self,
         user: UserDB,
-        session: AsyncSession
-    ) -> list[Reservation]:
+        session: AsyncSession,
+        limit: int,
+        after: None | tuple = None,
+        columns: None | Sequence[str] = None
+    ) -> Page:
         """
-        Список броней указанного пользователя.
+        Страница броней указанного пользователя.
 
         ### Args:
         - user (UserDB): Пользователь.
         - session (AsyncSession): Объект сессии.
+        - limit (int): Наибольшее число броней на странице.
+        - after (None | tuple, optional): Ключ последней брони
+            предыдущей страницы. Defaults to None.
+        - columns (None | Sequence[str], optional): Читаемые столбцы
+            (см. `CRUDBase.get_page`). Defaults to None.
 
         ### Returns:
-        - list[Reservation]: Список броней.
+        - Page: Брони, отсортированные по началу, и курсор.
         """
-        reservations = await session.scalars(
-            select(
-                Reservation
-            ).where(
-                Reservation.user_id == user.id
-            )
+        return await self.get_page(
+            session,
+            Reservation.user_id == user.id,
+            limit=limit,
+            after=after,
+            columns=columns
         )
-        return reservations.all()
 
     async def get(
         self, room_id: int, session: AsyncSession
@@ -133,7 +287,71 @@ class CRUDReservation(CRUDBase[
         ### Returns:
         - Reservation: Вновь созданная бронь.
         """
-        return await super().create(data, session, user)
+        reservation = await super().create(data, session, user, commit=False)
+        await daily_crud.apply([period(reservation)], session)
+        await session.commit()
+        versions.bump(room_key(reservation.room_id))
+        availability_index.add(reservation)
+        occupancy_bitmaps.add(reservation)
+        return reservation
+
+    async def create_many(
+        self,
+        data: list[ReservationCreate],
+        session: AsyncSession,
+        user: None | UserDB = None
+    ) -> list[Reservation]:
+        """Создаёт несколько броней одним `executemany` и одним коммитом.
+
+        Брони должны быть заранее проверены на пересечения.
+
+        ### Args:
+        - data (list[ReservationCreate]): Данные для создания броней.
+        - session (AsyncSession): Объект сессии.
+        - user (None | UserDB, optional): Пользователь, создающий брони.
+            Defaults to None.
+
+        ### Returns:
+        - list[Reservation]: Созданные брони в порядке `data`.
+        """
+        rows = [item.dict() for item in data]
+        if user is not None:
+            for row in rows:
+                row['user_id'] = user.id
+        await session.execute(insert(Reservation), rows)
+        await daily_crud.apply(
+            (
+                (row['room_id'], row['start_time'], row['end_time'])
+                for row in rows
+            ),
+            session
+        )
+        await session.commit()
+        versions.bump(*{room_key(row['room_id']) for row in rows})
+
+        # Начало брони уникально в пределах комнаты,
+        # поэтому созданные записи находятся по паре (комната, начало).
+        # Условие на `room_id` отдельно позволяет SQLite искать пары
+        # по индексу, а не просматривать всю таблицу.
+        created = await session.scalars(
+            select(Reservation).where(
+                Reservation.room_id.in_({row['room_id'] for row in rows}),
+                tuple_(Reservation.room_id, Reservation.start_time).in_([
+                    (row['room_id'], row['start_time']) for row in rows
+                ])
+            )
+        )
+        by_key = {
+            (reservation.room_id, reservation.start_time): reservation
+            for reservation in created
+        }
+        reservations = [
+            by_key[row['room_id'], row['start_time']] for row in rows
+        ]
+        for reservation in reservations:
+            availability_index.add(reservation)
+            occupancy_bitmaps.add(reservation)
+        return reservations
 
     async def update(
         self,
@@ -151,7 +369,19 @@ class CRUDReservation(CRUDBase[
         ### Returns:
         - Reservation: Обновлённая бронь.
         """
-        return await super().update(reservation, update_data, session)
+        old = period(reservation)
+        reservation = await super().update(
+            reservation, update_data, session, commit=False
+        )
+        await daily_crud.apply_deltas(
+            add_deltas(add_deltas({}, [old], -1), [period(reservation)]),
+            session
+        )
+        await session.commit()
+        versions.bump(room_key(reservation.room_id))
+        availability_index.add(reservation)
+        occupancy_bitmaps.add(reservation)
+        return reservation
 
     async def remove(
         self,
@@ -168,17 +398,26 @@ class CRUDReservation(CRUDBase[
         - Reservation: Обновлённая бронь.
             После удаления данные брони всё ещё остаются в сессии.
         """
-        return await super().remove(reservation, session)
+        reservation = await super().remove(reservation, session, commit=False)
+        await daily_crud.apply([period(reservation)], session, -1)
+        await session.commit()
+        versions.bump(room_key(reservation.room_id))
+        availability_index.discard(reservation.id)
+        occupancy_bitmaps.discard(reservation.id)
+        return reservation
 
     async def count_reses_in_time_interval(
         self,
         start_time: datetime,
         end_time: datetime,
         session: AsyncSession
-    ) -> list[dict[str, int]]:
+    ) -> list[tuple[int, int]]:
         """Возвращает количество броней в указанный период
         времени для каждой комнаты.
 
+        Период из целых дней считается по таблице `reservationdailycount`
+        без чтения самих броней.
+
         ### Args:
         - start_time (datetime):
             Начало временного периода.
@@ -188,9 +427,13 @@ class CRUDReservation(CRUDBase[
             Объект сессии БД.
 
         ### Returns:
-        - list[dict[str, int]]:
-            Список в виде [{'room_id': 5}, ...]
+        - list[tuple[int, int]]:
+            Пары (id комнаты, число броней).
         """
+        if daily_crud.covers(start_time, end_time):
+            return await daily_crud.count_by_room(
+                start_time.date(), end_time.date(), session
+            )
         rooms = await session.execute(
             select(
                 [Reservation.room_id, func.count(Reservation.room_id)]
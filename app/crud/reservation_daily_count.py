@@ -0,0 +1,170 @@
+from datetime import date, datetime
+from typing import Iterable
+
+from pydantic import BaseModel
+from sqlalchemy import case, delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.reservation import Reservation
+from app.models.reservation_daily_count import ReservationDailyCount
+from app.services import constants as const
+from app.services.daily_counts import Deltas, add_deltas, is_midnight
+
+from .base import CRUDBase
+
+COUNTERS = ('reservations', 'starts', 'minutes')
+
+
+class CRUDReservationDailyCount(CRUDBase[
+    ReservationDailyCount,
+    BaseModel,
+    BaseModel
+]):
+    """Класс с методами для таблицы `reservationdailycount`.
+
+    Счётчики меняются в той же транзакции, что и брони,
+    через `INSERT ... ON CONFLICT DO UPDATE`, поэтому одновременные
+    записи в одну комнату и день не теряют изменений.
+    """
+
+    async def apply(
+        self,
+        reservations: Iterable[tuple[int, datetime, datetime]],
+        session: AsyncSession,
+        sign: int = 1
+    ) -> None:
+        """Учитывает новые (`sign=1`) или удалённые (`sign=-1`) брони.
+
+        Не фиксирует транзакцию.
+
+        ### Args:
+        - reservations (Iterable[tuple[int, datetime, datetime]]):
+            Брони в виде (id комнаты, начало, конец).
+        - session (AsyncSession): Объект сессии.
+        - sign (int, optional): Знак изменения. Defaults to 1.
+        """
+        await self.apply_deltas(
+            add_deltas({}, reservations, sign), session
+        )
+
+    async def apply_deltas(
+        self,
+        deltas: Deltas,
+        session: AsyncSession
+    ) -> None:
+        """Прибавляет изменения к счётчикам. Не фиксирует транзакцию.
+
+        ### Args:
+        - deltas (Deltas): Изменения по комнатам и дням.
+        - session (AsyncSession): Объект сессии.
+        """
+        rows = [
+            {'room_id': room_id, 'day': day} | dict(zip(COUNTERS, counters))
+            for (room_id, day), counters in deltas.items()
+            if any(counters)
+        ]
+        if not rows:
+            return
+        dialect = (
+            postgresql if session.bind.dialect.name == 'postgresql'
+            else sqlite
+        )
+        statement = dialect.insert(ReservationDailyCount)
+        statement = statement.on_conflict_do_update(
+            index_elements=['room_id', 'day'],
+            set_={
+                counter: (
+                    getattr(ReservationDailyCount, counter)
+                    + getattr(statement.excluded, counter)
+                )
+                for counter in COUNTERS
+            }
+        )
+        await session.execute(statement, rows)
+
+    async def count_by_room(
+        self,
+        first_day: date,
+        last_day: date,
+        session: AsyncSession
+    ) -> list[tuple[int, int]]:
+        """Число броней каждой комнаты, пересекающих период дней.
+
+        ### Args:
+        - first_day (date): Первый день периода.
+        - last_day (date): День после последнего дня периода.
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - list[tuple[int, int]]: Пары (id комнаты, число броней)
+            для комнат, у которых есть брони в периоде.
+        """
+        count = func.sum(ReservationDailyCount.starts) + func.sum(case(
+            (
+                ReservationDailyCount.day == first_day,
+                ReservationDailyCount.reservations
+                - ReservationDailyCount.starts
+            ),
+            else_=0
+        ))
+        rows = await session.execute(
+            select(ReservationDailyCount.room_id, count)
+            .where(
+                ReservationDailyCount.day >= first_day,
+                ReservationDailyCount.day < last_day
+            )
+            .group_by(ReservationDailyCount.room_id)
+            .having(count > 0)
+        )
+        return rows.all()
+
+    async def rebuild(self, session: AsyncSession) -> int:
+        """Пересчитывает таблицу по всем броням и фиксирует транзакцию.
+
+        Запись броней на время пересчёта блокируется: изменения
+        счётчиков, зафиксированные после чтения броней, иначе были бы
+        стёрты вместе со старыми строками таблицы.
+
+        ### Args:
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - int: Число строк в таблице после пересчёта.
+        """
+        if session.bind.dialect.name == 'postgresql':
+            await session.execute(
+                text('LOCK TABLE reservation IN SHARE MODE')
+            )
+        else:
+            # SQLite блокирует запись во всю базу до конца транзакции.
+            await session.execute(text('BEGIN IMMEDIATE'))
+        deltas = {}
+        result = await session.stream(
+            select(
+                Reservation.room_id,
+                Reservation.start_time,
+                Reservation.end_time
+            ).execution_options(yield_per=const.EXPORT_CHUNK_SIZE)
+        )
+        async for rows in result.partitions():
+            add_deltas(deltas, rows)
+        await session.execute(delete(ReservationDailyCount))
+        await self.apply_deltas(deltas, session)
+        await session.commit()
+        return sum(1 for counters in deltas.values() if any(counters))
+
+    @staticmethod
+    def covers(start_time: datetime, end_time: datetime) -> bool:
+        """Период можно посчитать по таблице: он состоит из целых дней."""
+        return (
+            settings.daily_counts
+            and is_midnight(start_time)
+            and is_midnight(end_time)
+        )
+
+
+reservation_daily_count_crud = CRUDReservationDailyCount(
+    ReservationDailyCount
+)
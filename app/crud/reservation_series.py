@@ -0,0 +1,214 @@
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.reservation_series import ReservationSeries
+from app.schemas.reservation_series import ReservationSeriesCreate
+from app.schemas.user import UserDB
+from app.services.availability import availability_index
+from app.services.occupancy import occupancy_bitmaps
+from app.services.pagination import Page
+from app.services.recurrence import Occurrence, Recurrence
+from app.services.versions import room_key, versions
+
+
+class CRUDReservationSeries(CRUDBase[
+    ReservationSeries,
+    ReservationSeriesCreate,
+    ReservationSeriesCreate
+]):
+    """Класс с дополнительными методами для таблицы `reservationseries`.
+
+    Родительские методы переопределены для документирования.
+    """
+    paginate_by = ('start_time', 'id')
+
+    async def get_recurrences(
+        self,
+        room_ids: set[int],
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession,
+        use_index: bool = True
+    ) -> dict[int, list[Recurrence]]:
+        """Правила серий указанных комнат, действующих в период.
+
+        Если заполнен индекс занятости, ответ берётся из него.
+
+        ### Args:
+        - room_ids (set[int]): id комнат.
+        - start_time (datetime): Начало периода.
+        - end_time (datetime): Конец периода.
+        - session (AsyncSession): Объект сессии.
+        - use_index (bool, optional): Разрешить ответ из индекса.
+            Defaults to True.
+
+        ### Returns:
+        - dict[int, list[Recurrence]]: Правила серий каждой комнаты.
+        """
+        if use_index and availability_index.is_warm:
+            return {
+                room_id: availability_index.recurrences(
+                    room_id, start_time, end_time
+                )
+                for room_id in room_ids
+            }
+
+        rules = {room_id: [] for room_id in room_ids}
+        series = await session.scalars(
+            select(ReservationSeries).where(
+                ReservationSeries.room_id.in_(room_ids),
+                ReservationSeries.start_time < end_time,
+                ReservationSeries.last_end_time > start_time
+            )
+        )
+        for one_series in series:
+            rules[one_series.room_id].append(
+                Recurrence.from_series(one_series)
+            )
+        return rules
+
+    async def get_occurrences_by_time(
+        self,
+        *,  # все дальнейшие параметры по ключу
+        room_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession
+    ) -> list[Occurrence]:
+        """Находит повторение серии, пересекающее указанный период.
+
+        ### Args:
+        - room_id (int): id комнаты.
+        - start_time (datetime): Начало периода.
+        - end_time (datetime): Конец периода.
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - list[Occurrence]: Пересекающее повторение или пустой список.
+        """
+        rules = await self.get_recurrences(
+            {room_id}, start_time, end_time, session
+        )
+        for rule in rules[room_id]:
+            occurrence = rule.first_overlap(start_time, end_time)
+            if occurrence is not None:
+                return [occurrence]
+        return []
+
+    async def get_occurrences_for_room(
+        self,
+        room_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession
+    ) -> list[Occurrence]:
+        """Повторения всех серий комнаты в указанный период.
+
+        ### Args:
+        - room_id (int): id комнаты.
+        - start_time (datetime): Начало периода.
+        - end_time (datetime): Конец периода.
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - list[Occurrence]: Повторения, отсортированные по началу.
+        """
+        rules = await self.get_recurrences(
+            {room_id}, start_time, end_time, session
+        )
+        occurrences = []
+        for rule in rules[room_id]:
+            occurrences.extend(rule.occurrences(start_time, end_time))
+        occurrences.sort(key=lambda occurrence: occurrence.start_time)
+        return occurrences
+
+    async def get_series_by_user(
+        self,
+        user: UserDB,
+        session: AsyncSession,
+        limit: int,
+        after: None | tuple = None,
+        columns: None | Sequence[str] = None
+    ) -> Page:
+        """Страница серий броней указанного пользователя.
+
+        ### Args:
+        - user (UserDB): Пользователь.
+        - session (AsyncSession): Объект сессии.
+        - limit (int): Наибольшее число серий на странице.
+        - after (None | tuple, optional): Ключ последней серии
+            предыдущей страницы. Defaults to None.
+        - columns (None | Sequence[str], optional): Читаемые столбцы
+            (см. `CRUDBase.get_page`). Defaults to None.
+
+        ### Returns:
+        - Page: Серии, отсортированные по началу, и курсор.
+        """
+        return await self.get_page(
+            session,
+            ReservationSeries.user_id == user.id,
+            limit=limit,
+            after=after,
+            columns=columns
+        )
+
+    async def create(
+        self,
+        data: ReservationSeriesCreate,
+        session: AsyncSession,
+        user: None | UserDB = None
+    ) -> ReservationSeries:
+        """Создаёт новую серию броней.
+
+        ### Args:
+        - data (ReservationSeriesCreate): Данные для создания серии.
+        - session (AsyncSession): Объект сессии.
+        - user (None | UserDB, optional): Пользователь, создающий серию.
+            Defaults to None.
+
+        ### Returns:
+        - ReservationSeries: Вновь созданная серия.
+        """
+        values = data.dict()
+        values['frequency'] = data.frequency.value
+        values['exceptions'] = [
+            exception.isoformat() for exception in data.exceptions
+        ]
+        values['last_end_time'] = Recurrence.from_series(data).last_end_time
+        if user is not None:
+            values['user_id'] = user.id
+        series = ReservationSeries(**values)
+        session.add(series)
+        await session.commit()
+        versions.bump(room_key(series.room_id))
+        availability_index.add_series(series)
+        occupancy_bitmaps.add_series(series)
+        return series
+
+    async def remove(
+        self,
+        series: ReservationSeries,
+        session: AsyncSession
+    ) -> ReservationSeries:
+        """Удаляет указанную серию броней.
+
+        ### Args:
+        - series (ReservationSeries): Запрошенная серия.
+        - session (AsyncSession): Объект сессии.
+
+        ### Returns:
+        - ReservationSeries: Удалённая серия.
+            После удаления данные серии всё ещё остаются в сессии.
+        """
+        series = await super().remove(series, session)
+        versions.bump(room_key(series.room_id))
+        availability_index.discard_series(series)
+        occupancy_bitmaps.discard_series(series.id)
+        return series
+
+
+reservation_series_crud = CRUDReservationSeries(ReservationSeries)
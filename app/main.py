@@ -2,7 +2,14 @@ from fastapi import FastAPI
 
 from app.api.routers import main_router
 from app.core.config import settings
+from app.core.db import (
+    AsyncSessionLocal, async_engine, log_engine_config, replicas
+)
 from app.core.init_db import create_first_superuser
+from app.core.password import password_pool
+from app.services.availability import availability_index
+from app.services.occupancy import occupancy_bitmaps
+from app.services.report_jobs import report_jobs
 
 
 app = FastAPI(
@@ -17,4 +24,21 @@ app.include_router(main_router)
 
 @app.on_event('startup')
 async def startup():
+    await log_engine_config(async_engine)
+    for engine in replicas.engines:
+        await log_engine_config(engine)
     await create_first_superuser()
+    async with AsyncSessionLocal() as session:
+        if settings.availability_index:
+            await availability_index.warm_up(session)
+        if settings.occupancy_bitmaps:
+            await occupancy_bitmaps.warm_up(session)
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    password_pool.shutdown()
+    report_jobs.shutdown()
+    await async_engine.dispose()
+    for engine in replicas.engines:
+        await engine.dispose()
@@ -1 +1,4 @@
-from . import meeting_room, reservation, user
+from . import (
+    meeting_room, reservation, reservation_daily_count, reservation_series,
+    user
+)
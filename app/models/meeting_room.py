@@ -13,6 +13,10 @@ class MeetingRoom(db.Base):
     - name: Название комнаты.
     - description: Описание комнаты.
     - reservation: Связь O2M с таблицей `reservation`
+    - reservation_series: Связь O2M с таблицей `reservationseries`
+
+    Брони и серии комнаты не загружаются при её удалении:
+    `CRUDMeetingRoom.remove` удаляет их одним запросом.
     """
     name = sa.Column(
         sa.String(100),
@@ -24,5 +28,11 @@ class MeetingRoom(db.Base):
     )
     reservation = orm.relationship(
         'Reservation',
-        cascade='delete'
+        cascade='delete',
+        passive_deletes=True
+    )
+    reservation_series = orm.relationship(
+        'ReservationSeries',
+        cascade='delete',
+        passive_deletes=True
     )
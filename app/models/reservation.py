@@ -4,6 +4,12 @@ import fastapi_users_db_sqlalchemy as fa_u_sa
 from app.core import db
 from app.services import constants as const
 
+# Имена, по которым ошибки ограничений БД переводятся в ответы API.
+# `reservation_room_id_fkey` - имя, которое PostgreSQL даёт внешнему
+# ключу комнаты; нарушение ключа пользователя сюда не относится.
+OVERLAP_VIOLATION = 'reservation_overlap'
+ROOM_VIOLATIONS = ('room_not_found', 'reservation_room_id_fkey')
+
 
 class Reservation(db.Base):
     """`reservation`
@@ -15,6 +21,18 @@ class Reservation(db.Base):
         Ссылка на бронируему комнату в таблице ('meetingroom.id').
     user_id (ForeignKey)Ж Ссылка на пользователя, создавшего бронь ('user.id').
     """
+    __table_args__ = (
+        sa.Index(
+            'ix_reservation_room_id_start_time_end_time',
+            'room_id', 'start_time', 'end_time'
+        ),
+        sa.Index(
+            'ix_reservation_user_id_start_time',
+            'user_id', 'start_time'
+        ),
+        sa.Index('ix_reservation_start_time_id', 'start_time', 'id'),
+    )
+
     start_time = sa.Column(
         sa.DateTime
     )
@@ -32,3 +50,45 @@ class Reservation(db.Base):
 
     def __repr__(self) -> str:
         return const.ROOM_BUSY % (self.start_time, self.end_time)
+
+
+# Запрет пересечений на уровне БД (повторяет миграцию 008
+# для таблиц, созданных через `metadata.create_all`).
+_SQLITE_LATEST_END = (
+    'SELECT end_time FROM reservation '
+    'WHERE room_id = NEW.room_id AND start_time < NEW.end_time{exclude} '
+    'ORDER BY start_time DESC LIMIT 1'
+)
+for ddl, dialect in (
+    (
+        'CREATE TRIGGER reservation_no_overlap_insert '
+        'BEFORE INSERT ON reservation BEGIN '
+        "SELECT RAISE(ABORT, 'room_not_found') WHERE NOT EXISTS "
+        '(SELECT 1 FROM meetingroom WHERE id = NEW.room_id); '
+        "SELECT RAISE(ABORT, 'reservation_overlap') WHERE "
+        f'({_SQLITE_LATEST_END.format(exclude="")}) > NEW.start_time; '
+        'END',
+        'sqlite'
+    ),
+    (
+        'CREATE TRIGGER reservation_no_overlap_update '
+        'BEFORE UPDATE OF room_id, start_time, end_time ON reservation BEGIN '
+        "SELECT RAISE(ABORT, 'reservation_overlap') WHERE "
+        f'({_SQLITE_LATEST_END.format(exclude=" AND id != NEW.id")}) '
+        '> NEW.start_time; '
+        'END',
+        'sqlite'
+    ),
+    ('CREATE EXTENSION IF NOT EXISTS btree_gist', 'postgresql'),
+    (
+        'ALTER TABLE reservation ADD CONSTRAINT reservation_overlap '
+        'EXCLUDE USING gist '
+        '(room_id WITH =, tsrange(start_time, end_time) WITH &&)',
+        'postgresql'
+    ),
+):
+    sa.event.listen(
+        Reservation.__table__,
+        'after_create',
+        sa.DDL(ddl).execute_if(dialect=dialect)
+    )
@@ -0,0 +1,51 @@
+import sqlalchemy as sa
+
+from app.core import db
+
+
+class ReservationDailyCount(db.Base):
+    """`reservationdailycount`
+
+    Брони комнаты, сгруппированные по дням. Поддерживается
+    `CRUDReservation` при каждой записи брони и пересобирается
+    командой `python -m app.cli rebuild-daily-counts`.
+
+    ### Attrs:
+    - room_id (ForeignKey): Ссылка на комнату ('meetingroom.id').
+    - day (Date): День.
+    - reservations (Integer): Число броней, пересекающих день.
+    - starts (Integer): Число броней, начавшихся в этот день.
+    - minutes (Integer): Забронированные минуты дня.
+    """
+    __table_args__ = (
+        sa.UniqueConstraint(
+            'room_id', 'day',
+            name='uq_reservationdailycount_room_id_day'
+        ),
+        sa.Index('ix_reservationdailycount_day', 'day'),
+    )
+
+    room_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey('meetingroom.id'),
+        nullable=False
+    )
+    day = sa.Column(
+        sa.Date,
+        nullable=False
+    )
+    reservations = sa.Column(
+        sa.Integer,
+        nullable=False,
+        default=0
+    )
+    starts = sa.Column(
+        sa.Integer,
+        nullable=False,
+        default=0
+    )
+    minutes = sa.Column(
+        sa.Integer,
+        nullable=False,
+        default=0
+    )
@@ -0,0 +1,79 @@
+import sqlalchemy as sa
+import fastapi_users_db_sqlalchemy as fa_u_sa
+
+from app.core import db
+from app.services import constants as const
+
+
+class ReservationSeries(db.Base):
+    """`reservationseries`
+
+    Повторяющаяся бронь хранится одной записью,
+    повторения вычисляются при запросе.
+
+    ### Attrs:
+    - start_time (DateTime): Начало первого повторения.
+    - end_time (DateTime): Конец первого повторения.
+    - frequency (String): Частота повторения (`daily`, `weekly`).
+    - interval (Integer): Повторять через указанное число периодов.
+    - until (DateTime): Последнее возможное начало повторения.
+    - count (Integer): Число повторений.
+    - exceptions (JSON): Начала отменённых повторений.
+    - last_end_time (DateTime): Конец последнего повторения.
+    - room_id (ForeignKey): Ссылка на комнату ('meetingroom.id').
+    - user_id (ForeignKey): Ссылка на пользователя, создавшего серию.
+    """
+    __table_args__ = (
+        sa.Index(
+            'ix_reservationseries_room_id_last_end_time',
+            'room_id', 'last_end_time'
+        ),
+        sa.Index(
+            'ix_reservationseries_user_id_start_time',
+            'user_id', 'start_time'
+        ),
+    )
+
+    start_time = sa.Column(
+        sa.DateTime,
+        nullable=False
+    )
+    end_time = sa.Column(
+        sa.DateTime,
+        nullable=False
+    )
+    frequency = sa.Column(
+        sa.String(10),
+        nullable=False
+    )
+    interval = sa.Column(
+        sa.Integer,
+        nullable=False,
+        default=1
+    )
+    until = sa.Column(
+        sa.DateTime
+    )
+    count = sa.Column(
+        sa.Integer
+    )
+    exceptions = sa.Column(
+        sa.JSON,
+        nullable=False,
+        default=list
+    )
+    last_end_time = sa.Column(
+        sa.DateTime,
+        nullable=False
+    )
+    room_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey('meetingroom.id')
+    )
+    user_id = sa.Column(
+        fa_u_sa.GUID,
+        sa.ForeignKey('user.id')
+    )
+
+    def __repr__(self) -> str:
+        return const.ROOM_BUSY % (self.start_time, self.last_end_time)
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field, validator
 
 from app.services import constants as const
@@ -46,6 +48,20 @@ class MeetingRoomUpdate(MeetingRoomBase):
         return name
 
 
+class MeetingRoomRemoved(MeetingRoomUpdate):
+    reservations: int = Field(
+        ...,
+        title='Число удалённых броней комнаты'
+    )
+    pending: bool = Field(
+        False,
+        title='Брони и комната ещё удаляются в фоне'
+    )
+
+    class Config:
+        title = "Схема ответа после удаления MeetingRoom"
+
+
 class MeetingRoomResponse(MeetingRoomBase):
     id: int
 
@@ -57,3 +73,78 @@ class MeetingRoomResponse(MeetingRoomBase):
                 'name': 'Главная переговорка',
                 'description': 'Очень большая, модная и помпезная комната.'
         }
+
+
+class FreeSlotResponse(BaseModel):
+    room_id: int = Field(
+        ...,
+        title='Номер комнаты'
+    )
+    start_time: datetime = Field(
+        ...,
+        title='Начало свободного промежутка'
+    )
+    end_time: datetime = Field(
+        ...,
+        title='Конец свободного промежутка'
+    )
+
+    class Config:
+        title = "Схема свободного промежутка комнаты"
+        orm_mode = True
+
+
+class RoomUtilizationResponse(BaseModel):
+    room_id: int = Field(
+        ...,
+        title='Номер комнаты'
+    )
+    booked_minutes: list[float] = Field(
+        ...,
+        title='Забронированные минуты каждой корзины'
+    )
+    utilization: list[float] = Field(
+        ...,
+        title='Доля забронированного времени каждой корзины'
+    )
+    total_booked_minutes: float = Field(
+        ...,
+        title='Забронированные минуты за весь период'
+    )
+    total_utilization: float = Field(
+        ...,
+        title='Доля забронированного времени за весь период'
+    )
+
+    class Config:
+        title = "Схема загрузки комнаты"
+
+
+class UtilizationResponse(BaseModel):
+    granularity: str = Field(
+        ...,
+        title='Размер корзины (day, hour, hour_of_week)'
+    )
+    start_time: datetime = Field(
+        ...,
+        title='Начало первой корзины'
+    )
+    end_time: datetime = Field(
+        ...,
+        title='Конец последней корзины'
+    )
+    buckets: list[str] = Field(
+        ...,
+        title='Подписи корзин'
+    )
+    capacity_minutes: list[float] = Field(
+        ...,
+        title='Минуты периода, попавшие в каждую корзину'
+    )
+    rooms: list[RoomUtilizationResponse] = Field(
+        ...,
+        title='Загрузка по комнатам'
+    )
+
+    class Config:
+        title = "Схема загрузки комнат"
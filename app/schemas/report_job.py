@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class ReportJobResponse(BaseModel):
+    id: str = Field(
+        ...,
+        title='Идентификатор задачи'
+    )
+    status: str = Field(
+        ...,
+        title='Состояние задачи (pending, running, done, failed)'
+    )
+    step: None | str = Field(
+        None,
+        title='Выполняемый шаг'
+    )
+    progress: float = Field(
+        ...,
+        title='Доля выполненных шагов'
+    )
+    spreadsheet_url: None | str = Field(
+        None,
+        title='Ссылка на таблицу отчёта'
+    )
+    reservations: None | list[dict[str, int]] = Field(
+        None,
+        title='Число броней по комнатам'
+    )
+    error: None | str = Field(
+        None,
+        title='Причина неудачи'
+    )
+    created_at: datetime = Field(
+        ...,
+        title='Время постановки в очередь'
+    )
+    finished_at: None | datetime = Field(
+        None,
+        title='Время завершения'
+    )
+
+    class Config:
+        title = "Схема задачи построения отчёта"
+        orm_mode = True
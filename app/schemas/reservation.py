@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
 
-from pydantic import BaseModel, Field, UUID4, root_validator, validator, Extra
+from pydantic import (
+    BaseModel, Field, UUID4, conlist, root_validator, validator, Extra
+)
 
 from app.services import constants as const
 
@@ -10,6 +12,7 @@ START_TIME = (
 END_TIME = (
     datetime.now() + timedelta(hours=11)
 ).isoformat(timespec='minutes')
+BATCH_MAX_SIZE = 1000
 
 
 class ReservationBase(BaseModel):
@@ -69,3 +72,23 @@ class ReservationResponse(ReservationBase):
         title='Номер комнаты'
     )
     user_id: None | UUID4
+
+
+ReservationBatchCreate = conlist(
+    ReservationCreate, min_items=1, max_items=BATCH_MAX_SIZE
+)
+
+
+class ReservationBatchResult(BaseModel):
+    index: int = Field(
+        ...,
+        title='Номер брони в запросе'
+    )
+    reservation: None | ReservationResponse = Field(
+        None,
+        title='Созданная бронь'
+    )
+    detail: None | str = Field(
+        None,
+        title='Причина отказа'
+    )
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from pydantic import Field, PositiveInt, UUID4, root_validator
+
+from app.schemas.reservation import ReservationBase, ReservationCreate
+from app.services import constants as const
+from app.services.recurrence import Frequency, count_occurrences, get_step
+
+
+class ReservationSeriesCreate(ReservationCreate):
+    frequency: Frequency = Field(
+        ...,
+        title='Частота повторения'
+    )
+    interval: PositiveInt = Field(
+        1,
+        title='Повторять через указанное число периодов'
+    )
+    until: None | datetime = Field(
+        None,
+        title='Последнее возможное начало повторения'
+    )
+    count: None | PositiveInt = Field(
+        None,
+        title='Число повторений'
+    )
+    exceptions: list[datetime] = Field(
+        [],
+        title='Начала отменённых повторений'
+    )
+
+    @root_validator(skip_on_failure=True)
+    def series_validate(cls, values: dict):
+        start = values['start_time']
+        until = values.get('until')
+        if until is None and values.get('count') is None:
+            raise ValueError(const.ERR_SERIES_UNBOUNDED)
+        if until is not None and until < start:
+            raise ValueError(const.ERR_SERIES_UNTIL % (until, start))
+        step = get_step(values['frequency'], values['interval'])
+        if values['end_time'] - start > step:
+            raise ValueError(const.ERR_SERIES_DURATION)
+        total = count_occurrences(start, step, until, values.get('count'))
+        for exception in values.get('exceptions', []):
+            offset = exception - start
+            if offset % step or not 0 <= offset // step < total:
+                raise ValueError(const.ERR_SERIES_EXCEPTION % exception)
+        return values
+
+
+class ReservationSeriesResponse(ReservationBase):
+    id: int = Field(
+        ...,
+        title='id серии'
+    )
+    room_id: int = Field(
+        ...,
+        title='Номер комнаты'
+    )
+    frequency: Frequency
+    interval: int
+    until: None | datetime
+    count: None | int
+    exceptions: list[datetime]
+    last_end_time: datetime = Field(
+        ...,
+        title='Конец последнего повторения'
+    )
+    user_id: None | UUID4
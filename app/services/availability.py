@@ -0,0 +1,285 @@
+"""Индекс занятости комнат в памяти процесса.
+
+Для каждой комнаты хранятся отсортированные по началу актуальные брони
+и правила актуальных серий броней. Проверка пересечения и список
+занятых периодов выполняются бинарным поиском, без запросов к БД.
+Источником истины остаются таблицы `reservation` и `reservationseries`:
+индекс заполняется из них при старте приложения и обновляется
+методами записи `CRUDReservation` и `CRUDReservationSeries`.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.reservation import Reservation
+from app.models.reservation_series import ReservationSeries
+from app.services import constants as const
+from app.services.recurrence import Recurrence
+
+
+class Interval(NamedTuple):
+    """Занятый период комнаты.
+
+    Атрибуты совпадают с полями `Reservation`, поэтому объект
+    подходит для схем с `orm_mode`.
+    """
+    id: int
+    start_time: datetime
+    end_time: datetime
+
+    def __repr__(self) -> str:
+        return const.ROOM_BUSY % (self.start_time, self.end_time)
+
+
+class RoomSchedule:
+    """Брони одной комнаты, отсортированные по началу.
+
+    Брони комнаты не пересекаются, поэтому концы периодов
+    отсортированы так же, как и начала.
+    """
+    __slots__ = ('starts', 'intervals', 'ids')
+
+    def __init__(self) -> None:
+        self.starts: list[datetime] = []
+        self.intervals: list[Interval] = []
+        self.ids: dict[int, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+    def add(self, interval: Interval) -> None:
+        """Добавляет период, заменяя прежнюю версию той же брони."""
+        self.discard(interval.id)
+        position = bisect_right(self.starts, interval.start_time)
+        self.starts.insert(position, interval.start_time)
+        self.intervals.insert(position, interval)
+        self.ids[interval.id] = interval.start_time
+
+    def discard(self, reservation_id: int) -> None:
+        """Удаляет период указанной брони, если он есть."""
+        start_time = self.ids.pop(reservation_id, None)
+        if start_time is None:
+            return
+        position = bisect_left(self.starts, start_time)
+        while self.intervals[position].id != reservation_id:
+            position += 1
+        del self.starts[position]
+        del self.intervals[position]
+
+    def overlaps(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_id: None | int = None
+    ) -> list[Interval]:
+        """Возвращает бронь, пересекающую период `[start_time, end_time)`.
+
+        Достаточно проверить последнюю бронь, начавшуюся до `end_time`.
+        """
+        position = bisect_left(self.starts, end_time) - 1
+        if position >= 0 and self.intervals[position].id == exclude_id:
+            position -= 1
+        if position >= 0 and self.intervals[position].end_time > start_time:
+            return [self.intervals[position]]
+        return []
+
+    def prune(self, moment: datetime) -> list[int]:
+        """Удаляет брони, закончившиеся не позже `moment`.
+
+        ### Returns:
+        - list[int]: id удалённых броней.
+        """
+        position = max(bisect_right(self.starts, moment) - 1, 0)
+        if (position < len(self.intervals)
+                and self.intervals[position].end_time <= moment):
+            position += 1
+        pruned = [interval.id for interval in self.intervals[:position]]
+        for reservation_id in pruned:
+            del self.ids[reservation_id]
+        del self.starts[:position]
+        del self.intervals[:position]
+        return pruned
+
+
+class AvailabilityIndex:
+    """Индекс занятости всех комнат.
+
+    Пока индекс не заполнен (`is_warm` ложно), `CRUDReservation`
+    обращается к БД.
+    """
+
+    def __init__(self) -> None:
+        self._rooms: dict[int, RoomSchedule] = {}
+        self._room_of: dict[int, int] = {}
+        self._series: dict[int, dict[int, Recurrence]] = {}
+        self.is_warm = False
+
+    async def warm_up(self, session: AsyncSession) -> None:
+        """Заполняет индекс актуальными бронями из БД.
+
+        ### Args:
+        - session (AsyncSession): Объект сессии.
+        """
+        rows = await session.execute(
+            select(
+                Reservation.id,
+                Reservation.room_id,
+                Reservation.start_time,
+                Reservation.end_time
+            ).where(
+                Reservation.end_time > datetime.now()
+            ).order_by(
+                Reservation.room_id, Reservation.start_time
+            )
+        )
+        self._rooms.clear()
+        self._room_of.clear()
+        for id, room_id, start_time, end_time in rows:
+            schedule = self._rooms.setdefault(room_id, RoomSchedule())
+            interval = Interval(id, start_time, end_time)
+            schedule.starts.append(start_time)
+            schedule.intervals.append(interval)
+            schedule.ids[id] = start_time
+            self._room_of[id] = room_id
+
+        self._series.clear()
+        series = await session.scalars(
+            select(ReservationSeries).where(
+                ReservationSeries.last_end_time > datetime.now()
+            )
+        )
+        for one_series in series:
+            self._series.setdefault(one_series.room_id, {})[one_series.id] = (
+                Recurrence.from_series(one_series)
+            )
+        self.is_warm = True
+
+    def add(self, reservation: Reservation) -> None:
+        """Добавляет или обновляет бронь в индексе.
+
+        ### Args:
+        - reservation (Reservation): Сохранённая в БД бронь.
+        """
+        if not self.is_warm:
+            return
+        self.discard(reservation.id)
+        self._rooms.setdefault(reservation.room_id, RoomSchedule()).add(
+            Interval(
+                reservation.id, reservation.start_time, reservation.end_time
+            )
+        )
+        self._room_of[reservation.id] = reservation.room_id
+
+    def discard(self, reservation_id: int) -> None:
+        """Удаляет бронь из индекса.
+
+        ### Args:
+        - reservation_id (int): id удалённой брони.
+        """
+        room_id = self._room_of.pop(reservation_id, None)
+        if room_id is not None:
+            self._rooms[room_id].discard(reservation_id)
+
+    def drop_room(self, room_id: int) -> None:
+        """Удаляет из индекса все брони комнаты.
+
+        ### Args:
+        - room_id (int): id удалённой комнаты.
+        """
+        self._series.pop(room_id, None)
+        schedule = self._rooms.pop(room_id, None)
+        if schedule is not None:
+            for reservation_id in schedule.ids:
+                del self._room_of[reservation_id]
+
+    def add_series(self, series: ReservationSeries) -> None:
+        """Добавляет серию броней в индекс.
+
+        ### Args:
+        - series (ReservationSeries): Сохранённая в БД серия.
+        """
+        if self.is_warm:
+            self._series.setdefault(series.room_id, {})[series.id] = (
+                Recurrence.from_series(series)
+            )
+
+    def discard_series(self, series: ReservationSeries) -> None:
+        """Удаляет серию броней из индекса.
+
+        ### Args:
+        - series (ReservationSeries): Удалённая серия.
+        """
+        self._series.get(series.room_id, {}).pop(series.id, None)
+
+    def recurrences(
+        self,
+        room_id: int,
+        start_time: datetime,
+        end_time: datetime
+    ) -> list[Recurrence]:
+        """Серии комнаты, действующие в указанный период.
+
+        ### Args:
+        - room_id (int): id комнаты.
+        - start_time (datetime): Начало периода.
+        - end_time (datetime): Конец периода.
+
+        ### Returns:
+        - list[Recurrence]: Правила серий.
+        """
+        return [
+            rule for rule in self._series.get(room_id, {}).values()
+            if rule.start_time < end_time and rule.last_end_time > start_time
+        ]
+
+    def find_overlaps(
+        self,
+        room_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_id: None | int = None
+    ) -> list[Interval]:
+        """Находит бронь комнаты, пересекающую указанный период.
+
+        ### Args:
+        - room_id (int): id комнаты.
+        - start_time (datetime): Начало периода.
+        - end_time (datetime): Конец периода.
+        - exclude_id (None | int, optional): Бронь, которую следует
+            исключить из проверки. Defaults to None.
+
+        ### Returns:
+        - list[Interval]: Пересекающая бронь или пустой список.
+        """
+        schedule = self._rooms.get(room_id)
+        if schedule is None:
+            return []
+        return schedule.overlaps(start_time, end_time, exclude_id)
+
+    def busy_periods(
+        self,
+        room_id: int,
+        moment: datetime
+    ) -> list[Interval]:
+        """Список броней комнаты, заканчивающихся после `moment`.
+
+        ### Args:
+        - room_id (int): id комнаты.
+        - moment (datetime): Начало отсчёта.
+
+        ### Returns:
+        - list[Interval]: Брони, отсортированные по началу.
+        """
+        schedule = self._rooms.get(room_id)
+        if schedule is None:
+            return []
+        # Закончившиеся брони больше не нужны индексу.
+        for reservation_id in schedule.prune(moment):
+            del self._room_of[reservation_id]
+        return list(schedule.intervals)
+
+
+availability_index = AvailabilityIndex()
@@ -0,0 +1,76 @@
+"""Ограниченный кэш с временем жизни записей.
+
+Записи вытесняются по давности использования (LRU) при превышении
+размера и считаются отсутствующими по истечении времени жизни.
+Кэш живёт в памяти процесса: при нескольких воркерах изменения,
+сделанные другим воркером, становятся видны не позже чем через `ttl`.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+MISSING = object()
+
+
+class TTLCache:
+    """Кэш на `maxsize` записей со временем жизни `ttl` секунд.
+
+    ### Attrs:
+    - hits: Число найденных записей.
+    - misses: Число промахов, включая устаревшие записи.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        """Возвращает значение или `MISSING`.
+
+        Значение None тоже кэшируется, поэтому отсутствие записи
+        обозначается отдельным объектом.
+        """
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Запоминает значение, вытесняя самую старую запись."""
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Удаляет запись, если она есть."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        self._data.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Размер кэша и доля попаданий."""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
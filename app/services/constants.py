@@ -2,18 +2,47 @@
 """
 DATE_FORMAT = "%Y/%m/%d %H:%M:%S"
 
+PAGE_LIMIT = 100
+PAGE_MAX_LIMIT = 1000
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+EXPORT_CHUNK_SIZE = 1000
+# Наибольший срок (сек) актуальности ETag расписания комнаты.
+SCHEDULE_ETAG_TTL = 60
+SPREADSHEET_URL = 'https://docs.google.com/spreadsheets/d/%s'
+# Строк в новом листе отчёта, ячеек в одном запросе записи
+# и одновременных запросов записи.
+SHEET_ROW_COUNT = 100
+SHEET_CHUNK_CELLS = 50000
+SHEET_WRITE_CONCURRENCY = 4
+# Попыток запроса к Google API и начальная пауза (сек) между ними.
+GOOGLE_RETRIES = 5
+GOOGLE_BACKOFF = 0.5
+# Наибольшая длина (дней) периода отчёта о загрузке комнат.
+UTILIZATION_MAX_DAYS = 366
+
 API_CREATE_MEET_ROOM = 'Создаёт новую переговорную комнату'
 API_GET_MEET_ROOMS = 'Возвращает список переговорных комнат'
 API_UPDATE_MEET_ROOM = 'Обновляет данные переговорной комнаты'
 API_DELETE_MEET_ROOM = 'Удаляет переговорную комнату'
+API_FREE_SLOTS = 'Ищет ближайшие свободные промежутки во всех комнатах'
+API_FREE_ROOMS = 'Возвращает комнаты, свободные в указанное время по дням'
+API_ROOM_UTILIZATION = 'Возвращает загрузку комнат по дням или часам'
+
+API_GET_STATS = 'Возвращает статистику служебных структур в памяти'
 
 API_CREATE_RESERVATION = 'Создаёт новую бронь на комнату'
 API_GET_RESERVATION = 'Возвращает список броней'
+API_EXPORT_RESERVATIONS = 'Выгружает брони потоком в NDJSON или CSV'
 API_UPDATE_RESERVATION = 'Обновляет данные брони на комнату'
 API_DELETE_RESERVATION = 'Удаляет бронь'
 API_BUSY_PERIODS = 'Взовращает занятые периоды времени для указанной комнаты'
+API_CREATE_RESERVATION_BATCH = 'Создаёт несколько броней одним запросом'
+API_CREATE_SERIES = 'Создаёт повторяющуюся бронь'
+API_GET_MY_SERIES = 'Возвращает повторяющиеся брони пользователя'
+API_DELETE_SERIES = 'Удаляет повторяющуюся бронь'
 
 API_GOOGLE_UPLOAD = 'Загружает данные с google-диска'
+API_GOOGLE_JOB = 'Возвращает состояние построения отчёта'
 
 ROOM_BUSY = 'Занято с %s до %s'
 
@@ -23,6 +52,18 @@ ERR_NULL_VALUE = 'Значение `%s` не может быть пустым!'
 ERR_NOT_ENOUGH_VALUES = 'Недостаточно значений!'
 ERR_START_TIME = 'Текущее время больше переданного!'
 ERR_PERIOD_RESERVATION = 'Начало брони %s не раньше окончания %s!'
+ERR_PERIOD_SEARCH = 'Начало поиска %s не раньше окончания %s!'
+ERR_OUT_OF_HORIZON = 'Дни должны лежать в пределах с %s по %s!'
+ERR_UTILIZATION_PERIOD = 'Период отчёта о загрузке длиннее %s дней!'
 ERR_TIME_RESERVATION = 'Комната %s занята: %s!'
+ERR_BATCH_TIME_RESERVATION = 'Бронь пересекается с бронью №%s этого запроса!'
+ERR_BATCH_CONFLICT = 'Пакет пересёкся с одновременной записью, повторите!'
+ERR_CURSOR = 'Неверный курсор страницы `%s`!'
 ERR_RESERVATION_NOT_FOUND_ID = 'Бронь с `id = %s` не найдена!'
+ERR_SERIES_NOT_FOUND_ID = 'Серия броней с `id = %s` не найдена!'
+ERR_REPORT_JOB_NOT_FOUND_ID = 'Задача отчёта с `id = %s` не найдена!'
+ERR_SERIES_UNBOUNDED = 'Укажите `until` или `count`!'
+ERR_SERIES_UNTIL = 'Окончание серии %s раньше её начала %s!'
+ERR_SERIES_DURATION = 'Бронь длиннее промежутка между повторениями!'
+ERR_SERIES_EXCEPTION = 'Исключение %s не совпадает с повторением серии!'
 ERR_NOT_OWNER = 'Доступ к чужим объектам запрщён!'
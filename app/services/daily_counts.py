@@ -0,0 +1,78 @@
+"""Разбиение броней по дням для таблицы `reservationdailycount`.
+
+Бронь учитывается в каждом дне, который она пересекает
+(`reservations`, минуты внутри дня - в `minutes`), и один раз в дне
+своего начала (`starts`). Тогда число броней, пересекающих период
+целых дней `[first_day, last_day)`, равно сумме `starts` за период
+плюс брони первого дня, начавшиеся раньше него:
+`reservations - starts` первого дня.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+
+DAY = timedelta(days=1)
+
+# (комната, день) -> [reservations, starts, minutes]
+Deltas = dict[tuple[int, date], list[int]]
+
+
+def is_midnight(moment: datetime) -> bool:
+    """Момент приходится на начало дня."""
+    return moment.time() == time.min
+
+
+def split_by_day(
+    start_time: datetime,
+    end_time: datetime
+) -> list[tuple[date, int]]:
+    """Дни, которые пересекает промежуток, и его минуты в каждом.
+
+    ### Args:
+    - start_time (datetime): Начало промежутка.
+    - end_time (datetime): Конец промежутка.
+
+    ### Returns:
+    - list[tuple[date, int]]: Пары (день, минуты) по возрастанию дней.
+    """
+    days = []
+    day = start_time.date()
+    while datetime.combine(day, time.min) < end_time:
+        day_start = datetime.combine(day, time.min)
+        overlap = (
+            min(end_time, day_start + DAY) - max(start_time, day_start)
+        )
+        days.append((day, round(overlap.total_seconds() / 60)))
+        day += DAY
+    return days
+
+
+def add_deltas(
+    deltas: Deltas,
+    reservations: Iterable[tuple[int, datetime, datetime]],
+    sign: int = 1
+) -> Deltas:
+    """Добавляет к изменениям счётчиков вклад броней.
+
+    ### Args:
+    - deltas (Deltas): Накапливаемые изменения.
+    - reservations (Iterable[tuple[int, datetime, datetime]]):
+        Брони в виде (id комнаты, начало, конец).
+    - sign (int, optional): 1 для новых броней, -1 для удалённых.
+        Defaults to 1.
+
+    ### Returns:
+    - Deltas: Те же изменения `deltas`.
+    """
+    for room_id, start_time, end_time in reservations:
+        days = split_by_day(start_time, end_time)
+        for number, (day, minutes) in enumerate(days):
+            counters = deltas.setdefault((room_id, day), [0, 0, 0])
+            counters[0] += sign
+            counters[1] += sign if number == 0 else 0
+            counters[2] += sign * minutes
+    return deltas
+
+
+def period(reservation) -> tuple[int, datetime, datetime]:
+    """Бронь в виде (id комнаты, начало, конец) для `add_deltas`."""
+    return reservation.room_id, reservation.start_time, reservation.end_time
@@ -0,0 +1,83 @@
+"""Потоковая выгрузка броней в NDJSON и CSV.
+
+Строки приходят из БД пачками в виде кортежей значений столбцов
+и сразу кодируются в байты, без ORM-объектов и схем pydantic.
+Каждая пачка отдаётся клиенту до чтения следующей, поэтому
+расход памяти не зависит от числа выгружаемых броней.
+"""
+import csv
+import io
+import json
+from enum import Enum
+from typing import AsyncIterator, Sequence
+
+EXPORT_FIELDS = ('id', 'room_id', 'user_id', 'start_time', 'end_time')
+
+
+class ExportFormat(str, Enum):
+    """Формат выгрузки."""
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: 'application/x-ndjson',
+    ExportFormat.CSV: 'text/csv',
+}
+
+
+def _plain(row: Sequence) -> tuple:
+    """Приводит значения строки к строкам и числам."""
+    id, room_id, user_id, start_time, end_time = row
+    return (
+        id,
+        room_id,
+        None if user_id is None else str(user_id),
+        start_time.isoformat(),
+        end_time.isoformat(),
+    )
+
+
+def encode_ndjson(rows: Sequence[Sequence]) -> bytes:
+    """Кодирует пачку строк в NDJSON."""
+    return ''.join(
+        json.dumps(
+            dict(zip(EXPORT_FIELDS, _plain(row))),
+            ensure_ascii=False,
+            separators=(',', ':')
+        ) + '\n'
+        for row in rows
+    ).encode()
+
+
+def encode_csv(rows: Sequence[Sequence], header: bool = False) -> bytes:
+    """Кодирует пачку строк в CSV."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(map(_plain, rows))
+    return buffer.getvalue().encode()
+
+
+async def encode_rows(
+    partitions: AsyncIterator[Sequence[Sequence]],
+    export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """Кодирует пачки строк по мере их получения из БД.
+
+    ### Args:
+    - partitions (AsyncIterator[Sequence[Sequence]]): Пачки строк
+        со значениями столбцов в порядке `EXPORT_FIELDS`.
+    - export_format (ExportFormat): Формат выгрузки.
+
+    ### Yields:
+    - bytes: Закодированная пачка.
+    """
+    if export_format is ExportFormat.CSV:
+        yield encode_csv((), header=True)
+        async for rows in partitions:
+            yield encode_csv(rows)
+        return
+    async for rows in partitions:
+        yield encode_ndjson(rows)
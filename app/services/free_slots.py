@@ -0,0 +1,77 @@
+"""Поиск свободных промежутков времени во всех комнатах.
+"""
+import heapq
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterator, NamedTuple
+
+
+class FreeSlot(NamedTuple):
+    """Свободный промежуток комнаты."""
+    room_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+def room_gaps(
+    room_id: int,
+    busy: list[tuple[datetime, datetime]],
+    start_time: datetime,
+    end_time: datetime,
+    duration: timedelta
+) -> Iterator[FreeSlot]:
+    """Проход по занятым периодам комнаты в порядке начала.
+
+    ### Args:
+    - room_id (int): id комнаты.
+    - busy (list[tuple[datetime, datetime]]):
+        Занятые периоды, отсортированные по началу.
+    - start_time (datetime): Начало поиска.
+    - end_time (datetime): Конец поиска.
+    - duration (timedelta): Минимальная длина промежутка.
+
+    ### Yields:
+    - FreeSlot: Свободные промежутки не короче `duration`.
+    """
+    cursor = start_time
+    for busy_start, busy_end in busy:
+        if busy_start - cursor >= duration:
+            yield FreeSlot(room_id, cursor, busy_start)
+        cursor = max(cursor, busy_end)
+        if cursor >= end_time:
+            return
+    if end_time - cursor >= duration:
+        yield FreeSlot(room_id, cursor, end_time)
+
+
+def find_free_slots(
+    busy: dict[int, list[tuple[datetime, datetime]]],
+    start_time: datetime,
+    end_time: datetime,
+    duration: timedelta,
+    limit: int
+) -> list[FreeSlot]:
+    """Самые ранние свободные промежутки по всем комнатам.
+
+    Промежутки каждой комнаты уже упорядочены по началу, поэтому
+    они сливаются через кучу и вычисляются только до `limit` штук.
+
+    ### Args:
+    - busy (dict[int, list[tuple[datetime, datetime]]]):
+        Занятые периоды каждой комнаты, отсортированные по началу.
+    - start_time (datetime): Начало поиска.
+    - end_time (datetime): Конец поиска.
+    - duration (timedelta): Минимальная длина промежутка.
+    - limit (int): Сколько промежутков вернуть.
+
+    ### Returns:
+    - list[FreeSlot]: Промежутки, отсортированные по началу и id комнаты.
+    """
+    gaps = heapq.merge(
+        *(
+            room_gaps(room_id, intervals, start_time, end_time, duration)
+            for room_id, intervals in busy.items()
+        ),
+        key=lambda slot: (slot.start_time, slot.room_id)
+    )
+    return list(islice(gaps, limit))
@@ -1,12 +1,70 @@
 """Функции взаимодействия приложения с Google API.
+
+Описания API берутся из общего кэша `google_client.discovery`,
+поэтому документы discovery не загружаются при каждом отчёте.
+
+Значения отчёта записываются пачками строк не больше
+`const.SHEET_CHUNK_CELLS` ячеек, не более `const.SHEET_WRITE_CONCURRENCY`
+пачек одновременно. Ответы 429 и 5xx повторяются с нарастающей паузой;
+создание таблицы после 5xx не повторяется, чтобы не плодить таблицы.
 """
+import asyncio
+import random
 from datetime import datetime
+from http import HTTPStatus
 
 from aiogoogle import Aiogoogle
+from aiogoogle.excs import HTTPError
+from aiogoogle.models import Request
 
 from app.core.config import settings
+from app.core.google_client import discovery
 from app.services import constants as const
 
+REPORT_COLUMNS = 2
+
+
+async def send(
+    wrapper_service: Aiogoogle,
+    request: Request,
+    idempotent: bool = True
+) -> dict:
+    """Отправляет запрос от сервисного аккаунта, повторяя его
+    при превышении квоты и ошибках сервера.
+
+    ### Args:
+    - wrapper_service (Aiogoogle):
+        ...
+    - request (Request):
+        Запрос к API.
+    - idempotent (bool, optional):
+        Запрос можно повторить после ошибки сервера. Иначе он
+        повторяется только при 429: запрос, на который сервер ответил
+        5xx или не ответил вовремя, мог быть выполнен.
+        Defaults to True.
+
+    ### Raises:
+    - HTTPError: Ошибка не временная или попытки исчерпаны.
+
+    ### Returns:
+    - dict:
+        Ответ API.
+    """
+    for attempt in range(const.GOOGLE_RETRIES):
+        try:
+            return await wrapper_service.as_service_account(request)
+        except HTTPError as error:
+            status = error.res.status_code if error.res is not None else None
+            if attempt == const.GOOGLE_RETRIES - 1 or not (
+                status == HTTPStatus.TOO_MANY_REQUESTS
+                or idempotent and (
+                    (status or 0) >= HTTPStatus.INTERNAL_SERVER_ERROR
+                )
+            ):
+                raise
+        delay = const.GOOGLE_BACKOFF * 2 ** attempt
+        await asyncio.sleep(delay + random.uniform(0, delay))
+
 
 async def spreadsheet_create(wrapper_services: Aiogoogle) -> str:
     """Создаёт таблицу.
@@ -20,10 +78,7 @@ async def spreadsheet_create(wrapper_services: Aiogoogle) -> str:
         `id` созданной таблицы.
     """
     now_date_time = datetime.now().strftime(const.DATE_FORMAT)
-    service = await wrapper_services.discover(
-        api_name='sheets',
-        api_version='v4'
-    )
+    service = await discovery.discover(wrapper_services, 'sheets', 'v4')
     spreadsheet_body = {
         'properties': {
             'title': f'Отчет на {now_date_time}',
@@ -35,14 +90,16 @@ async def spreadsheet_create(wrapper_services: Aiogoogle) -> str:
                 'sheetId': 0,
                 'title': 'Лист1',
                 'gridProperties': {
-                    'rowCount': 100,
-                    'columnCount': 11
+                    'rowCount': const.SHEET_ROW_COUNT,
+                    'columnCount': REPORT_COLUMNS
                 }
             }}
         ]
     }
-    response = await wrapper_services.as_service_account(
-        service.spreadsheets.create(json=spreadsheet_body)
+    response = await send(
+        wrapper_services,
+        service.spreadsheets.create(json=spreadsheet_body),
+        idempotent=False
     )
     return response['spreadsheetId']
 
@@ -64,17 +121,12 @@ async def set_user_permissions(
         'role': 'writer',
         'emailAddress': settings.email_user
     }
-    service = await wrapper_service.discover(
-        api_name='drive',
-        api_version='v3'
-    )
-    await wrapper_service.as_service_account(
-        service.permissions.create(
-            fileId=spreadsheet_id,
-            json=permissions_body,
-            fields='id'
-        )
-    )
+    service = await discovery.discover(wrapper_service, 'drive', 'v3')
+    await send(wrapper_service, service.permissions.create(
+        fileId=spreadsheet_id,
+        json=permissions_body,
+        fields='id'
+    ))
 
 
 async def spreadsheet_update_value(
@@ -82,28 +134,86 @@ async def spreadsheet_update_value(
     reservations: list,
     wrapper_service: Aiogoogle
 ) -> None:
+    """Записывает отчёт в таблицу.
+
+    Сетка листа расширяется под число строк отчёта одним запросом,
+    затем строки пишутся пачками через `values.batchUpdate`.
+    Число запросов - не больше
+    `1 + ceil(строк * столбцов / const.SHEET_CHUNK_CELLS)`.
+
+    ### Args:
+    - spreadsheet_id (str):
+        `id` таблицы.
+    - reservations (list):
+        Число броней по комнатам: `[{'room_id': 1, 'count': 5}, ...]`.
+    - wrapper_service (Aiogoogle):
+        ...
+    """
     now_date_time = datetime.now().strftime(const.DATE_FORMAT)
-    service = await wrapper_service.discover(
-        api_name='sheets',
-        api_version='v4'
-    )
-    # Тело таблицы
+    service = await discovery.discover(wrapper_service, 'sheets', 'v4')
     table_values = [
         ['Отчет от', now_date_time],
         ['Количество регистраций переговорок'],
         ['ID переговорки', 'Кол-во бронирований']
     ]
-    for res in reservations:
-        table_values.append([str(res['room_id'])])
-    update_body = {
-        'majorDimension': 'ROWS',
-        'values': table_values
-    }
-    await wrapper_service.as_service_account(
-        service.spreadsheets.values.update(
+    table_values.extend(
+        [res['room_id'], res['count']] for res in reservations
+    )
+    if len(table_values) > const.SHEET_ROW_COUNT:
+        await send(wrapper_service, service.spreadsheets.batchUpdate(
+            spreadsheetId=spreadsheet_id,
+            json={'requests': [{'appendDimension': {
+                'sheetId': 0,
+                'dimension': 'ROWS',
+                'length': len(table_values) - const.SHEET_ROW_COUNT
+            }}]}
+        ))
+
+    chunk_rows = max(1, const.SHEET_CHUNK_CELLS // REPORT_COLUMNS)
+    last_column = chr(ord('A') + REPORT_COLUMNS - 1)
+    semaphore = asyncio.Semaphore(const.SHEET_WRITE_CONCURRENCY)
+
+    async def write(first: int) -> None:
+        rows = table_values[first:first + chunk_rows]
+        request = service.spreadsheets.values.batchUpdate(
             spreadsheetId=spreadsheet_id,
-            range='A1:E30',
-            valueInputOption='USER_ENTERED',
-            json=update_body
+            json={
+                'valueInputOption': 'USER_ENTERED',
+                'data': [{
+                    'range': 'A%d:%s%d' % (
+                        first + 1, last_column, first + len(rows)
+                    ),
+                    'majorDimension': 'ROWS',
+                    'values': rows
+                }]
+            }
+        )
+        async with semaphore:
+            await send(wrapper_service, request)
+
+    await asyncio.gather(*(
+        write(first) for first in range(0, len(table_values), chunk_rows)
+    ))
+
+
+async def publish_report(
+    spreadsheet_id: str,
+    reservations: list,
+    wrapper_service: Aiogoogle
+) -> None:
+    """Выдаёт доступ к таблице и заполняет её одновременно.
+
+    ### Args:
+    - spreadsheet_id (str):
+        `id` таблицы.
+    - reservations (list):
+        Строки отчёта.
+    - wrapper_service (Aiogoogle):
+        ...
+    """
+    await asyncio.gather(
+        set_user_permissions(spreadsheet_id, wrapper_service),
+        spreadsheet_update_value(
+            spreadsheet_id, reservations, wrapper_service
         )
     )
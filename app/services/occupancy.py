@@ -0,0 +1,389 @@
+"""Битовые карты занятости комнат по дням.
+
+Для каждой комнаты и каждого дня горизонта хранится строка бит,
+один бит на слот (по умолчанию минута). Вопросы вида «какие комнаты
+свободны с 14:00 до 15:30 каждый день недели» решаются векторными
+операциями NumPy над всеми комнатами сразу, без запросов к БД.
+Объём памяти ограничен горизонтом `settings.occupancy_horizon_days`.
+"""
+import asyncio
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Hashable
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.reservation import Reservation
+from app.models.reservation_series import ReservationSeries
+from app.services.recurrence import Recurrence
+
+MINUTES_PER_DAY = 24 * 60
+# Поля, которые перестройка карт подменяет разом.
+STATE = ('first_day', '_bits', '_room_rows', '_intervals', '_key_room',
+         '_day_keys')
+
+
+class OccupancyBitmaps:
+    """Карты занятости всех комнат на горизонт от текущего дня.
+
+    Биты строятся из интервалов, запомненных по ключам
+    `('reservation', id)` и `('series', id)`. При изменении брони
+    строки затронутых дней пересчитываются из оставшихся интервалов
+    комнаты, поэтому соседние брони в одном слоте не теряются.
+
+    Перестройка собирает новые карты отдельно и подменяет ими текущие
+    после последнего запроса к БД, так что до подмены запросы читают
+    прежние карты целиком. Изменения броней, пришедшие во время
+    перестройки, запоминаются и повторяются на новых картах.
+    """
+
+    def __init__(self, slot_minutes: int, horizon_days: int) -> None:
+        self.slot_minutes = slot_minutes
+        self.horizon_days = horizon_days
+        self.slots_per_day = MINUTES_PER_DAY // slot_minutes
+        self.row_bytes = -(-self.slots_per_day // 8)
+        self.first_day: None | date = None
+        self._bits = np.zeros((0, horizon_days, self.row_bytes), np.uint8)
+        self._room_rows: dict[int, int] = {}
+        self._intervals: dict[int, dict[Hashable, list[tuple]]] = {}
+        self._key_room: dict[Hashable, int] = {}
+        # Ключи интервалов, задевающих день комнаты: строка дня
+        # пересчитывается только из них.
+        self._day_keys: dict[tuple[int, int], set[Hashable]] = {}
+        self._lock = asyncio.Lock()
+        self._pending: None | list[tuple[Callable, tuple]] = None
+
+    @property
+    def is_warm(self) -> bool:
+        """Карты построены и горизонт начинается с текущего дня."""
+        return self.first_day == date.today()
+
+    @property
+    def horizon_end(self) -> datetime:
+        """Момент окончания горизонта."""
+        return datetime.combine(
+            self.first_day + timedelta(days=self.horizon_days), time()
+        )
+
+    def stats(self) -> dict[str, int]:
+        """Размер карт и занимаемая ими память."""
+        return {
+            'rooms': len(self._room_rows),
+            'horizon_days': self.horizon_days,
+            'slot_minutes': self.slot_minutes,
+            'intervals': len(self._key_room),
+            'bytes': self._bits.nbytes,
+        }
+
+    async def ensure_current(self, session: AsyncSession) -> None:
+        """Перестраивает карты, если начался новый день.
+
+        Одновременные запросы ждут одну перестройку.
+
+        ### Args:
+        - session (AsyncSession): Объект сессии.
+        """
+        if self.is_warm:
+            return
+        async with self._lock:
+            if not self.is_warm:
+                await self._build(session)
+
+    async def warm_up(self, session: AsyncSession) -> None:
+        """Строит карты из броней и серий, попадающих в горизонт.
+
+        ### Args:
+        - session (AsyncSession): Объект сессии.
+        """
+        async with self._lock:
+            await self._build(session)
+
+    async def _build(self, session: AsyncSession) -> None:
+        fresh = OccupancyBitmaps(self.slot_minutes, self.horizon_days)
+        fresh.first_day = date.today()
+        start = datetime.combine(fresh.first_day, time())
+        end = fresh.horizon_end
+        self._pending = []
+        try:
+            reservations = await session.execute(
+                select(
+                    Reservation.id,
+                    Reservation.room_id,
+                    Reservation.start_time,
+                    Reservation.end_time
+                ).where(
+                    Reservation.start_time < end,
+                    Reservation.end_time > start
+                )
+            )
+            for id, room_id, start_time, end_time in reservations:
+                fresh._remember(
+                    ('reservation', id), room_id, [(start_time, end_time)]
+                )
+            series = await session.scalars(
+                select(ReservationSeries).where(
+                    ReservationSeries.start_time < end,
+                    ReservationSeries.last_end_time > start
+                )
+            )
+            for one_series in series:
+                fresh._remember(
+                    ('series', one_series.id),
+                    one_series.room_id,
+                    fresh._intervals_of(Recurrence.from_series(one_series))
+                )
+            pending = self._pending
+        finally:
+            self._pending = None
+
+        bits = np.zeros(
+            (len(fresh._room_rows), self.horizon_days, self.slots_per_day),
+            bool
+        )
+        for room_id, row in fresh._room_rows.items():
+            for intervals in fresh._intervals[room_id].values():
+                for start_time, end_time in intervals:
+                    fresh._fill(bits[row], start_time, end_time)
+        fresh._bits = np.packbits(bits, axis=-1)
+        for method, args in pending:
+            method(fresh, *args)
+        for name in STATE:
+            setattr(self, name, getattr(fresh, name))
+
+    def add(self, reservation: Reservation) -> None:
+        """Отмечает бронь на картах, заменяя её прежнюю версию.
+
+        ### Args:
+        - reservation (Reservation): Сохранённая в БД бронь.
+        """
+        self._replace(
+            ('reservation', reservation.id),
+            reservation.room_id,
+            [(reservation.start_time, reservation.end_time)]
+        )
+
+    def discard(self, reservation_id: int) -> None:
+        """Снимает бронь с карт.
+
+        ### Args:
+        - reservation_id (int): id удалённой брони.
+        """
+        self._replace(('reservation', reservation_id), None, [])
+
+    def add_series(self, series: ReservationSeries) -> None:
+        """Отмечает на картах повторения серии в пределах горизонта.
+
+        ### Args:
+        - series (ReservationSeries): Сохранённая в БД серия.
+        """
+        self._replace(
+            ('series', series.id),
+            series.room_id,
+            Recurrence.from_series(series)
+        )
+
+    def discard_series(self, series_id: int) -> None:
+        """Снимает с карт повторения серии.
+
+        ### Args:
+        - series_id (int): id удалённой серии.
+        """
+        self._replace(('series', series_id), None, [])
+
+    def drop_room(self, room_id: int) -> None:
+        """Очищает карты удалённой комнаты.
+
+        ### Args:
+        - room_id (int): id удалённой комнаты.
+        """
+        self._record(OccupancyBitmaps.drop_room, room_id)
+        row = self._room_rows.get(room_id)
+        if row is None:
+            return
+        for key, intervals in self._intervals.pop(room_id).items():
+            del self._key_room[key]
+            self._forget_days(room_id, key, intervals)
+        self._bits[row] = 0
+
+    def free_rooms(
+        self,
+        room_ids: list[int],
+        first_day: date,
+        last_day: date,
+        start_time: time,
+        end_time: time,
+        every_day: bool = True
+    ) -> list[int]:
+        """Отбирает комнаты, свободные в указанное время.
+
+        ### Args:
+        - room_ids (list[int]): id проверяемых комнат.
+        - first_day (date): Первый день периода.
+        - last_day (date): Последний день периода.
+        - start_time (time): Начало времени в каждом дне.
+        - end_time (time): Конец времени в каждом дне.
+        - every_day (bool, optional): Комната должна быть свободна
+            в каждый день периода (иначе хотя бы в один).
+            Defaults to True.
+
+        ### Returns:
+        - list[int]: id свободных комнат в порядке `room_ids`.
+        """
+        first = (first_day - self.first_day).days
+        last = (last_day - self.first_day).days + 1
+        first_slot = self._slot(start_time.hour * 60 + start_time.minute)
+        last_slot = self._slot(
+            end_time.hour * 60 + end_time.minute, ceil=True
+        )
+        # Распаковываются только байты, содержащие нужные слоты.
+        first_byte, last_byte = first_slot // 8, -(-last_slot // 8)
+
+        rows = np.array(
+            [self._room_rows.get(room_id, -1) for room_id in room_ids],
+            dtype=np.intp
+        )
+        known = rows >= 0
+        packed = np.zeros(
+            (len(room_ids), last - first, last_byte - first_byte), np.uint8
+        )
+        packed[known] = self._bits[
+            rows[known], first:last, first_byte:last_byte
+        ]
+        slots = np.unpackbits(packed, axis=-1)[
+            ..., first_slot - first_byte * 8:last_slot - first_byte * 8
+        ]
+        busy_days = slots.any(axis=-1)
+        free = ~busy_days.any(axis=1) if every_day else ~busy_days.all(axis=1)
+        return [room_id for room_id, ok in zip(room_ids, free) if ok]
+
+    def _intervals_of(self, source: list[tuple] | Recurrence) -> list[tuple]:
+        """Интервалы брони или повторения серии в пределах горизонта."""
+        if not isinstance(source, Recurrence):
+            return source
+        start = datetime.combine(self.first_day, time())
+        return [
+            occurrence[1:]
+            for occurrence in source.occurrences(start, self.horizon_end)
+        ]
+
+    def _record(self, method: Callable, *args) -> None:
+        """Запоминает изменение, пришедшее во время перестройки карт."""
+        if self._pending is not None:
+            self._pending.append((method, args))
+
+    def _remember(
+        self,
+        key: Hashable,
+        room_id: int,
+        intervals: list[tuple]
+    ) -> None:
+        if room_id not in self._room_rows:
+            self._room_rows[room_id] = len(self._room_rows)
+        self._intervals.setdefault(room_id, {})[key] = intervals
+        self._key_room[key] = room_id
+        for interval in intervals:
+            for day in self._days(*interval):
+                self._day_keys.setdefault((room_id, day), set()).add(key)
+
+    def _forget_days(
+        self,
+        room_id: int,
+        key: Hashable,
+        intervals: list[tuple]
+    ) -> set[tuple[int, int]]:
+        """Убирает ключ из дней его интервалов и возвращает эти дни."""
+        days = set()
+        for interval in intervals:
+            for day in self._days(*interval):
+                keys = self._day_keys.get((room_id, day))
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._day_keys[room_id, day]
+                days.add((room_id, day))
+        return days
+
+    def _replace(
+        self,
+        key: Hashable,
+        room_id: None | int,
+        source: list[tuple] | Recurrence
+    ) -> None:
+        self._record(OccupancyBitmaps._replace, key, room_id, source)
+        if not self.is_warm:
+            return
+        days = set()
+        old_room_id = self._key_room.pop(key, None)
+        if old_room_id is not None:
+            days.update(self._forget_days(
+                old_room_id, key, self._intervals[old_room_id].pop(key)
+            ))
+        intervals = [
+            interval for interval in self._intervals_of(source)
+            if self._days(*interval)
+        ]
+        if room_id is not None and intervals:
+            self._remember(key, room_id, intervals)
+            if len(self._room_rows) > len(self._bits):
+                self._grow()
+            for interval in intervals:
+                days.update((room_id, day) for day in self._days(*interval))
+        for day_room_id, day in days:
+            self._rebuild(day_room_id, day)
+
+    def _grow(self) -> None:
+        """Удваивает массив карт при появлении новой комнаты."""
+        extra = np.zeros(
+            (max(len(self._bits), 1), self.horizon_days, self.row_bytes),
+            np.uint8
+        )
+        self._bits = np.concatenate((self._bits, extra))
+
+    def _rebuild(self, room_id: int, day: int) -> None:
+        """Пересчитывает строку одного дня комнаты из интервалов,
+        задевающих этот день.
+        """
+        bits = np.zeros(self.slots_per_day, bool)
+        intervals = self._intervals.get(room_id, {})
+        for key in self._day_keys.get((room_id, day), ()):
+            for start_time, end_time in intervals[key]:
+                self._fill(bits, start_time, end_time, day)
+        self._bits[self._room_rows[room_id], day] = np.packbits(bits)
+
+    def _days(self, start_time: datetime, end_time: datetime) -> range:
+        """Номера дней горизонта, которые задевает интервал."""
+        first = (start_time.date() - self.first_day).days
+        last = ((end_time - timedelta.resolution).date()
+                - self.first_day).days
+        return range(max(first, 0), min(last + 1, self.horizon_days))
+
+    def _slot(self, minutes: float, ceil: bool = False) -> int:
+        if ceil:
+            return int(-(-minutes // self.slot_minutes))
+        return int(minutes // self.slot_minutes)
+
+    def _fill(
+        self,
+        bits: np.ndarray,
+        start_time: datetime,
+        end_time: datetime,
+        day: int = 0
+    ) -> None:
+        """Отмечает интервал на матрице `дни × слоты` одной комнаты,
+        начинающейся с дня горизонта `day`.
+        """
+        origin = datetime.combine(self.first_day + timedelta(days=day), time())
+        first = (start_time - origin) / timedelta(minutes=1)
+        last = (end_time - origin) / timedelta(minutes=1)
+        first = max(self._slot(first), 0)
+        last = min(self._slot(last, ceil=True), bits.size)
+        if first < last:
+            bits.reshape(-1)[first:last] = True
+
+
+occupancy_bitmaps = OccupancyBitmaps(
+    settings.occupancy_slot_minutes,
+    settings.occupancy_horizon_days
+)
@@ -0,0 +1,65 @@
+"""Постраничная выдача списков по ключу (keyset pagination).
+
+Страница начинается сразу после последней записи предыдущей страницы:
+запрос фильтрует `(ключ) > (значения курсора)` и читает по индексу
+не больше `limit + 1` строк. Время ответа не зависит от номера
+страницы и размера таблицы. Курсор - значения ключа последней записи,
+упакованные в непрозрачную строку.
+"""
+import base64
+import binascii
+import json
+from typing import Any, NamedTuple
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from app.services import constants as const
+
+
+class Page(NamedTuple):
+    """Страница списка.
+
+    ### Attrs:
+    - items: Записи страницы.
+    - next_cursor: Курсор следующей страницы или None для последней.
+    """
+    items: list
+    next_cursor: None | str
+
+
+def encode_cursor(values: list[Any]) -> str:
+    """Упаковывает значения ключа в курсор."""
+    raw = json.dumps(jsonable_encoder(values), separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """Распаковывает курсор в значения ключа.
+
+    ### Raises:
+    - ValueError: Курсор повреждён.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError) as error:
+        raise ValueError(cursor) from error
+    if not isinstance(values, list):
+        raise ValueError(cursor)
+    return values
+
+
+def set_next_cursor(response: Response, page: Page) -> Response:
+    """Передаёт курсор следующей страницы в заголовке ответа.
+
+    ### Args:
+    - response (Response): Ответ эндпоинта.
+    - page (Page): Отдаваемая страница.
+
+    ### Returns:
+    - Response: Тот же ответ.
+    """
+    if page.next_cursor is not None:
+        response.headers[const.NEXT_CURSOR_HEADER] = page.next_cursor
+    return response
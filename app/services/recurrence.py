@@ -0,0 +1,174 @@
+"""Правила повторения броней.
+
+Серия хранится одной записью, а её повторения вычисляются
+арифметически только для запрошенного окна времени: номера
+повторений, попадающих в окно, находятся делением, без перебора
+серии с начала.
+"""
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import NamedTuple
+
+from app.services import constants as const
+
+
+class Frequency(str, Enum):
+    """Частота повторения серии."""
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+
+
+PERIODS = {
+    Frequency.DAILY: timedelta(days=1),
+    Frequency.WEEKLY: timedelta(weeks=1),
+}
+
+
+class Occurrence(NamedTuple):
+    """Одно повторение серии."""
+    series_id: int
+    start_time: datetime
+    end_time: datetime
+
+    def __repr__(self) -> str:
+        return const.ROOM_BUSY % (self.start_time, self.end_time)
+
+
+def get_step(frequency: str, interval: int) -> timedelta:
+    """Промежуток между началами соседних повторений."""
+    return PERIODS[Frequency(frequency)] * interval
+
+
+def count_occurrences(
+    start_time: datetime,
+    step: timedelta,
+    until: None | datetime = None,
+    count: None | int = None
+) -> int:
+    """Число повторений серии с учётом `until` и `count`.
+
+    `until` ограничивает начало последнего повторения включительно.
+    """
+    total = count
+    if until is not None:
+        by_until = max((until - start_time) // step + 1, 0)
+        total = by_until if total is None else min(total, by_until)
+    return total
+
+
+class Recurrence:
+    """Развёртываемое правило серии броней.
+
+    ### Attrs:
+    - id: id серии.
+    - room_id: id комнаты.
+    - start_time: Начало первого повторения.
+    - duration: Длительность одного повторения.
+    - step: Промежуток между началами повторений.
+    - total: Число повторений.
+    - exceptions: Номера отменённых повторений.
+    """
+    __slots__ = (
+        'id', 'room_id', 'start_time', 'duration', 'step', 'total',
+        'exceptions'
+    )
+
+    def __init__(
+        self,
+        id: int,
+        room_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        frequency: str,
+        interval: int,
+        until: None | datetime = None,
+        count: None | int = None,
+        exceptions: None | list[str | datetime] = None
+    ) -> None:
+        self.id = id
+        self.room_id = room_id
+        self.start_time = start_time
+        self.duration = end_time - start_time
+        self.step = get_step(frequency, interval)
+        self.total = count_occurrences(start_time, self.step, until, count)
+        self.exceptions = set()
+        # Исключения новых серий проверяет схема; несовпадающие
+        # с повторениями встречаются только в старых записях.
+        for exception in exceptions or ():
+            if isinstance(exception, str):
+                exception = datetime.fromisoformat(exception)
+            offset = exception - start_time
+            if offset % self.step == timedelta(0):
+                self.exceptions.add(offset // self.step)
+
+    @classmethod
+    def from_series(cls, series) -> 'Recurrence':
+        """Строит правило по записи `ReservationSeries`
+        или по схеме новой серии.
+        """
+        return cls(
+            getattr(series, 'id', None),
+            series.room_id,
+            series.start_time,
+            series.end_time,
+            series.frequency,
+            series.interval,
+            series.until,
+            series.count,
+            series.exceptions
+        )
+
+    @property
+    def last_end_time(self) -> datetime:
+        """Конец последнего повторения."""
+        return self.start_time + self.step * (self.total - 1) + self.duration
+
+    def indexes(self, start_time: datetime, end_time: datetime) -> range:
+        """Номера повторений, пересекающих период `[start_time, end_time)`.
+
+        Повторение `k` занимает `[start + k*step, start + k*step + duration)`.
+        """
+        first = (start_time - self.start_time - self.duration) // self.step + 1
+        # Повторение k начинается раньше end_time, если k*step < end - start.
+        last = -((self.start_time - end_time) // self.step)
+        return range(max(first, 0), min(last, self.total))
+
+    def occurrences(
+        self,
+        start_time: datetime,
+        end_time: datetime
+    ) -> list[Occurrence]:
+        """Повторения серии, пересекающие указанный период.
+
+        ### Args:
+        - start_time (datetime): Начало периода.
+        - end_time (datetime): Конец периода.
+
+        ### Returns:
+        - list[Occurrence]: Повторения, отсортированные по началу.
+        """
+        return [
+            self.occurrence(index)
+            for index in self.indexes(start_time, end_time)
+            if index not in self.exceptions
+        ]
+
+    def first_overlap(
+        self,
+        start_time: datetime,
+        end_time: datetime
+    ) -> None | Occurrence:
+        """Первое повторение, пересекающее указанный период.
+
+        Перебираются только отменённые повторения, поэтому проверка
+        не зависит от длины серии.
+        """
+        for index in self.indexes(start_time, end_time):
+            if index not in self.exceptions:
+                return self.occurrence(index)
+        return None
+
+    def occurrence(self, index: int) -> Occurrence:
+        """Повторение с указанным номером."""
+        start_time = self.start_time + self.step * index
+        return Occurrence(self.id, start_time, start_time + self.duration)
@@ -0,0 +1,198 @@
+"""Фоновое построение отчётов в Google Sheets.
+
+`POST /google/` только ставит задачу в очередь и сразу возвращает её
+id, а отчёт строится в цикле событий процесса: одновременно строится
+не больше `settings.report_workers` отчётов. Состояние задачи
+читается через `GET /google/jobs/{id}`.
+
+Задача за тот же период, выполненная не раньше чем
+`settings.report_cache_ttl` секунд назад или ещё не завершённая,
+переиспользуется вместо построения нового отчёта.
+
+Задачи живут в памяти процесса: при нескольких воркерах задачу
+нужно опрашивать у того воркера, который её создал.
+"""
+import asyncio
+import logging
+import secrets
+from datetime import datetime
+
+from aiogoogle import Aiogoogle
+
+from app.core import google_client as google
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.crud.reservation import reservation_crud
+from app.services import constants as const
+from app.services import google_api as google_serv
+from app.services.cache import MISSING, TTLCache
+
+logger = logging.getLogger('uvicorn.error')
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+STEPS = ('spreadsheet', 'publish')
+
+
+class ReportJob:
+    """Задача построения отчёта за период.
+
+    ### Attrs:
+    - id: Идентификатор задачи.
+    - status: `pending`, `running`, `done` или `failed`.
+    - step: Выполняемый шаг из `STEPS`.
+    - progress: Доля выполненных шагов.
+    - spreadsheet_id: `id` созданной таблицы.
+    - reservations: Число броней по комнатам.
+    - error: Причина неудачи.
+    """
+
+    def __init__(self, start_time: datetime, end_time: datetime) -> None:
+        self.id = secrets.token_hex(8)
+        self.start_time = start_time
+        self.end_time = end_time
+        self.status = PENDING
+        self.step: None | str = None
+        self.progress = 0.0
+        self.spreadsheet_id: None | str = None
+        self.reservations: None | list[dict[str, int]] = None
+        self.error: None | str = None
+        self.created_at = datetime.now()
+        self.finished_at: None | datetime = None
+
+    @property
+    def spreadsheet_url(self) -> None | str:
+        if self.spreadsheet_id is None:
+            return None
+        return const.SPREADSHEET_URL % self.spreadsheet_id
+
+    def start_step(self, step: str) -> None:
+        self.step = step
+        self.progress = STEPS.index(step) / len(STEPS)
+
+    def finish(self, status: str, error: None | str = None) -> None:
+        self.status = status
+        self.error = error
+        self.step = None
+        if status == DONE:
+            self.progress = 1.0
+        self.finished_at = datetime.now()
+
+
+class ReportQueue:
+    """Очередь задач построения отчётов.
+
+    ### Attrs:
+    - workers: Наибольшее число одновременно строящихся отчётов.
+    - jobs: Задачи по id.
+    - results: id последней задачи по периоду `(start_time, end_time)`.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        maxsize: int,
+        job_ttl: float,
+        result_ttl: float
+    ) -> None:
+        self.workers = workers
+        self.jobs = TTLCache(maxsize, job_ttl)
+        self.results = TTLCache(maxsize, result_ttl)
+        self._semaphore = asyncio.Semaphore(workers)
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(self, start_time: datetime, end_time: datetime) -> ReportJob:
+        """Ставит в очередь отчёт за период или находит готовый.
+
+        ### Args:
+        - start_time (datetime): Начало периода.
+        - end_time (datetime): Окончание периода.
+
+        ### Returns:
+        - ReportJob: Новая или переиспользованная задача.
+        """
+        key = (start_time, end_time)
+        job_id = self.results.get(key)
+        if job_id is not MISSING:
+            job = self.jobs.get(job_id)
+            if job is not MISSING and job.status != FAILED:
+                return job
+        job = ReportJob(start_time, end_time)
+        self.jobs.set(job.id, job)
+        self.results.set(key, job.id)
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> None | ReportJob:
+        """Задача по id или None, если её нет или она устарела."""
+        job = self.jobs.get(job_id)
+        return None if job is MISSING else job
+
+    def shutdown(self) -> None:
+        """Отменяет незавершённые задачи."""
+        for task in self._tasks:
+            task.cancel()
+
+    def stats(self) -> dict[str, int | float]:
+        """Число задач в работе и доля переиспользованных отчётов."""
+        running = sum(
+            1 for task in self._tasks if not task.done()
+        )
+        return {
+            'workers': self.workers,
+            'active': running,
+            'jobs': len(self.jobs),
+            'reused': self.results.hits,
+            'reuse_rate': self.results.stats()['hit_rate'],
+        }
+
+    async def _run(self, job: ReportJob) -> None:
+        async with self._semaphore:
+            job.status = RUNNING
+            try:
+                async with Aiogoogle(
+                    service_account_creds=google.credentials
+                ) as wrapper_service:
+                    job.start_step('spreadsheet')
+                    job.reservations, job.spreadsheet_id = (
+                        await asyncio.gather(
+                            self._count(job),
+                            google_serv.spreadsheet_create(wrapper_service)
+                        )
+                    )
+                    job.start_step('publish')
+                    await google_serv.publish_report(
+                        job.spreadsheet_id, job.reservations, wrapper_service
+                    )
+            except Exception as error:
+                logger.exception('Report job %s failed', job.id)
+                job.finish(FAILED, str(error))
+                return
+            job.finish(DONE)
+            # Время жизни готового отчёта отсчитывается от завершения.
+            self.results.set((job.start_time, job.end_time), job.id)
+
+    @staticmethod
+    async def _count(job: ReportJob) -> list[dict[str, int]]:
+        async with AsyncSessionLocal() as session:
+            rows = await reservation_crud.count_reses_in_time_interval(
+                start_time=job.start_time,
+                end_time=job.end_time,
+                session=session
+            )
+        return [
+            {'room_id': room_id, 'count': count} for room_id, count in rows
+        ]
+
+
+report_jobs = ReportQueue(
+    settings.report_workers,
+    settings.report_jobs_size,
+    settings.report_job_ttl,
+    settings.report_cache_ttl
+)
@@ -0,0 +1,62 @@
+"""Быстрая сериализация списков.
+
+Списки читаются из БД выборкой столбцов в словари и кодируются orjson
+напрямую, минуя создание ORM-объектов и проверку каждого объекта
+схемой pydantic с `orm_mode`. Схемы ответа остаются в `response_model`
+эндпоинтов и описывают ответ в OpenAPI, а набор читаемых столбцов
+берётся из их полей.
+"""
+from typing import Any, Iterable, Type
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def schema_columns(
+    schema: Type[BaseModel],
+    exclude: Iterable[str] = ()
+) -> tuple[str, ...]:
+    """Поля схемы ответа, читаемые из БД как столбцы.
+
+    ### Args:
+    - schema (Type[BaseModel]): Схема ответа.
+    - exclude (Iterable[str], optional): Исключаемые поля.
+        Defaults to ().
+
+    ### Returns:
+    - tuple[str, ...]: Имена столбцов.
+    """
+    exclude = set(exclude)
+    return tuple(field for field in schema.__fields__ if field not in exclude)
+
+
+def json_response(
+    rows: list[dict],
+    exclude_none: bool = False
+) -> ORJSONResponse:
+    """Кодирует строки в JSON-ответ.
+
+    ### Args:
+    - rows (list[dict]): Строки ответа.
+    - exclude_none (bool, optional): Не выводить пустые значения,
+        как `response_model_exclude_none`. Defaults to False.
+
+    ### Returns:
+    - ORJSONResponse: Ответ эндпоинта.
+    """
+    if exclude_none:
+        rows = [
+            {key: value for key, value in row.items() if value is not None}
+            for row in rows
+        ]
+    return ORJSONResponse(rows)
+
+
+class NumpyJSONResponse(ORJSONResponse):
+    """Ответ, в котором массивы NumPy кодируются orjson напрямую,
+    без перевода в списки Python.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -0,0 +1,283 @@
+"""Загрузка комнат по дням, часам и часам недели.
+
+Брони читаются одним запросом только начала и конца, склеенных
+по комнатам, и сразу переводятся в массивы NumPy, повторения серий
+разворачиваются арифметикой над номерами повторений. Забронированное
+время корзин считается без циклов по броням: интервалы обрезаются
+по периоду, неполные первая и последняя корзины брони прибавляются
+через `np.bincount`, а целые корзины между ними - разностным массивом
+и накопленной суммой.
+"""
+from datetime import datetime, timedelta
+from enum import Enum
+
+import numpy as np
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.reservation_series import reservation_series_crud
+from app.models.reservation import Reservation
+
+HOURS_PER_WEEK = 7 * 24
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+HOUR_OF_WEEK_LABELS = [
+    f'{weekday} {hour:02}:00' for weekday in WEEKDAYS for hour in range(24)
+]
+
+# (комнаты, начала, концы) с точностью до секунды.
+Intervals = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class Granularity(str, Enum):
+    """Размер корзины отчёта о загрузке."""
+    DAY = 'day'
+    HOUR = 'hour'
+    HOUR_OF_WEEK = 'hour_of_week'
+
+    @property
+    def width(self) -> timedelta:
+        """Длина корзины, по которой считается забронированное время."""
+        return timedelta(days=1) if self is Granularity.DAY else timedelta(
+            hours=1
+        )
+
+
+def align(
+    start_time: datetime,
+    end_time: datetime,
+    granularity: Granularity
+) -> tuple[datetime, datetime]:
+    """Расширяет период до целых корзин.
+
+    ### Args:
+    - start_time (datetime): Начало периода.
+    - end_time (datetime): Конец периода.
+    - granularity (Granularity): Размер корзины.
+
+    ### Returns:
+    - tuple[datetime, datetime]: Начало первой и конец последней корзины.
+    """
+    width = granularity.width
+    start_time = datetime.min + (start_time - datetime.min) // width * width
+    end_time = datetime.min - (datetime.min - end_time) // width * width
+    return start_time, end_time
+
+
+def intervals_text(dialect: str):
+    """Агрегат, склеивающий брони группы в строку `начало,конец,...`.
+
+    Начало и конец брони склеиваются до агрегирования, поэтому пары
+    не разъезжаются при любом порядке строк в группе.
+    """
+    pair = (
+        cast(Reservation.start_time, String) + ','
+        + cast(Reservation.end_time, String)
+    )
+    if dialect == 'postgresql':
+        return func.string_agg(pair, ',', type_=String)
+    return func.group_concat(pair, type_=String)
+
+
+async def load_intervals(
+    room_ids: list[int],
+    start_time: datetime,
+    end_time: datetime,
+    session: AsyncSession
+) -> Intervals:
+    """Брони и повторения серий комнат, пересекающие период.
+
+    Брони каждой комнаты приходят одной строкой агрегата, которую
+    NumPy разбирает целиком, поэтому объекты Python создаются
+    на комнату, а не на бронь.
+
+    ### Args:
+    - room_ids (list[int]): id комнат.
+    - start_time (datetime): Начало периода.
+    - end_time (datetime): Конец периода.
+    - session (AsyncSession): Объект сессии.
+
+    ### Returns:
+    - Intervals: Массивы комнат, начал и концов.
+    """
+    rows = (await session.execute(
+        select(
+            Reservation.room_id,
+            func.count(),
+            intervals_text(session.bind.dialect.name)
+        ).where(
+            Reservation.room_id.in_(room_ids),
+            Reservation.start_time < end_time,
+            Reservation.end_time > start_time
+        ).group_by(Reservation.room_id)
+    )).all()
+    rooms, counts, texts = zip(*rows) if rows else ((), (), ())
+    times = np.array(
+        ','.join(texts).split(',') if texts else [], 'datetime64[us]'
+    ).astype('datetime64[s]').reshape(-1, 2)
+    parts = [(
+        np.repeat(np.array(rooms, np.int64), np.array(counts, np.int64)),
+        times[:, 0],
+        times[:, 1]
+    )]
+    recurrences = await reservation_series_crud.get_recurrences(
+        set(room_ids), start_time, end_time, session
+    )
+    for rules in recurrences.values():
+        for rule in rules:
+            indexes = rule.indexes(start_time, end_time)
+            numbers = np.arange(indexes.start, indexes.stop)
+            numbers = numbers[~np.isin(numbers, list(rule.exceptions))]
+            first = np.datetime64(rule.start_time, 's')
+            step = np.timedelta64(rule.step, 's')
+            starts = first + numbers * step
+            parts.append((
+                np.full(numbers.size, rule.room_id, np.int64),
+                starts,
+                starts + np.timedelta64(rule.duration, 's')
+            ))
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+def booked_seconds(
+    rows: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    rooms: int,
+    buckets: int,
+    width: int
+) -> np.ndarray:
+    """Забронированные секунды каждой корзины каждой комнаты.
+
+    ### Args:
+    - rows (np.ndarray): Номер строки комнаты для каждого интервала.
+    - starts (np.ndarray): Начала в секундах от начала первой корзины.
+    - ends (np.ndarray): Концы в секундах, `starts < ends`,
+        не дальше конца последней корзины.
+    - rooms (int): Число комнат.
+    - buckets (int): Число корзин.
+    - width (int): Длина корзины в секундах.
+
+    ### Returns:
+    - np.ndarray: Матрица (комнаты, корзины).
+    """
+    first = starts // width
+    last = (ends - 1) // width
+    same = first == last
+    size = rooms * buckets
+    booked = np.bincount(
+        rows * buckets + first,
+        weights=np.where(same, ends, (first + 1) * width) - starts,
+        minlength=size
+    )
+    split = ~same
+    booked += np.bincount(
+        (rows * buckets + last)[split],
+        weights=(ends - last * width)[split],
+        minlength=size
+    )
+    # Целые корзины first+1 .. last-1: +1 в начале, -1 после конца.
+    offsets = rows[split] * (buckets + 1)
+    size = rooms * (buckets + 1)
+    marks = (
+        np.bincount(offsets + first[split] + 1, minlength=size)
+        - np.bincount(offsets + last[split], minlength=size)
+    )
+    full = marks.reshape(rooms, buckets + 1).cumsum(axis=1)[:, :buckets]
+    # Без интервалов `np.bincount` возвращает целые, а не float.
+    return booked.reshape(rooms, buckets).astype(float) + full * width
+
+
+def fold_weeks(matrix: np.ndarray, shift: int) -> np.ndarray:
+    """Складывает почасовые столбцы в 168 часов недели.
+
+    ### Args:
+    - matrix (np.ndarray): Матрица (строки, часы подряд).
+    - shift (int): Час недели первого столбца, 0 - понедельник 00:00.
+
+    ### Returns:
+    - np.ndarray: Матрица (строки, 168).
+    """
+    hours = matrix.shape[1]
+    weeks = -(-(shift + hours) // HOURS_PER_WEEK)
+    padded = np.zeros((matrix.shape[0], weeks * HOURS_PER_WEEK))
+    padded[:, shift:shift + hours] = matrix
+    return padded.reshape(-1, weeks, HOURS_PER_WEEK).sum(axis=1)
+
+
+def compute_utilization(
+    room_ids: list[int],
+    intervals: Intervals,
+    start_time: datetime,
+    end_time: datetime,
+    granularity: Granularity
+) -> dict:
+    """Забронированные минуты и доля занятого времени по корзинам.
+
+    ### Args:
+    - room_ids (list[int]): id комнат по возрастанию.
+    - intervals (Intervals): Интервалы из `load_intervals`.
+    - start_time (datetime): Начало первой корзины.
+    - end_time (datetime): Конец последней корзины.
+    - granularity (Granularity): Размер корзины.
+
+    ### Returns:
+    - dict: Ответ в виде `UtilizationResponse`, ряды корзин -
+        массивы NumPy для `NumpyJSONResponse`.
+    """
+    width = int(granularity.width.total_seconds())
+    buckets = int((end_time - start_time).total_seconds()) // width
+    ids = np.array(room_ids, np.int64)
+    rooms, starts, ends = intervals
+    rows = np.searchsorted(ids, rooms)
+    known = rows < ids.size
+    known[known] = ids[rows[known]] == rooms[known]
+    origin = np.datetime64(start_time, 's')
+    total = buckets * width
+    starts = np.clip((starts - origin).astype(np.int64), 0, total)
+    ends = np.clip((ends - origin).astype(np.int64), 0, total)
+    keep = known & (starts < ends)
+    booked = booked_seconds(
+        rows[keep], starts[keep], ends[keep], ids.size, buckets, width
+    )
+    capacity = np.full(buckets, float(width))
+    if granularity is Granularity.HOUR_OF_WEEK:
+        shift = start_time.weekday() * 24 + start_time.hour
+        booked = fold_weeks(booked, shift)
+        capacity = fold_weeks(capacity[np.newaxis], shift)[0]
+        labels = HOUR_OF_WEEK_LABELS
+    else:
+        unit = 'D' if granularity is Granularity.DAY else 'm'
+        labels = np.datetime_as_string(
+            origin + np.arange(buckets) * np.timedelta64(width, 's'),
+            unit=unit
+        ).tolist()
+    share = np.divide(
+        booked, capacity, out=np.zeros_like(booked), where=capacity > 0
+    ).round(4)
+    totals = booked.sum(axis=1)
+    return {
+        'granularity': granularity.value,
+        'start_time': start_time,
+        'end_time': end_time,
+        'buckets': labels,
+        'capacity_minutes': (capacity / 60).round(2),
+        'rooms': [
+            {
+                'room_id': room_id,
+                'booked_minutes': minutes,
+                'utilization': utilization,
+                'total_booked_minutes': total_minutes,
+                'total_utilization': total_utilization,
+            }
+            for (
+                room_id, minutes, utilization, total_minutes,
+                total_utilization
+            ) in zip(
+                room_ids,
+                (booked / 60).round(2),
+                share,
+                (totals / 60).round(2).tolist(),
+                (totals / total).round(4).tolist()
+            )
+        ],
+    }
@@ -0,0 +1,125 @@
+"""Версии изменяемых списков для ответов с `ETag`.
+
+Каждая запись в расписание комнаты или в каталог комнат увеличивает
+номер версии соответствующего ключа. `ETag` ответа состоит из эпохи
+процесса, версии, свёртки строки запроса и, для расписаний, момента,
+до которого ответ не устаревает сам по себе (окончание первой брони
+в списке). Проверка `If-None-Match` сравнивает эти части без чтения
+списка из БД.
+
+Ответ, прочитанный из реплики вскоре после записи, может быть
+старее своей версии, поэтому тег для него не выдаётся, пока
+с записи не пройдёт `settings.read_your_writes_seconds`.
+
+Версии живут в памяти процесса: при нескольких воркерах настройку
+`settings.etag_versions` нужно отключить.
+"""
+import secrets
+import time
+import zlib
+from datetime import datetime
+from typing import Hashable
+
+from app.core.config import settings
+
+CATALOG = 'catalog'
+
+
+def room_key(room_id: int) -> tuple[str, int]:
+    """Ключ версии расписания комнаты."""
+    return ('room', room_id)
+
+
+class VersionTokens:
+    """Номера версий списков и построение `ETag` по ним."""
+
+    def __init__(self) -> None:
+        # Эпоха отличает теги, выданные до перезапуска процесса.
+        self.epoch = secrets.token_hex(4)
+        self._versions: dict[Hashable, int] = {}
+        self._bumped_at: dict[Hashable, float] = {}
+
+    def get(self, key: Hashable) -> int:
+        """Текущая версия списка."""
+        return self._versions.get(key, 0)
+
+    def bump(self, *keys: Hashable) -> None:
+        """Отмечает изменение списков."""
+        now = time.monotonic()
+        for key in keys:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._bumped_at[key] = now
+
+    def etag(
+        self,
+        key: Hashable,
+        version: int,
+        query: str,
+        valid_until: None | datetime = None,
+        replica: bool = False
+    ) -> None | str:
+        """Строит `ETag` ответа.
+
+        ### Args:
+        - key (Hashable): Ключ версии списка.
+        - version (int): Версия списка, прочитанная до запроса к БД.
+        - query (str): Строка запроса (параметры страницы).
+        - valid_until (None | datetime, optional): Момент, после
+            которого ответ устаревает без записей. Defaults to None.
+        - replica (bool, optional): Ответ прочитан из реплики.
+            Defaults to False.
+
+        ### Returns:
+        - None | str: Тег или None, если версии отключены
+            или ответ из реплики может отставать от версии.
+        """
+        if not settings.etag_versions:
+            return None
+        if replica and (
+            time.monotonic() - self._bumped_at.get(key, float('-inf'))
+            < settings.read_your_writes_seconds
+        ):
+            return None
+        parts = [self.epoch, str(version), self._digest(query)]
+        if valid_until is not None:
+            parts.append(str(int(valid_until.timestamp())))
+        return 'W/"%s"' % '.'.join(parts)
+
+    def match(
+        self,
+        if_none_match: None | str,
+        key: Hashable,
+        query: str
+    ) -> None | str:
+        """Ищет в `If-None-Match` тег, актуальный для списка.
+
+        ### Args:
+        - if_none_match (None | str): Значение заголовка.
+        - key (Hashable): Ключ версии списка.
+        - query (str): Строка запроса.
+
+        ### Returns:
+        - None | str: Совпавший тег или None.
+        """
+        if not settings.etag_versions or not if_none_match:
+            return None
+        current = [self.epoch, str(self.get(key)), self._digest(query)]
+        now = datetime.now().timestamp()
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            parts = tag.removeprefix('W/').strip('"').split('.')
+            if parts[:3] != current or len(parts) > 4:
+                continue
+            if len(parts) == 4 and not (
+                parts[3].isdigit() and now < int(parts[3])
+            ):
+                continue
+            return tag
+        return None
+
+    @staticmethod
+    def _digest(query: str) -> str:
+        return format(zlib.crc32(query.encode()), 'x')
+
+
+versions = VersionTokens()
@@ -0,0 +1,207 @@
+"""Время отчёта в Google Sheets на локальной заглушке Google API.
+
+Заглушка на aiohttp отвечает на запросы токена, discovery, создания
+таблицы, выдачи доступа и записи значений с задержкой `--latency`
+(discovery - с задержкой `--discovery-latency` и документом размером
+около `--discovery-kb` КБ), а доля `--throttle` запросов к API получает
+ответ 429. Сравниваются отчёты по `--rooms` комнатам без кэша
+discovery, с холодным стартом из снимков на диске и с прогретым кэшем.
+Запуск из корня проекта:
+
+    python -m benchmarks.google_report --reports 20 --rooms 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import tempfile
+import time
+
+from aiohttp import web
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+STUB = f'http://127.0.0.1:{free_port()}/'
+SNAPSHOT_DIR = tempfile.mkdtemp()
+KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+os.environ.update({
+    'TYPE_': 'service_account',
+    'PRIVATE_KEY': KEY.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode(),
+    'CLIENT_EMAIL': 'bench@example.iam.gserviceaccount.com',
+    'TOKEN_URI': STUB + 'token',
+    'EMAIL_USER': 'bench@example.com',
+    'GOOGLE_DISCOVERY_DIR': SNAPSHOT_DIR,
+})
+
+from aiogoogle import data  # noqa: E402
+
+from app.core import google_client as google  # noqa: E402
+from app.services import constants as const  # noqa: E402
+from app.services import google_api as google_serv  # noqa: E402
+
+# Discovery Service тоже направляется в заглушку.
+data.DISCOVERY_SERVICE_V1_DISCOVERY_DOC['rootUrl'] = STUB
+const.GOOGLE_BACKOFF = 0.01
+
+API_CALLS = {'sent': 0, 'throttled': 0}
+
+
+def method(http_method: str, path: str, *params: str) -> dict:
+    return {
+        'httpMethod': http_method,
+        'path': path,
+        'parameters': {
+            name: {'type': 'string', 'location': 'path', 'required': True}
+            for name in params
+        } | {
+            'valueInputOption': {'type': 'string', 'location': 'query'},
+            'fields': {'type': 'string', 'location': 'query'},
+        },
+        'parameterOrder': list(params),
+        'request': {'$ref': 'Body'},
+    }
+
+
+def discovery_document(api: str, version: str, padding_kb: int) -> dict:
+    if api == 'sheets':
+        resources = {'spreadsheets': {
+            'methods': {
+                'create': method('POST', 'v4/spreadsheets'),
+                'batchUpdate': method(
+                    'POST',
+                    'v4/spreadsheets/{spreadsheetId}:batchUpdate',
+                    'spreadsheetId'
+                ),
+            },
+            'resources': {'values': {'methods': {'batchUpdate': method(
+                'POST',
+                'v4/spreadsheets/{spreadsheetId}/values:batchUpdate',
+                'spreadsheetId'
+            )}}},
+        }}
+    else:
+        resources = {'permissions': {'methods': {'create': method(
+            'POST', 'drive/v3/files/{fileId}/permissions', 'fileId'
+        )}}}
+    # Настоящие документы занимают сотни килобайт схем.
+    schemas = {
+        f'Schema{number}': {
+            'type': 'object',
+            'properties': {
+                'field': {'type': 'string', 'description': 'x' * 900}
+            }
+        }
+        for number in range(padding_kb)
+    }
+    return {
+        'name': api,
+        'version': version,
+        'rootUrl': STUB,
+        'servicePath': '',
+        'batchPath': 'batch',
+        'resources': resources,
+        'schemas': schemas | {'Body': {'type': 'object'}},
+    }
+
+
+def stub_app(args: argparse.Namespace) -> web.Application:
+    latency = args.latency / 1000
+
+    async def token(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        return web.json_response({'access_token': 'x', 'expires_in': 3600})
+
+    async def discover(request: web.Request) -> web.Response:
+        await asyncio.sleep(args.discovery_latency / 1000)
+        return web.json_response(discovery_document(
+            request.match_info['api'],
+            request.match_info['version'],
+            args.discovery_kb
+        ))
+
+    async def api(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        API_CALLS['sent'] += 1
+        if random.random() < args.throttle:
+            API_CALLS['throttled'] += 1
+            return web.json_response({}, status=429)
+        return web.json_response({'spreadsheetId': 'sheet', 'id': 'id'})
+
+    app = web.Application()
+    app.router.add_post('/token', token)
+    app.router.add_get('/discovery/v1/apis/{api}/{version}/rest', discover)
+    app.router.add_route('*', '/{tail:(v4|drive).*}', api)
+    return app
+
+
+async def report(rows: list[dict[str, int]]) -> None:
+    async for wrapper_service in google.get_service():
+        spreadsheet_id = await google_serv.spreadsheet_create(wrapper_service)
+        await google_serv.publish_report(spreadsheet_id, rows, wrapper_service)
+
+
+async def measure(
+    reports: int,
+    rows: list[dict[str, int]],
+    before_report
+) -> tuple[float, float]:
+    API_CALLS.update(sent=0, throttled=0)
+    started = time.perf_counter()
+    for _ in range(reports):
+        before_report()
+        await report(rows)
+    elapsed = (time.perf_counter() - started) / reports * 1000
+    return elapsed, API_CALLS['sent'] / reports
+
+
+def remove_snapshots() -> None:
+    for name in os.listdir(SNAPSHOT_DIR):
+        os.remove(os.path.join(SNAPSHOT_DIR, name))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reports', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=20)
+    parser.add_argument('--discovery-latency', type=float, default=100)
+    parser.add_argument('--discovery-kb', type=int, default=500)
+    parser.add_argument('--rooms', type=int, default=30)
+    parser.add_argument('--throttle', type=float, default=0)
+    args = parser.parse_args()
+    rows = [{'room_id': room_id, 'count': 10} for room_id in range(args.rooms)]
+
+    runner = web.AppRunner(stub_app(args))
+    await runner.setup()
+    port = int(STUB.rsplit(':', 1)[1].strip('/'))
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+
+    def uncached() -> None:
+        google.discovery.clear()
+        remove_snapshots()
+
+    modes = (
+        ('uncached', uncached),
+        ('snapshot', google.discovery.clear),
+        ('cached', lambda: None),
+    )
+    print(f'{"discovery":>10} {"ms/report":>10} {"calls/report":>13}')
+    for name, before_report in modes:
+        elapsed, calls = await measure(args.reports, rows, before_report)
+        print(f'{name:>10} {elapsed:>10.1f} {calls:>13.1f}')
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""Задержка посторонних запросов во время волны входов.
+
+Пока выполняется `--logins` одновременных `POST /auth/jwt/login`,
+в том же цикле событий раз в 5 мс запрашивается `GET /meeting_rooms/`
+и измеряется его задержка. Сравниваются bcrypt в цикле событий
+(`inline`, прежнее поведение) и в пулах потоков и процессов.
+Запуск из корня проекта:
+
+    python -m benchmarks.password_pool --logins 50 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from urllib.parse import urlencode
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite+aiosqlite:///{DB_PATH}'
+
+from app.core.base import Base  # noqa: E402
+from app.core.db import async_engine  # noqa: E402
+from app.core.password import password_pool  # noqa: E402
+from app.main import app  # noqa: E402
+
+EMAIL = 'bench@example.com'
+PASSWORD = 'benchmark'
+
+
+async def call(
+    method: str,
+    path: str,
+    body: bytes = b'',
+    content_type: str = 'application/json'
+) -> int:
+    """Выполняет запрос к приложению напрямую через ASGI."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'content-type', content_type.encode())],
+        'client': ('bench', 0),
+        'server': ('bench', 80),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    status = 0
+
+    async def receive() -> dict:
+        return messages.pop() if messages else {'type': 'http.disconnect'}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+async def login() -> None:
+    status = await call(
+        'POST',
+        '/auth/jwt/login',
+        urlencode({'username': EMAIL, 'password': PASSWORD}).encode(),
+        'application/x-www-form-urlencoded'
+    )
+    assert status == 200, status
+
+
+async def run(kind: str, workers: None | int, logins: int) -> tuple:
+    password_pool.shutdown()
+    password_pool.kind = kind
+    password_pool.workers = workers
+    latencies = []
+    done = asyncio.Event()
+
+    async def ping() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            await call('GET', '/meeting_rooms/')
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.005)
+
+    pinger = asyncio.create_task(ping())
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await pinger
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return logins / elapsed, statistics.median(latencies), p99
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    await app.router.startup()
+    status = await call(
+        'POST',
+        '/auth/register',
+        f'{{"email": "{EMAIL}", "password": "{PASSWORD}"}}'.encode()
+    )
+    assert status == 201, status
+
+    print(f'{"pool":>8} {"logins/s":>9} {"p50, ms":>8} {"p99, ms":>8}')
+    for kind in ('inline', 'thread', 'process'):
+        rate, p50, p99 = await run(kind, args.workers, args.logins)
+        print(f'{kind:>8} {rate:>9.1f} {p50:>8.1f} {p99:>8.1f}')
+    await app.router.shutdown()
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""Пропускная способность бронирования при конкурентной нагрузке.
+
+Сравнивает глобальную блокировку всех броней с блокировками по комнатам
+при разном числе комнат. Запуск из корня проекта:
+
+    python -m benchmarks.room_locks --bookings 400 --latency 5
+
+`--latency` добавляет задержку (мс) внутри критической секции,
+имитируя сетевую БД между проверкой и записью.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite+aiosqlite:///{DB_PATH}'
+os.environ['AVAILABILITY_INDEX'] = 'false'
+
+from app.api import validators  # noqa: E402
+from app.core.base import Base  # noqa: E402
+from app.core.db import AsyncSessionLocal, async_engine  # noqa: E402
+from app.core.locks import room_locks  # noqa: E402
+from app.crud.meeting_room import meeting_room_crud  # noqa: E402
+from app.crud.reservation import reservation_crud  # noqa: E402
+from app.schemas.meeting_room import MeetingRoomCreate  # noqa: E402
+from app.schemas.reservation import ReservationCreate  # noqa: E402
+
+
+async def prepare(rooms: int) -> list[int]:
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        return [
+            (await meeting_room_crud.create(
+                MeetingRoomCreate(name=f'room {number}'), session
+            )).id
+            for number in range(rooms)
+        ]
+
+
+async def book(
+    room_id: int,
+    slot: int,
+    latency: float,
+    lock
+) -> None:
+    start_time = datetime.now().replace(microsecond=0) + timedelta(
+        days=1, minutes=30 * slot
+    )
+    data = ReservationCreate(
+        room_id=room_id,
+        start_time=start_time,
+        end_time=start_time + timedelta(minutes=30)
+    )
+    async with AsyncSessionLocal() as session:
+        async with lock(room_id, session):
+            await validators.check_time_reservation(
+                room_id=room_id,
+                start_time=data.start_time,
+                end_time=data.end_time,
+                session=session
+            )
+            await asyncio.sleep(latency)
+            await reservation_crud.create(data, session)
+
+
+async def run(rooms: int, bookings: int, latency: float, mode: str) -> float:
+    room_ids = await prepare(rooms)
+    global_lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def serial(room_id, session):
+        async with global_lock:
+            yield
+
+    def per_room(room_id, session):
+        return room_locks.hold([room_id], session)
+
+    lock = serial if mode == 'global' else per_room
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        book(room_ids[number % rooms], number // rooms, latency, lock)
+        for number in range(bookings)
+    ))
+    return bookings / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=400)
+    parser.add_argument('--latency', type=float, default=5.0)
+    parser.add_argument('--rooms', type=int, nargs='+', default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    print(f'{"rooms":>6} {"global, rps":>12} {"per room, rps":>14}')
+    for rooms in args.rooms:
+        results = [
+            await run(rooms, args.bookings, args.latency / 1000, mode)
+            for mode in ('global', 'per_room')
+        ]
+        print(f'{rooms:>6} {results[0]:>12.0f} {results[1]:>14.0f}')
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
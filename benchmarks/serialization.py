@@ -0,0 +1,98 @@
+"""Время выдачи страницы броней: ORM + pydantic против столбцов + orjson.
+
+Первый путь повторяет прежний эндпоинт: ORM-объекты проверяются схемой
+`ReservationResponse` с `orm_mode` и кодируются стандартным json.
+Второй читает столбцы в словари и кодирует их orjson. Запуск из корня
+проекта:
+
+    python -m benchmarks.serialization --rows 1000 10000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite+aiosqlite:///{DB_PATH}'
+os.environ['AVAILABILITY_INDEX'] = 'false'
+os.environ['OCCUPANCY_BITMAPS'] = 'false'
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.base import Base  # noqa: E402
+from app.core.db import AsyncSessionLocal, async_engine  # noqa: E402
+from app.crud.reservation import reservation_crud  # noqa: E402
+from app.models.meeting_room import MeetingRoom  # noqa: E402
+from app.models.reservation import Reservation  # noqa: E402
+from app.schemas.reservation import ReservationResponse  # noqa: E402
+from app.services.serialization import (  # noqa: E402
+    json_response, schema_columns
+)
+
+COLUMNS = schema_columns(ReservationResponse)
+
+
+async def prepare(rows: int) -> None:
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(MeetingRoom), [{'name': 'room'}])
+        start = datetime.now().replace(microsecond=0)
+        user_id = uuid.uuid4()
+        await connection.execute(insert(Reservation), [
+            {
+                'room_id': 1,
+                'user_id': user_id,
+                'start_time': start + timedelta(hours=number),
+                'end_time': start + timedelta(hours=number, minutes=30),
+            }
+            for number in range(rows)
+        ])
+
+
+async def pydantic_page(rows: int) -> bytes:
+    async with AsyncSessionLocal() as session:
+        page = await reservation_crud.get_page(session, limit=rows)
+    return JSONResponse(jsonable_encoder([
+        ReservationResponse.from_orm(reservation) for reservation in page.items
+    ])).body
+
+
+async def orjson_page(rows: int) -> bytes:
+    async with AsyncSessionLocal() as session:
+        page = await reservation_crud.get_page(
+            session, limit=rows, columns=COLUMNS
+        )
+    return json_response(page.items).body
+
+
+async def measure(function, rows: int, repeat: int) -> float:
+    await function(rows)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await function(rows)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"rows":>7} {"pydantic, ms":>13} {"orjson, ms":>11} {"x":>5}')
+    for rows in args.rows:
+        await prepare(rows)
+        old = await measure(pydantic_page, rows, args.repeat)
+        new = await measure(orjson_page, rows, args.repeat)
+        print(f'{rows:>7} {old:>13.1f} {new:>11.1f} {old / new:>5.1f}')
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
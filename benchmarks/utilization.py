@@ -0,0 +1,166 @@
+"""Время отчёта о загрузке комнат: цикл по броням против NumPy.
+
+Первый путь читает брони ORM-запросом и раскладывает каждую бронь
+по корзинам циклом Python. Второй повторяет эндпоинт
+`GET /meeting_rooms/utilization`: столбцы одним запросом и векторный
+подсчёт. Брони занимают год, по несколько в рабочий день каждой
+комнаты. Запуск из корня проекта:
+
+    python -m benchmarks.utilization --rooms 100 300 --granularity hour
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite+aiosqlite:///{DB_PATH}'
+os.environ['AVAILABILITY_INDEX'] = 'false'
+os.environ['OCCUPANCY_BITMAPS'] = 'false'
+
+import orjson  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+
+from app.core.base import Base  # noqa: E402
+from app.core.db import AsyncSessionLocal, async_engine  # noqa: E402
+from app.models.meeting_room import MeetingRoom  # noqa: E402
+from app.models.reservation import Reservation  # noqa: E402
+from app.services.serialization import NumpyJSONResponse  # noqa: E402
+from app.services.utilization import (  # noqa: E402
+    Granularity, align, compute_utilization, load_intervals
+)
+
+FIRST_DAY = datetime(2025, 1, 1)
+DAYS = 365
+# Начало (часы) и длительность (минуты) броней каждого дня.
+DAILY = ((9, 45), (11, 90), (14, 30), (16, 60))
+
+
+async def prepare(rooms: int) -> int:
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(MeetingRoom), [
+            {'name': f'room {number}'} for number in range(rooms)
+        ])
+        user_id = uuid.uuid4()
+        rows = [
+            {
+                'room_id': room_id,
+                'user_id': user_id,
+                'start_time': start,
+                'end_time': start + timedelta(minutes=minutes),
+            }
+            for room_id in range(1, rooms + 1)
+            for day in range(DAYS)
+            if (day + room_id) % 7 < 5
+            for hour, minutes in DAILY
+            for start in [FIRST_DAY + timedelta(days=day, hours=hour)]
+        ]
+        await connection.execute(insert(Reservation), rows)
+    return len(rows)
+
+
+async def loop_report(rooms: int, granularity: Granularity) -> bytes:
+    start_time, end_time = align(
+        FIRST_DAY, FIRST_DAY + timedelta(days=DAYS), granularity
+    )
+    width = granularity.width
+    buckets = (end_time - start_time) // width
+    async with AsyncSessionLocal() as session:
+        reservations = (await session.scalars(
+            select(Reservation).where(
+                Reservation.start_time < end_time,
+                Reservation.end_time > start_time
+            )
+        )).all()
+    booked = {room_id: [0.0] * buckets for room_id in range(1, rooms + 1)}
+    for reservation in reservations:
+        start = max(reservation.start_time, start_time)
+        end = min(reservation.end_time, end_time)
+        while start < end:
+            number = (start - start_time) // width
+            bucket_end = start_time + width * (number + 1)
+            piece = min(end, bucket_end) - start
+            booked[reservation.room_id][number] += piece.total_seconds() / 60
+            start = bucket_end
+    return orjson.dumps(booked, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def numpy_report(rooms: int, granularity: Granularity) -> bytes:
+    start_time, end_time = align(
+        FIRST_DAY, FIRST_DAY + timedelta(days=DAYS), granularity
+    )
+    room_ids = list(range(1, rooms + 1))
+    async with AsyncSessionLocal() as session:
+        intervals = await load_intervals(
+            room_ids, start_time, end_time, session
+        )
+    return NumpyJSONResponse(compute_utilization(
+        room_ids, intervals, start_time, end_time, granularity
+    )).body
+
+
+async def check_empty_period(rooms: int) -> None:
+    """Период без броней даёт нулевую загрузку, а не ошибку."""
+    room_ids = list(range(1, rooms + 1))
+    for granularity in Granularity:
+        start_time, end_time = align(
+            FIRST_DAY - timedelta(days=DAYS), FIRST_DAY, granularity
+        )
+        async with AsyncSessionLocal() as session:
+            intervals = await load_intervals(
+                room_ids, start_time, end_time, session
+            )
+        report = compute_utilization(
+            room_ids, intervals, start_time, end_time, granularity
+        )
+        assert all(
+            room['total_booked_minutes'] == 0 for room in report['rooms']
+        ), granularity
+
+
+async def measure(function, rooms: int, granularity, repeat: int) -> float:
+    await function(rooms, granularity)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await function(rooms, granularity)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rooms', type=int, nargs='+', default=[100, 300])
+    parser.add_argument(
+        '--granularity', type=Granularity, default=Granularity.DAY
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f'{"rooms":>6} {"rows":>8} {"loop, ms":>9} {"numpy, ms":>10} '
+        f'{"x":>5}'
+    )
+    try:
+        for rooms in args.rooms:
+            rows = await prepare(rooms)
+            await check_empty_period(rooms)
+            old = await measure(
+                loop_report, rooms, args.granularity, args.repeat
+            )
+            new = await measure(
+                numpy_report, rooms, args.granularity, args.repeat
+            )
+            print(
+                f'{rooms:>6} {rows:>8} {old:>9.1f} {new:>10.1f} '
+                f'{old / new:>5.1f}'
+            )
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
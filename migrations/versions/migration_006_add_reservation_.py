@@ -0,0 +1,41 @@
+"""006 add reservation indexes
+
+Revision ID: 3b8e41c7d2a9
+Revises: f056ecdd35a4
+Create Date: 2026-10-18 10:12:41.207315
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e41c7d2a9'
+down_revision = 'f056ecdd35a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_reservation_room_id_start_time_end_time',
+        'reservation',
+        ['room_id', 'start_time', 'end_time'],
+        unique=False
+    )
+    op.create_index(
+        'ix_reservation_user_id_start_time',
+        'reservation',
+        ['user_id', 'start_time'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'ix_reservation_user_id_start_time',
+        table_name='reservation'
+    )
+    op.drop_index(
+        'ix_reservation_room_id_start_time_end_time',
+        table_name='reservation'
+    )
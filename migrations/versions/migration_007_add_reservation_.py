@@ -0,0 +1,55 @@
+"""007 add reservation series
+
+Revision ID: 9d61f0a4be37
+Revises: 3b8e41c7d2a9
+Create Date: 2026-10-18 12:40:03.518846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import fastapi_users_db_sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision = '9d61f0a4be37'
+down_revision = '3b8e41c7d2a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reservationseries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('frequency', sa.String(length=10), nullable=False),
+        sa.Column('interval', sa.Integer(), nullable=False),
+        sa.Column('until', sa.DateTime(), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=True),
+        sa.Column('exceptions', sa.JSON(), nullable=False),
+        sa.Column('last_end_time', sa.DateTime(), nullable=False),
+        sa.Column('room_id', sa.Integer(), nullable=True),
+        sa.Column(
+            'user_id',
+            fastapi_users_db_sqlalchemy.guid.GUID(),
+            nullable=True
+        ),
+        sa.ForeignKeyConstraint(['room_id'], ['meetingroom.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_reservationseries_room_id_last_end_time',
+        'reservationseries',
+        ['room_id', 'last_end_time'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'ix_reservationseries_room_id_last_end_time',
+        table_name='reservationseries'
+    )
+    op.drop_table('reservationseries')
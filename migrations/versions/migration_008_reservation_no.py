@@ -0,0 +1,67 @@
+"""008 reservation no overlap
+
+Revision ID: 5fa2c9e1d803
+Revises: 9d61f0a4be37
+Create Date: 2026-10-18 15:02:27.694120
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5fa2c9e1d803'
+down_revision = '9d61f0a4be37'
+branch_labels = None
+depends_on = None
+
+# Брони комнаты не пересекаются, поэтому достаточно сравнить
+# новую бронь с последней бронью комнаты, начавшейся до её конца.
+SQLITE_LATEST_END = (
+    'SELECT end_time FROM reservation '
+    'WHERE room_id = NEW.room_id AND start_time < NEW.end_time{exclude} '
+    'ORDER BY start_time DESC LIMIT 1'
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        op.execute(
+            'ALTER TABLE reservation ADD CONSTRAINT reservation_overlap '
+            'EXCLUDE USING gist '
+            '(room_id WITH =, tsrange(start_time, end_time) WITH &&)'
+        )
+        return
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        'CREATE TRIGGER reservation_no_overlap_insert '
+        'BEFORE INSERT ON reservation '
+        'BEGIN '
+        "SELECT RAISE(ABORT, 'room_not_found') WHERE NOT EXISTS "
+        '(SELECT 1 FROM meetingroom WHERE id = NEW.room_id); '
+        "SELECT RAISE(ABORT, 'reservation_overlap') WHERE "
+        f'({SQLITE_LATEST_END.format(exclude="")}) > NEW.start_time; '
+        'END'
+    )
+    op.execute(
+        'CREATE TRIGGER reservation_no_overlap_update '
+        'BEFORE UPDATE OF room_id, start_time, end_time ON reservation '
+        'BEGIN '
+        "SELECT RAISE(ABORT, 'reservation_overlap') WHERE "
+        f'({SQLITE_LATEST_END.format(exclude=" AND id != NEW.id")}) '
+        '> NEW.start_time; '
+        'END'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            'ALTER TABLE reservation DROP CONSTRAINT reservation_overlap'
+        )
+        return
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute('DROP TRIGGER reservation_no_overlap_update')
+    op.execute('DROP TRIGGER reservation_no_overlap_insert')
@@ -0,0 +1,41 @@
+"""009 reservation pagination indexes
+
+Revision ID: 7c1d3e5a9b42
+Revises: 5fa2c9e1d803
+Create Date: 2026-10-18 16:40:05.318842
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1d3e5a9b42'
+down_revision = '5fa2c9e1d803'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_reservation_start_time_id',
+        'reservation',
+        ['start_time', 'id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_reservationseries_user_id_start_time',
+        'reservationseries',
+        ['user_id', 'start_time'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'ix_reservationseries_user_id_start_time',
+        table_name='reservationseries'
+    )
+    op.drop_index(
+        'ix_reservation_start_time_id',
+        table_name='reservation'
+    )
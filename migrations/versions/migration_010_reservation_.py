@@ -0,0 +1,90 @@
+"""010 reservation daily counts
+
+Revision ID: 2e6b9f4c1a7d
+Revises: 7c1d3e5a9b42
+Create Date: 2026-10-18 19:20:41.506213
+
+"""
+from datetime import datetime, time, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e6b9f4c1a7d'
+down_revision = '7c1d3e5a9b42'
+branch_labels = None
+depends_on = None
+
+DAY = timedelta(days=1)
+
+
+def daily_counts(connection) -> list[dict]:
+    """Счётчики по комнатам и дням для уже существующих броней."""
+    counts = {}
+    rows = connection.execute(sa.text(
+        'SELECT room_id, start_time, end_time FROM reservation'
+    )).yield_per(1000)
+    for room_id, start_time, end_time in rows:
+        if isinstance(start_time, str):
+            start_time = datetime.fromisoformat(start_time)
+            end_time = datetime.fromisoformat(end_time)
+        day = start_time.date()
+        first = True
+        while datetime.combine(day, time.min) < end_time:
+            day_start = datetime.combine(day, time.min)
+            overlap = (
+                min(end_time, day_start + DAY) - max(start_time, day_start)
+            )
+            counters = counts.setdefault((room_id, day), [0, 0, 0])
+            counters[0] += 1
+            counters[1] += first
+            counters[2] += round(overlap.total_seconds() / 60)
+            first = False
+            day += DAY
+    return [
+        {
+            'room_id': room_id,
+            'day': day,
+            'reservations': reservations,
+            'starts': starts,
+            'minutes': minutes,
+        }
+        for (room_id, day), (reservations, starts, minutes) in counts.items()
+    ]
+
+
+def upgrade():
+    table = op.create_table(
+        'reservationdailycount',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('room_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('reservations', sa.Integer(), nullable=False),
+        sa.Column('starts', sa.Integer(), nullable=False),
+        sa.Column('minutes', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['room_id'], ['meetingroom.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'room_id', 'day',
+            name='uq_reservationdailycount_room_id_day'
+        )
+    )
+    op.create_index(
+        'ix_reservationdailycount_day',
+        'reservationdailycount',
+        ['day'],
+        unique=False
+    )
+    rows = daily_counts(op.get_bind())
+    if rows:
+        op.bulk_insert(table, rows)
+
+
+def downgrade():
+    op.drop_index(
+        'ix_reservationdailycount_day',
+        table_name='reservationdailycount'
+    )
+    op.drop_table('reservationdailycount')